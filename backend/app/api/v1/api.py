@@ -6,7 +6,9 @@ from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, List
 import time
 
-api_router = APIRouter()
+from app.core.timing import TimedRoute
+
+api_router = APIRouter(route_class=TimedRoute)
 
 # Health check endpoint for API
 @api_router.get("/health")
@@ -151,7 +153,7 @@ async def get_models():
 
 # Try to include the original endpoints if they work
 try:
-    from app.api.v1.endpoints import exoplanets, predictions, auth, models
+    from app.api.v1.endpoints import exoplanets, predictions, auth, models, solar_system, admin
     
     # Include original routers if they exist and work
     api_router.include_router(
@@ -178,6 +180,18 @@ try:
         tags=["authentication"]
     )
     
+    api_router.include_router(
+        solar_system.router,
+        prefix="/solar-system",
+        tags=["solar-system"]
+    )
+    
+    api_router.include_router(
+        admin.router,
+        prefix="/admin",
+        tags=["admin"]
+    )
+    
 except ImportError as e:
     print(f"Warning: Could not import advanced endpoints: {e}")
     # Continue with basic endpoints only
\ No newline at end of file
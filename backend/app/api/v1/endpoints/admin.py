@@ -0,0 +1,156 @@
+"""
+Operational admin endpoints
+"""
+
+import asyncio
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query, status
+
+from app.core.config import settings
+from app.core.exceptions import AuthenticationError, NotFoundError
+from app.core.loop_monitor import loop_monitor
+from app.core.worker_status import memory_usage, worker_status
+from app.core.timing import TimedRoute
+from app.schemas.user import APIKeyCreate
+from app.services.api_key_service import api_key_service
+from app.services.metering_service import usage_meter
+from app.services.token_service import token_service
+
+router = APIRouter(route_class=TimedRoute)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Check X-Admin-Token against ADMIN_TOKEN; without one configured, only DEBUG allows access"""
+    if not settings.ADMIN_TOKEN:
+        if not settings.DEBUG:
+            raise NotFoundError("Not Found")
+        return
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise AuthenticationError("Invalid admin token")
+
+
+@router.get("/event-loop", dependencies=[Depends(require_admin)])
+async def get_event_loop_report(limit: int = 20):
+    """
+    Event loop lag and recent blocking calls
+
+    **Parameters:**
+    - limit: Maximum number of block reports to return (default: 20)
+
+    **Returns:**
+    - Lag statistics and, newest first, stacks sampled while the loop was blocked
+    """
+    return {
+        "success": True,
+        "data": {
+            **loop_monitor.stats(),
+            "reports": loop_monitor.reports()[:max(limit, 0)]
+        },
+        "message": "Event loop report retrieved successfully"
+    }
+
+
+@router.delete("/event-loop/reports", dependencies=[Depends(require_admin)])
+async def clear_event_loop_reports():
+    """Forget collected block reports and reset the maximum lag"""
+    loop_monitor.clear()
+    return {
+        "success": True,
+        "data": None,
+        "message": "Event loop reports cleared"
+    }
+
+
+@router.get("/workers", dependencies=[Depends(require_admin)])
+async def get_workers():
+    """
+    Health of the server processes
+
+    **Returns:**
+    - One report per worker of the prefork server (state, heartbeat age,
+      requests served, open connections, loop lag and memory), or just
+      this process when running a single server
+    """
+    workers = await asyncio.to_thread(worker_status.read_all)
+    return {
+        "success": True,
+        "data": {
+            "prefork": bool(workers),
+            "workers": workers or [{"pid": os.getpid(), "memory": memory_usage()}]
+        },
+        "message": "Worker status retrieved successfully"
+    }
+
+
+@router.post("/api-keys", status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
+async def create_api_key(request: APIKeyCreate):
+    """
+    Issue an API key
+
+    **Parameters:**
+    - name, description: What the key is for
+    - scopes: Permissions, e.g. ["read", "write", "predict"]
+    - expires_days: Lifetime in days (default: no expiry)
+
+    **Returns:**
+    - The key's details and its secret, which is not shown again
+    """
+    api_key = await api_key_service.create(request)
+    return {
+        "success": True,
+        "data": api_key,
+        "message": "API key created; store it now, it cannot be retrieved later"
+    }
+
+
+@router.get("/api-keys", dependencies=[Depends(require_admin)])
+async def list_api_keys():
+    """All API keys with their usage, newest first (secrets are never returned)"""
+    api_keys = await api_key_service.list()
+    return {
+        "success": True,
+        "data": api_keys,
+        "message": f"Retrieved {len(api_keys)} API keys"
+    }
+
+
+@router.delete("/api-keys/{key_id}", dependencies=[Depends(require_admin)])
+async def revoke_api_key(key_id: str):
+    """
+    Revoke an API key and every access token issued for it
+
+    The key stops working at once in this worker and within
+    API_KEY_CACHE_TTL_SECONDS elsewhere; its tokens within
+    JWT_REVOCATION_REFRESH_SECONDS.
+    """
+    await api_key_service.revoke(key_id)
+    await token_service.revoke_subject(key_id)
+    return {
+        "success": True,
+        "data": None,
+        "message": f"API key {key_id} revoked"
+    }
+
+
+@router.get("/usage", dependencies=[Depends(require_admin)])
+async def get_usage(
+    key_id: Optional[str] = Query(None, description="Only this API key, broken down per route"),
+    days: int = Query(7, ge=1, le=90, description="UTC days to cover, including today")
+):
+    """
+    Metered API usage
+
+    **Returns:**
+    - Per day and metric (requests, predictions, simulation_frames, rows):
+      totals per key, or for one key per route together with today's
+      usage against its tier's quotas
+    """
+    tier = await api_key_service.tier(key_id) if key_id else None
+    return {
+        "success": True,
+        "data": await usage_meter.summary(key_id=key_id, days=days, tier=tier),
+        "message": "Usage retrieved successfully"
+    }
@@ -1,135 +1,157 @@
 """
-Authentication endpoints (basic implementation)
+Authentication endpoints: access tokens, credential checks and usage
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
 import logging
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import AuthenticationError
+from app.core.security import get_api_key, get_token
+from app.core.timing import TimedRoute
+from app.models.user import User
 from app.schemas.user import Token
+from app.services.api_key_service import APIKeyPrincipal
+from app.services.metering_service import usage_meter
+from app.services.token_service import TokenClaims, token_service
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
-security = HTTPBearer()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/token", response_model=Token)
-async def login_for_access_token():
+async def login_for_access_token(
+    api_key: Optional[APIKeyPrincipal] = Depends(get_api_key),
+    token: Optional[TokenClaims] = Depends(get_token)
+):
     """
-    Get access token for API authentication
+    Exchange an API key for a signed access token
     
-    For demonstration purposes, this endpoint returns a demo token.
-    In production, this would validate user credentials and return a JWT token.
+    The token carries the key's scopes, usage tier and rate limit, so
+    requests presenting it are authenticated without a database lookup.
+    
+    **Parameters:**
+    - X-API-Key header (or Authorization: Bearer with the key)
     
     **Returns:**
-    - Access token for API authentication
-    - Token type and expiration information
+    - Access token to send as Authorization: Bearer
+    - Token type and seconds until it expires
     """
-    try:
-        # Demo token for frontend integration
-        demo_token = "demo_token_exoplanet_ai_2025"
-        
-        return Token(
-            access_token=demo_token,
-            token_type="bearer",
-            expires_in=3600  # 1 hour
-        )
-        
-    except Exception as e:
-        logger.error(f"Error generating token: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An error occurred while generating access token"
-        )
+    if api_key is None or token is not None:
+        # Tokens cannot be renewed with a token, or one leaked token would live forever
+        raise AuthenticationError("API key required to obtain an access token")
+    access_token, expires_in = token_service.issue(api_key)
+    return Token(access_token=access_token, token_type="bearer", expires_in=expires_in)
 
 
 @router.get("/verify")
-async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def verify_token(
+    api_key: Optional[APIKeyPrincipal] = Depends(get_api_key),
+    token: Optional[TokenClaims] = Depends(get_token)
+):
     """
-    Verify the provided access token
+    Verify the provided access token or API key
     
     **Parameters:**
-    - Authorization header with Bearer token
+    - Authorization header with Bearer token or API key
     
     **Returns:**
-    - Token validation status and user information
+    - Validation status and what the credentials grant
     """
-    try:
-        token = credentials.credentials
-        
-        # For demo purposes, accept any token that starts with "demo_token"
-        if token.startswith("demo_token"):
-            return {
-                "success": True,
-                "data": {
-                    "valid": True,
-                    "user_id": "demo_user",
-                    "username": "demo",
-                    "scopes": ["read", "write", "predict"]
-                },
-                "message": "Token is valid"
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error verifying token: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An error occurred while verifying token"
-        )
+    # Credentials were already checked by APIKeyMiddleware
+    if api_key is None:
+        raise AuthenticationError("No access token or API key provided")
+    data = {
+        "valid": True,
+        "key_id": api_key.key_id,
+        "name": api_key.name,
+        "user_id": api_key.created_by,
+        "scopes": sorted(api_key.scopes),
+        "tier": api_key.tier,
+        "rate_limit": api_key.rate_limit
+    }
+    if token is not None:
+        data.update(token_id=token.jti, expires_at=token.expires_at)
+        return {"success": True, "data": data, "message": "Token is valid"}
+    return {"success": True, "data": data, "message": "API key is valid"}
 
 
 @router.get("/me")
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(api_key: Optional[APIKeyPrincipal] = Depends(get_api_key)):
     """
-    Get current user information
+    Get the caller's API key and, if it belongs to a user, the user's profile
     
     **Parameters:**
-    - Authorization header with Bearer token
+    - Authorization header with Bearer token or API key
     
     **Returns:**
-    - Current user profile and permissions
+    - Key, tier and permissions, and the owning user's profile
     """
-    try:
-        token = credentials.credentials
-        
-        # For demo purposes, return demo user info
-        if token.startswith("demo_token"):
-            return {
-                "success": True,
-                "data": {
-                    "id": "demo_user",
-                    "username": "demo",
-                    "email": "demo@exoplanet-ai.com",
-                    "full_name": "Demo User",
-                    "organization": "NASA Space Apps Challenge",
-                    "is_active": True,
-                    "is_verified": True,
-                    "rate_limit_tier": "pro",
-                    "created_at": "2025-01-01T00:00:00Z",
-                    "permissions": ["read", "write", "predict", "admin"]
-                },
-                "message": "User information retrieved successfully"
+    if api_key is None:
+        raise AuthenticationError("No access token or API key provided")
+    user = None
+    if api_key.created_by is not None:
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, api_key.created_by)
+    return {
+        "success": True,
+        "data": {
+            "key_id": api_key.key_id,
+            "name": api_key.name,
+            "rate_limit_tier": api_key.tier,
+            "permissions": sorted(api_key.scopes),
+            "user": None if user is None else {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "full_name": user.full_name,
+                "organization": user.organization,
+                "is_active": user.is_active,
+                "is_verified": user.is_verified,
+                "created_at": user.created_at
             }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting user info: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An error occurred while retrieving user information"
-        )
\ No newline at end of file
+        },
+        "message": "User information retrieved successfully"
+    }
+
+
+@router.post("/revoke")
+async def revoke_token(token: Optional[TokenClaims] = Depends(get_token)):
+    """
+    Revoke the presented access token before it expires
+    
+    **Parameters:**
+    - Authorization header with the Bearer token to revoke
+    
+    **Returns:**
+    - Confirmation; the token stops working at once in this worker and
+      within JWT_REVOCATION_REFRESH_SECONDS in the others
+    """
+    if token is None:
+        raise AuthenticationError("No access token provided")
+    await token_service.revoke(token)
+    return {"success": True, "data": {"token_id": token.jti}, "message": "Token revoked"}
+
+
+@router.get("/usage")
+async def get_usage(
+    days: int = Query(7, ge=1, le=90, description="UTC days to cover, including today"),
+    api_key: Optional[APIKeyPrincipal] = Depends(get_api_key)
+):
+    """
+    Usage metered for the calling API key
+    
+    **Parameters:**
+    - X-API-Key header, or Authorization: Bearer with the key or an access token
+    
+    **Returns:**
+    - Usage per day, route and metric, and today's usage against the daily quotas
+    """
+    if api_key is None:
+        raise AuthenticationError("API key or access token required")
+    return {
+        "success": True,
+        "data": await usage_meter.summary(key_id=api_key.key_id, days=days, tier=api_key.tier),
+        "message": "Usage retrieved successfully"
+    }
@@ -10,16 +10,24 @@ import logging
 from app.core.database import get_db
 from app.schemas.exoplanet import (
     ExoplanetCreate, ExoplanetUpdate, ExoplanetResponse, 
-    ExoplanetFilter, ExoplanetListResponse, Mission, PlanetType
+    ExoplanetFilter, ExoplanetListResponse, Mission, PlanetType,
+    ExoplanetSystemPositionsResponse, ExoplanetSystemOrbitsResponse
 )
 from app.services.exoplanet_service import ExoplanetService
-from app.core.exceptions import NotFoundError, ValidationError
+from app.services.exoplanet_orbit_service import exoplanet_orbit_service
+from app.core.compute import compute_pool
+from app.core.serialization import FastJSONResponse, orm_rows
+from app.core.response_cache import CachedRoute, EXOPLANETS, PREDICTIONS, cached
+from app.core.exceptions import NotFoundError, ValidationError, ExoPlanetException
+from app.core.security import require_scopes
+from app.services.metering_service import Meter, ROWS, metered
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/", response_model=ExoplanetListResponse)
+@cached(tags=[EXOPLANETS], metric=ROWS)
 async def get_exoplanets(
     # Search parameters
     search: Optional[str] = Query(None, description="Search by name, host star, or planet type"),
@@ -46,7 +54,8 @@ async def get_exoplanets(
     sort_by: str = Query("name", description="Sort field (name, discovery_year, distance, orbital_period, planetary_radius)"),
     sort_order: str = Query("asc", description="Sort order (asc, desc)"),
     
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    meter: Meter = Depends(metered(ROWS))
 ):
     """
     Get a list of exoplanets with filtering, sorting, and pagination
@@ -75,6 +84,7 @@ async def get_exoplanets(
     - List of exoplanets matching the criteria
     - Pagination metadata (total count, pages, etc.)
     """
+    meter.check(page_size)
     try:
         # Create filter object
         filters = ExoplanetFilter(
@@ -99,13 +109,14 @@ async def get_exoplanets(
         
         # Get exoplanets
         exoplanets, pagination = await ExoplanetService.get_exoplanets(db, filters)
+        meter.add(len(exoplanets))
         
-        return ExoplanetListResponse(
-            success=True,
-            data=[ExoplanetResponse.from_orm(exo) for exo in exoplanets],
-            pagination=pagination,
-            message=f"Retrieved {len(exoplanets)} exoplanets"
-        )
+        return FastJSONResponse({
+            "success": True,
+            "data": orm_rows(exoplanets, ExoplanetResponse),
+            "pagination": pagination,
+            "message": f"Retrieved {len(exoplanets)} exoplanets"
+        })
         
     except ValidationError as e:
         logger.error(f"Validation error in get_exoplanets: {e}")
@@ -122,6 +133,7 @@ async def get_exoplanets(
 
 
 @router.get("/{exoplanet_id}", response_model=ExoplanetResponse)
+@cached(tags=[EXOPLANETS])
 async def get_exoplanet(
     exoplanet_id: int,
     db: AsyncSession = Depends(get_db)
@@ -156,7 +168,8 @@ async def get_exoplanet(
         )
 
 
-@router.post("/", response_model=ExoplanetResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=ExoplanetResponse, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(require_scopes("write"))])
 async def create_exoplanet(
     exoplanet_data: ExoplanetCreate,
     db: AsyncSession = Depends(get_db)
@@ -194,7 +207,7 @@ async def create_exoplanet(
         )
 
 
-@router.put("/{exoplanet_id}", response_model=ExoplanetResponse)
+@router.put("/{exoplanet_id}", response_model=ExoplanetResponse, dependencies=[Depends(require_scopes("write"))])
 async def update_exoplanet(
     exoplanet_id: int,
     exoplanet_data: ExoplanetUpdate,
@@ -233,7 +246,7 @@ async def update_exoplanet(
         )
 
 
-@router.delete("/{exoplanet_id}")
+@router.delete("/{exoplanet_id}", dependencies=[Depends(require_scopes("write"))])
 async def delete_exoplanet(
     exoplanet_id: int,
     db: AsyncSession = Depends(get_db)
@@ -269,6 +282,7 @@ async def delete_exoplanet(
 
 
 @router.get("/stats/overview")
+@cached(tags=[EXOPLANETS, PREDICTIONS])  # includes recent_predictions
 async def get_exoplanet_statistics(db: AsyncSession = Depends(get_db)):
     """
     Get comprehensive exoplanet database statistics
@@ -293,4 +307,81 @@ async def get_exoplanet_statistics(db: AsyncSession = Depends(get_db)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while retrieving statistics"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/systems/{host_star}/positions", response_model=ExoplanetSystemPositionsResponse)
+async def get_system_positions(
+    host_star: str,
+    timestamp: Optional[float] = Query(None, description="Unix timestamp (default: current time)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get current 3D positions of every catalogued planet around a host star
+    
+    **Parameters:**
+    - host_star: Name of the host star (e.g. TRAPPIST-1)
+    - timestamp: Unix timestamp for position calculation (optional, defaults to current time)
+    
+    **Returns:**
+    - Derived orbital elements and position of each planet relative to the star
+    """
+    try:
+        system = await exoplanet_orbit_service.get_system(db, host_star)
+        if not system:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No exoplanets with known orbital periods found for host star '{host_star}'"
+            )
+        
+        return exoplanet_orbit_service.compute_positions(system, timestamp)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error calculating positions for system {host_star}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while calculating system positions"
+        )
+
+
+@router.get("/systems/{host_star}/orbits", response_model=ExoplanetSystemOrbitsResponse)
+async def get_system_orbits(
+    host_star: str,
+    resolution: int = Query(360, description="Number of points per orbit (default: 360)", ge=36, le=1440),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get orbital paths for every catalogued planet around a host star
+    
+    **Parameters:**
+    - host_star: Name of the host star (e.g. TRAPPIST-1)
+    - resolution: Number of points per orbit (36-1440, default: 360)
+    
+    **Returns:**
+    - Orbital path of each planet, cached per host star and resolution
+    """
+    try:
+        system = await exoplanet_orbit_service.get_system(db, host_star)
+        if not system:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No exoplanets with known orbital periods found for host star '{host_star}'"
+            )
+        
+        orbits = exoplanet_orbit_service.get_cached_orbits(system, resolution)
+        if orbits is None:
+            orbits = await compute_pool.run(exoplanet_orbit_service.compute_orbits, system, resolution)
+            exoplanet_orbit_service.store_orbits(system, orbits)
+        
+        return orbits
+        
+    except (HTTPException, ExoPlanetException):
+        raise
+    except Exception as e:
+        logger.error(f"Error generating orbits for system {host_star}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while generating system orbits"
+        )
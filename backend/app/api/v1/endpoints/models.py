@@ -2,17 +2,19 @@
 ML Model information endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from app.core.database import get_db
+from app.core.http_cache import CachedPayload, conditional_response
+from app.core.response_cache import CachedRoute, MODEL_METRICS, cached
 from app.schemas.exoplanet import ModelPerformanceResponse
 from app.services.exoplanet_service import PredictionService
 from app.services.ml_service import ml_model
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/", summary="Get available models")
@@ -57,6 +59,7 @@ async def get_models():
 
 
 @router.get("/performance", response_model=ModelPerformanceResponse)
+@cached(tags=[MODEL_METRICS])
 async def get_model_performance(db: AsyncSession = Depends(get_db)):
     """
     Get current model performance metrics
@@ -216,8 +219,93 @@ async def get_training_history():
         )
 
 
+# Static comparison, serialized (and compressed) once
+_MODEL_COMPARISON = {
+    "models": [
+        {
+            "name": "Neural Network (Current)",
+            "architecture": "3-layer MLP with dropout",
+            "accuracy": 94.7,
+            "precision": 95.0,
+            "recall": 94.0,
+            "training_time": "2.5 hours",
+            "pros": [
+                "High accuracy",
+                "Good generalization", 
+                "Handles non-linear patterns"
+            ],
+            "cons": [
+                "Requires more training time",
+                "Black box model"
+            ],
+            "status": "active"
+        },
+        {
+            "name": "Random Forest",
+            "architecture": "100 trees, max depth 10",
+            "accuracy": 91.2,
+            "precision": 92.1,
+            "recall": 90.3,
+            "training_time": "45 minutes",
+            "pros": [
+                "Fast training",
+                "Feature importance",
+                "Robust to outliers"
+            ],
+            "cons": [
+                "Lower accuracy",
+                "Can overfit with small datasets"
+            ],
+            "status": "tested"
+        },
+        {
+            "name": "Support Vector Machine",
+            "architecture": "RBF kernel, C=1.0",
+            "accuracy": 88.9,
+            "precision": 89.5,
+            "recall": 88.2,
+            "training_time": "1.2 hours",
+            "pros": [
+                "Good with small datasets",
+                "Memory efficient",
+                "Effective in high dimensions"
+            ],
+            "cons": [
+                "Sensitive to feature scaling",
+                "No probability estimates"
+            ],
+            "status": "tested"
+        },
+        {
+            "name": "Gradient Boosting",
+            "architecture": "XGBoost, 200 estimators",
+            "accuracy": 92.8,
+            "precision": 93.2,
+            "recall": 92.1,
+            "training_time": "1.8 hours",
+            "pros": [
+                "High performance",
+                "Feature importance",
+                "Handles missing values"
+            ],
+            "cons": [
+                "Prone to overfitting",
+                "Many hyperparameters"
+            ],
+            "status": "tested"
+        }
+    ],
+    "selection_rationale": "The neural network approach was selected as our primary model due to its superior performance across all metrics. While it requires more computational resources and training time, the significant improvement in accuracy (94.7% vs 92.8% for the next best model) justifies the additional complexity. The model's ability to capture non-linear relationships in the exoplanet detection data makes it particularly well-suited for this application."
+}
+_model_comparison_payload = CachedPayload.from_content({
+    "success": True,
+    "data": _MODEL_COMPARISON,
+    "message": "Model comparison retrieved successfully"
+})
+
+
 @router.get("/comparison")
-async def get_model_comparison():
+async def get_model_comparison(request: Request):
     """
     Get comparison of different models tested
     
@@ -227,89 +315,7 @@ async def get_model_comparison():
     - Recommendation rationale
     """
     try:
-        comparison_data = {
-            "models": [
-                {
-                    "name": "Neural Network (Current)",
-                    "architecture": "3-layer MLP with dropout",
-                    "accuracy": 94.7,
-                    "precision": 95.0,
-                    "recall": 94.0,
-                    "training_time": "2.5 hours",
-                    "pros": [
-                        "High accuracy",
-                        "Good generalization", 
-                        "Handles non-linear patterns"
-                    ],
-                    "cons": [
-                        "Requires more training time",
-                        "Black box model"
-                    ],
-                    "status": "active"
-                },
-                {
-                    "name": "Random Forest",
-                    "architecture": "100 trees, max depth 10",
-                    "accuracy": 91.2,
-                    "precision": 92.1,
-                    "recall": 90.3,
-                    "training_time": "45 minutes",
-                    "pros": [
-                        "Fast training",
-                        "Feature importance",
-                        "Robust to outliers"
-                    ],
-                    "cons": [
-                        "Lower accuracy",
-                        "Can overfit with small datasets"
-                    ],
-                    "status": "tested"
-                },
-                {
-                    "name": "Support Vector Machine",
-                    "architecture": "RBF kernel, C=1.0",
-                    "accuracy": 88.9,
-                    "precision": 89.5,
-                    "recall": 88.2,
-                    "training_time": "1.2 hours",
-                    "pros": [
-                        "Good with small datasets",
-                        "Memory efficient",
-                        "Effective in high dimensions"
-                    ],
-                    "cons": [
-                        "Sensitive to feature scaling",
-                        "No probability estimates"
-                    ],
-                    "status": "tested"
-                },
-                {
-                    "name": "Gradient Boosting",
-                    "architecture": "XGBoost, 200 estimators",
-                    "accuracy": 92.8,
-                    "precision": 93.2,
-                    "recall": 92.1,
-                    "training_time": "1.8 hours",
-                    "pros": [
-                        "High performance",
-                        "Feature importance",
-                        "Handles missing values"
-                    ],
-                    "cons": [
-                        "Prone to overfitting",
-                        "Many hyperparameters"
-                    ],
-                    "status": "tested"
-                }
-            ],
-            "selection_rationale": "The neural network approach was selected as our primary model due to its superior performance across all metrics. While it requires more computational resources and training time, the significant improvement in accuracy (94.7% vs 92.8% for the next best model) justifies the additional complexity. The model's ability to capture non-linear relationships in the exoplanet detection data makes it particularly well-suited for this application."
-        }
-        
-        return {
-            "success": True,
-            "data": comparison_data,
-            "message": "Model comparison retrieved successfully"
-        }
+        return conditional_response(request, _model_comparison_payload)
         
     except Exception as e:
         logger.error(f"Error retrieving model comparison: {e}")
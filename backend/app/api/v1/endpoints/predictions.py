@@ -2,29 +2,38 @@
 Prediction endpoints for exoplanet detection
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 import logging
 
 from app.core.database import get_db
 from app.schemas.exoplanet import (
     PredictionInput, PredictionBatch, PredictionResponse, 
-    BatchPredictionResponse, PredictionResult
+    BatchPredictionResponse, PredictionResult,
+    SketchMetric, PredictionQuantilesResponse
 )
 from app.services.exoplanet_service import PredictionService
 from app.services.ml_service import ml_model
+from app.services.prediction_stats_service import prediction_stats_service
 from app.core.exceptions import ModelError, ValidationError
+from app.core.serialization import FastJSONResponse
+from app.core.response_cache import CachedRoute, PREDICTIONS, cached
+from app.core.metrics import batch_size
+from app.core.security import require_scopes
+from app.services.metering_service import Meter, PREDICTIONS as METERED_PREDICTIONS, metered
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
-@router.post("/predict", response_model=PredictionResponse)
+@router.post("/predict", response_model=PredictionResponse, dependencies=[Depends(require_scopes("predict"))])
 async def predict_exoplanet(
     input_data: PredictionInput,
     background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    meter: Meter = Depends(metered(METERED_PREDICTIONS))
 ):
     """
     Predict exoplanet classification based on input parameters
@@ -46,9 +55,11 @@ async def predict_exoplanet(
     **Returns:**
     - Detailed prediction results with confidence scores and metrics
     """
+    meter.check()
     try:
         # Create prediction
         result = await PredictionService.create_prediction(db, input_data)
+        meter.add()
         
         return PredictionResponse(
             success=True,
@@ -76,11 +87,12 @@ async def predict_exoplanet(
         )
 
 
-@router.post("/predict/batch", response_model=BatchPredictionResponse)
+@router.post("/predict/batch", response_model=BatchPredictionResponse, dependencies=[Depends(require_scopes("predict"))])
 async def predict_batch(
     batch_data: PredictionBatch,
     background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    meter: Meter = Depends(metered(METERED_PREDICTIONS))
 ):
     """
     Perform batch predictions for multiple exoplanet candidates
@@ -94,16 +106,19 @@ async def predict_batch(
     **Returns:**
     - Array of prediction results in the same order as input
     """
+    meter.check(len(batch_data.predictions))
     try:
         # Validate batch size
         if len(batch_data.predictions) > 100:
             raise ValidationError("Batch size exceeds maximum limit of 100")
+        batch_size.labels("prediction").observe(len(batch_data.predictions))
         
         # Process batch predictions
         results = []
         for input_data in batch_data.predictions:
             result = await PredictionService.create_prediction(db, input_data)
             results.append(result)
+        meter.add(len(results))
         
         return BatchPredictionResponse(
             success=True,
@@ -185,6 +200,7 @@ async def get_prediction(
 
 
 @router.get("/history")
+@cached(tags=[PREDICTIONS])
 async def get_prediction_history(
     limit: int = 50,
     user_id: Optional[str] = None,
@@ -222,11 +238,11 @@ async def get_prediction_history(
                 "processing_time": pred.processing_time
             })
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": results,
             "message": f"Retrieved {len(results)} predictions"
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error retrieving prediction history: {e}")
@@ -253,17 +269,16 @@ async def get_prediction_stats(db: AsyncSession = Depends(get_db)):
         # Get model info
         model_info = ml_model.get_model_info()
         
+        # Counters are maintained on every prediction write
+        statistics = prediction_stats_service.summary()
+        statistics["accuracy_rate"] = performance.get("accuracy", 0.947) * 100
+        
         return {
             "success": True,
             "data": {
                 "model_performance": performance,
                 "model_info": model_info,
-                "statistics": {
-                    "total_predictions": 15847,  # Simulated
-                    "accuracy_rate": performance.get("accuracy", 0.947) * 100,
-                    "avg_processing_time": 0.3,
-                    "predictions_today": 1247  # Simulated
-                }
+                "statistics": statistics
             },
             "message": "Prediction statistics retrieved successfully"
         }
@@ -273,4 +288,54 @@ async def get_prediction_stats(db: AsyncSession = Depends(get_db)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while retrieving prediction statistics"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/quantiles", response_model=PredictionQuantilesResponse)
+async def get_prediction_quantiles(
+    metric: SketchMetric = Query(SketchMetric.CONFIDENCE, description="Metric to summarize"),
+    start: Optional[datetime] = Query(None, description="Window start (default: 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="Window end (default: now)"),
+    q: List[float] = Query([0.5, 0.95, 0.99], description="Quantiles to compute, between 0 and 1")
+):
+    """
+    Get percentiles of prediction confidence or processing time over a time window
+    
+    Confidence is reported per classification and processing time per model
+    version. Values come from hourly quantile sketches, so windows are
+    widened to whole UTC hours.
+    
+    **Returns:**
+    - Count, min, max and the requested quantiles for each class or model version
+    """
+    if end is None:
+        end = datetime.now(timezone.utc)
+    if start is None:
+        start = end - timedelta(hours=24)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    if not q or any(not 0 <= value <= 1 for value in q):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Quantiles must be between 0 and 1"
+        )
+    
+    try:
+        data = await prediction_stats_service.quantiles(metric, start, end, q)
+        return PredictionQuantilesResponse(
+            metric=metric,
+            start=start,
+            end=end,
+            data=data,
+            message=f"Quantiles of {metric.value} for {len(data)} groups"
+        )
+        
+    except Exception as e:
+        logger.error(f"Error retrieving prediction quantiles: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while retrieving prediction quantiles"
+        )
@@ -2,7 +2,7 @@
 Solar System API Endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Optional, List
 import time
 
@@ -11,45 +11,71 @@ from app.schemas.solar_system import (
     OrbitPathsResponse, SimulationRequest, SimulationResponse
 )
 from app.services.solar_system_service import solar_system_service
+from app.core.compute import compute_pool
+from app.core.config import settings
+from app.core.exceptions import ExoPlanetException
+from app.core.http_cache import conditional_response
+from app.core.singleflight import SingleFlight
+from app.core.timing import TimedRoute
+from app.services.metering_service import Meter, SIMULATION_FRAMES, metered
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# Identical concurrent computations share one compute pool slot
+_positions_flight = SingleFlight("solar_positions")
+_orbits_flight = SingleFlight("solar_orbits")
+_simulation_flight = SingleFlight("solar_simulation")
+
+
+async def _planet_positions(timestamp: Optional[float]) -> PlanetPositionsResponse:
+    return await _positions_flight.do(
+        timestamp, compute_pool.run, solar_system_service.get_planet_positions, timestamp
+    )
+
+
+async def _orbit_paths(resolution: int) -> OrbitPathsResponse:
+    return await _orbits_flight.do(
+        resolution, compute_pool.run, solar_system_service.generate_orbit_paths, resolution
+    )
 
 
 @router.get("/", response_model=SolarSystemResponse)
-async def get_solar_system():
+async def get_solar_system(request: Request):
     """
     Get complete solar system data including all planets and the Sun
+    
+    Served from a pre-serialized snapshot with a strong ETag; send
+    `If-None-Match` to receive 304 Not Modified when unchanged.
     """
     try:
-        return solar_system_service.get_solar_system()
+        return conditional_response(request, solar_system_service.get_payload("solar_system"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get solar system data: {str(e)}")
 
 
 @router.get("/planets", response_model=List[Planet])
-async def get_all_planets():
+async def get_all_planets(request: Request):
     """
     Get list of all planets
     """
     try:
-        solar_system = solar_system_service.get_solar_system()
-        return solar_system.planets
+        return conditional_response(request, solar_system_service.get_payload("planets"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get planets: {str(e)}")
 
 
 @router.get("/planets/{planet_id}", response_model=Planet)
-async def get_planet(planet_id: str):
+async def get_planet(planet_id: str, request: Request):
     """
     Get specific planet by ID
     
     - **planet_id**: Planet identifier (mercury, venus, earth, mars, jupiter, saturn, uranus, neptune, pluto)
     """
     try:
-        planet = solar_system_service.get_planet(planet_id.lower())
-        if not planet:
+        payload = solar_system_service.get_payload(f"planet:{planet_id.lower()}")
+        if not payload:
             raise HTTPException(status_code=404, detail=f"Planet '{planet_id}' not found")
-        return planet
+        return conditional_response(request, payload)
     except HTTPException:
         raise
     except Exception as e:
@@ -57,12 +83,12 @@ async def get_planet(planet_id: str):
 
 
 @router.get("/sun", response_model=Sun)
-async def get_sun():
+async def get_sun(request: Request):
     """
     Get Sun information
     """
     try:
-        return solar_system_service.get_sun()
+        return conditional_response(request, solar_system_service.get_payload("sun"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get sun data: {str(e)}")
 
@@ -77,7 +103,9 @@ async def get_planet_positions(
     - **timestamp**: Unix timestamp for position calculation (optional, defaults to current time)
     """
     try:
-        return solar_system_service.get_planet_positions(timestamp)
+        return await _planet_positions(timestamp)
+    except ExoPlanetException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to calculate positions: {str(e)}")
 
@@ -94,7 +122,7 @@ async def get_planet_position(
     - **timestamp**: Unix timestamp for position calculation (optional)
     """
     try:
-        positions_response = solar_system_service.get_planet_positions(timestamp)
+        positions_response = await _planet_positions(timestamp)
         
         for planet in positions_response.planets:
             if planet.id == planet_id.lower():
@@ -108,7 +136,7 @@ async def get_planet_position(
                 }
         
         raise HTTPException(status_code=404, detail=f"Planet '{planet_id}' not found")
-    except HTTPException:
+    except (HTTPException, ExoPlanetException):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get planet position: {str(e)}")
@@ -124,7 +152,9 @@ async def get_orbit_paths(
     - **resolution**: Number of points per orbit (36-1440, default: 360)
     """
     try:
-        return solar_system_service.generate_orbit_paths(resolution)
+        return await _orbit_paths(resolution)
+    except ExoPlanetException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate orbit paths: {str(e)}")
 
@@ -141,21 +171,24 @@ async def get_planet_orbit(
     - **resolution**: Number of points per orbit (36-1440, default: 360)
     """
     try:
-        orbit_paths = solar_system_service.generate_orbit_paths(resolution)
+        orbit_paths = await _orbit_paths(resolution)
         
         for orbit in orbit_paths.orbits:
             if orbit.planet_id == planet_id.lower():
                 return orbit
         
         raise HTTPException(status_code=404, detail=f"Planet '{planet_id}' not found")
-    except HTTPException:
+    except (HTTPException, ExoPlanetException):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get planet orbit: {str(e)}")
 
 
 @router.post("/simulate", response_model=SimulationResponse)
-async def simulate_solar_system(request: SimulationRequest):
+async def simulate_solar_system(
+    request: SimulationRequest,
+    meter: Meter = Depends(metered(SIMULATION_FRAMES))
+):
     """
     Simulate solar system positions over time
     
@@ -163,6 +196,9 @@ async def simulate_solar_system(request: SimulationRequest):
     - **end_date**: End Julian date (optional, defaults to start + 1 year)
     - **time_step_days**: Time step in days (default: 1.0)
     - **planet_ids**: List of planet IDs to include (optional, defaults to all)
+    - **mode**: `kepler` for independent two-body orbits (default) or `nbody` for a
+      symplectic leapfrog integration of all bodies under mutual gravity
+    - **max_step_days**: Maximum N-body integrator step (optional, defaults to adaptive)
     """
     try:
         # Validate time range
@@ -181,73 +217,46 @@ async def simulate_solar_system(request: SimulationRequest):
         if request.time_step_days > 365:
             raise HTTPException(status_code=400, detail="Time step cannot exceed 365 days")
         
-        return solar_system_service.simulate_positions(request)
-    except HTTPException:
+        # Bound the work before it takes a compute worker; a running call cannot be stopped
+        steps = solar_system_service.integration_steps(request)
+        if steps > settings.SIMULATION_MAX_STEPS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Simulation needs {steps} integration steps, more than the limit of "
+                       f"{settings.SIMULATION_MAX_STEPS}; use a shorter range, a longer time step "
+                       f"or a longer max_step_days"
+            )
+        
+        # Frames are only known afterwards; refuse once the quota is used up
+        meter.check()
+        result = await _simulation_flight.do(
+            request.model_dump_json(), compute_pool.run, solar_system_service.simulate_positions, request
+        )
+        meter.add(len(result.frames))
+        return result
+    except (HTTPException, ExoPlanetException):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
 
 
 @router.get("/scale")
-async def get_scale_info():
+async def get_scale_info(request: Request):
     """
     Get scale information for visualization
     """
     try:
-        solar_system = solar_system_service.get_solar_system()
-        return {
-            "success": True,
-            "data": solar_system.scale_info,
-            "message": "Scale information retrieved successfully"
-        }
+        return conditional_response(request, solar_system_service.get_payload("scale"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get scale info: {str(e)}")
 
 
 @router.get("/stats")
-async def get_solar_system_stats():
+async def get_solar_system_stats(request: Request):
     """
     Get solar system statistics
     """
     try:
-        solar_system = solar_system_service.get_solar_system()
-        
-        # Calculate statistics
-        total_planets = len(solar_system.planets)
-        terrestrial_planets = len([p for p in solar_system.planets if p.type == "terrestrial"])
-        gas_giants = len([p for p in solar_system.planets if p.type == "gas_giant"])
-        ice_giants = len([p for p in solar_system.planets if p.type == "ice_giant"])
-        dwarf_planets = len([p for p in solar_system.planets if p.type == "dwarf_planet"])
-        
-        total_moons = sum(p.moons for p in solar_system.planets)
-        planets_with_rings = len([p for p in solar_system.planets if p.has_rings])
-        
-        # Find extremes
-        largest_planet = max(solar_system.planets, key=lambda p: p.radius_km)
-        smallest_planet = min(solar_system.planets, key=lambda p: p.radius_km)
-        hottest_planet = max(solar_system.planets, key=lambda p: p.surface_temp_k)
-        coldest_planet = min(solar_system.planets, key=lambda p: p.surface_temp_k)
-        
-        return {
-            "success": True,
-            "data": {
-                "total_planets": total_planets,
-                "planet_types": {
-                    "terrestrial": terrestrial_planets,
-                    "gas_giant": gas_giants,
-                    "ice_giant": ice_giants,
-                    "dwarf_planet": dwarf_planets
-                },
-                "total_moons": total_moons,
-                "planets_with_rings": planets_with_rings,
-                "extremes": {
-                    "largest_planet": {"name": largest_planet.name, "radius_km": largest_planet.radius_km},
-                    "smallest_planet": {"name": smallest_planet.name, "radius_km": smallest_planet.radius_km},
-                    "hottest_planet": {"name": hottest_planet.name, "surface_temp_k": hottest_planet.surface_temp_k},
-                    "coldest_planet": {"name": coldest_planet.name, "surface_temp_k": coldest_planet.surface_temp_k}
-                }
-            },
-            "message": "Solar system statistics calculated successfully"
-        }
+        return conditional_response(request, solar_system_service.get_payload("stats"))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to calculate stats: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to calculate stats: {str(e)}")
@@ -0,0 +1,202 @@
+"""
+Response compression: gzip/Brotli middleware and precompression helpers
+"""
+
+import gzip
+import zlib
+from typing import Callable, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, only gzip is offered without it
+    brotli = None
+
+# Payloads compressed once and cached can afford the slowest settings
+PRECOMPRESS_GZIP_LEVEL = 9
+PRECOMPRESS_BROTLI_QUALITY = 11
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Content codings we can produce, in order of preference"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(
+    accept_encoding: Optional[str],
+    available: Optional[Sequence[str]] = None
+) -> Optional[str]:
+    """Pick the preferred coding the client accepts, or None for identity
+
+    ``available`` limits the choice (in order of preference), e.g. to the
+    precompressed variants that exist; by default every coding we can
+    produce is considered.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in available_encodings() if available is None else available:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > 0:
+            return coding
+    return None
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    if not media_type:
+        return False
+    media_type = media_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith("+json")
+        or media_type.endswith("+xml")
+    )
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a complete body; without ``level`` the precompression settings are used"""
+    if encoding == "br":
+        return brotli.compress(body, quality=PRECOMPRESS_BROTLI_QUALITY if level is None else level)
+    if encoding == "gzip":
+        # mtime=0 keeps the output, and so any ETag derived from it, stable
+        return gzip.compress(body, compresslevel=PRECOMPRESS_GZIP_LEVEL if level is None else level, mtime=0)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def _stream_compressor(encoding: str, level: int) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """(compress chunk and flush, finish) functions for a streamed body"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI gzip/Brotli compression
+
+    Single-message bodies are compressed only when at least
+    ``minimum_size`` bytes; streamed bodies are compressed chunk by chunk
+    and flushed after each one. Responses that already carry a
+    ``Content-Encoding`` (e.g. precompressed payloads) pass through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.levels[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._passthrough = False
+        self._compress_chunk: Optional[Callable[[bytes], bytes]] = None
+        self._finish: Optional[Callable[[], bytes]] = None
+
+    def _set_encoding_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        vary = headers.get("vary")
+        if not vary:
+            headers["Vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding"
+        # The compressed bytes differ, so a strong validator must not be reused
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self._start = message
+            self._passthrough = (
+                message["status"] < 200
+                or message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type"))
+            )
+            return
+
+        if message_type != "http.response.body" or (self._start is None and self._compress_chunk is None):
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            if self._passthrough or (not more_body and len(body) < self.minimum_size):
+                await self._send(start)
+                await self._send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            self._set_encoding_headers(headers)
+            if not more_body:
+                body = compress(body, self.encoding, self.level)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            del headers["Content-Length"]
+            self._compress_chunk, self._finish = _stream_compressor(self.encoding, self.level)
+            await self._send(start)
+
+        if self._compress_chunk is None:
+            await self._send(message)
+            return
+
+        chunk = self._compress_chunk(body) if body else b""
+        if not more_body:
+            chunk += self._finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
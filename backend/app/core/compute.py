@@ -0,0 +1,167 @@
+"""
+Bounded worker pool for CPU-heavy request handling
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError, ComputeTimeoutError
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Monotonic deadline of the pool call running in this context, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("compute_deadline", default=None)
+
+
+def check_deadline() -> None:
+    """
+    Raise ComputeTimeoutError if the current pool call is past its deadline
+
+    A started call cannot be cancelled from outside, so long loops call
+    this between iterations to give their worker back once the caller has
+    been answered with a 504. Does nothing outside the compute pool.
+    """
+    deadline = _deadline.get()
+    if deadline is not None and time.monotonic() > deadline:
+        raise ComputeTimeoutError("Computation abandoned after its deadline")
+
+
+class ComputePool:
+    """
+    Runs synchronous compute off the event loop with admission control
+
+    At most ``max_workers`` calls run at once and at most ``max_pending``
+    more wait for a worker. Calls beyond that are rejected immediately with a
+    503 instead of queuing without limit. Each call has a deadline; calls
+    whose caller times out or goes away are cancelled if they have not
+    started yet. Running calls cannot be interrupted: they keep their slot
+    until they return, unless they poll ``check_deadline()``, which raises
+    once the deadline has passed. Work should also be bounded before it is
+    submitted.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        default_timeout: float,
+        retry_after: int
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self.retry_after = retry_after
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._cancelled = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="compute"
+                    )
+        return self._executor
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> T:
+        """Run ``func(*args, **kwargs)`` on the pool and await its result"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning("Compute pool saturated, rejecting %s", getattr(func, "__name__", func))
+            raise ServiceUnavailableError(
+                "Server is busy, please retry shortly",
+                retry_after=self.retry_after
+            )
+
+        deadline = timeout if timeout is not None else self.default_timeout
+        try:
+            # Run in a copy of the caller's context so request-scoped state
+            # (e.g. stage timers) is visible to the worker
+            context = contextvars.copy_context()
+            context.run(_deadline.set, time.monotonic() + deadline)
+            future = self._get_executor().submit(context.run, func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_flight += 1
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), deadline)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timed_out += 1
+            raise ComputeTimeoutError(f"Computation exceeded its {deadline:g}s deadline")
+        except asyncio.CancelledError:
+            future.cancel()
+            with self._lock:
+                self._cancelled += 1
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """Current pool occupancy and rejection counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "cancelled": self._cancelled
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and drop calls that have not started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global compute pool
+compute_pool = ComputePool(
+    max_workers=settings.COMPUTE_WORKERS,
+    max_pending=settings.COMPUTE_QUEUE_SIZE,
+    default_timeout=settings.COMPUTE_TIMEOUT_SECONDS,
+    retry_after=settings.COMPUTE_RETRY_AFTER_SECONDS
+)
+
+registry.register_callback(
+    "compute_pool_in_flight", "gauge", "Compute pool calls running or waiting for a worker", (),
+    lambda: [((), compute_pool.stats()["in_flight"])]
+)
+registry.register_callback(
+    "compute_pool_failures_total", "counter", "Compute pool calls not completed, by reason", ("reason",),
+    lambda: [((reason,), value) for reason, value in compute_pool.stats().items()
+             if reason in ("rejected", "timed_out", "cancelled")]
+)
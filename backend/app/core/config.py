@@ -24,7 +24,30 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    ALGORITHM: str = "HS256"
+    ALGORITHM: str = "HS256"  # HS256, HS384 or HS512
+    JWT_PREVIOUS_SECRET_KEYS: str = ""  # comma-separated former SECRET_KEYs whose tokens are still accepted
+    JWT_ISSUER: str = "exoplanet-ai"
+    JWT_LEEWAY_SECONDS: float = 30.0  # clock skew tolerated on expiry
+    JWT_CACHE_SIZE: int = 10000  # verified tokens kept so repeat requests skip the HMAC and JSON parse
+    JWT_REVOCATION_REFRESH_SECONDS: float = 10.0  # how often revoked tokens are reloaded; bounds revocation delay in other workers
+    ADMIN_TOKEN: Optional[str] = None  # X-Admin-Token for /admin endpoints; without it they only work with DEBUG
+    
+    # API keys (X-API-Key header; issued through /admin/api-keys)
+    API_KEY_REQUIRED: bool = False  # reject API requests without a key (/auth and /admin excepted)
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_CACHE_TTL_SECONDS: float = 60.0  # how long a verified key is trusted without a query
+    API_KEY_NEGATIVE_CACHE_SIZE: int = 1000  # unknown key ids remembered, kept apart so they cannot evict valid keys
+    API_KEY_NEGATIVE_CACHE_TTL_SECONDS: float = 5.0  # how long unknown keys are rejected without a query
+    API_KEY_LOOKUPS_PER_MINUTE: int = 30  # uncached key lookups (database queries) allowed per client address
+    API_KEY_LOOKUP_BURST: int = 10
+    API_KEY_REVOCATION_REFRESH_SECONDS: float = 5.0  # how often revoked keys are dropped from the cache; bounds revocation delay in other workers
+    API_KEY_USAGE_FLUSH_SECONDS: float = 10.0  # how often last_used / usage_count are written
+    API_KEY_DEFAULT_TIER: str = "free"  # usage tier of keys not owned by a user
+    
+    # Usage metering (per API key and route)
+    METERING_ENABLED: bool = True
+    METERING_FLUSH_SECONDS: float = 15.0  # how often usage counters are written to api_usage
+    USAGE_QUOTAS_ENABLED: bool = True  # enforce the daily per-tier quotas (metering_service.TIER_QUOTAS)
     
     # Database
     DATABASE_URL: Optional[str] = None
@@ -49,13 +72,71 @@ class Settings(BaseSettings):
     # Redis (optional)
     REDIS_URL: Optional[str] = None
     CACHE_TTL: int = 3600  # 1 hour
+    EXOPLANET_SYSTEM_CACHE_SIZE: int = 256  # host-star systems kept in memory
+    
+    # Route-level response cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "memory"  # memory (purges reach all serve.py workers), or redis (shared by all workers, uses REDIS_URL)
+    RESPONSE_CACHE_TTL: int = 300  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    
+    # Simulation result cache
+    SIMULATION_CACHE_MEMORY_MB: int = 64
+    SIMULATION_CACHE_SPILL_MB: int = 4  # results larger than this go to disk
+    SIMULATION_CACHE_DISK_MB: int = 512
+    SIMULATION_CACHE_DIR: Optional[str] = None  # default: a temporary directory
+    SIMULATION_MAX_STEPS: int = 500_000  # frames x integrator substeps per /simulate request (~12 s of N-body work)
     
     # ML Model settings
     MODEL_PATH: str = "models/"
     MAX_PREDICTION_BATCH_SIZE: int = 100
+    PREDICTION_STATS_FLUSH_SECONDS: float = 30.0  # how often prediction counters are persisted
     
-    # Rate limiting
+    # Rate limiting and load shedding
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory, or redis (shared by all workers, uses REDIS_URL)
     RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_BURST: int = 20
+    RATE_LIMIT_EXPENSIVE_PER_MINUTE: int = 10  # batch predict, simulate, high-resolution orbits
+    RATE_LIMIT_EXPENSIVE_BURST: int = 3
+    RATE_LIMIT_HIGH_RESOLUTION: int = 720  # orbit resolutions above this count as expensive
+    MAX_CONCURRENT_REQUESTS: int = 64
+    REQUEST_QUEUE_SIZE: int = 128  # requests waiting for a slot beyond this are shed
+    REQUEST_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    
+    # Compute offloading
+    COMPUTE_WORKERS: int = 4
+    COMPUTE_QUEUE_SIZE: int = 16
+    COMPUTE_TIMEOUT_SECONDS: float = 30.0
+    COMPUTE_RETRY_AFTER_SECONDS: int = 2
+    
+    # Response compression
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller bodies are sent as is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # used when the optional brotli package is installed
+    
+    # Metrics
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # shared by all workers when running several
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    
+    # Event loop monitoring
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.1  # stacks are sampled when a callback blocks longer than this
+    LOOP_MONITOR_MAX_REPORTS: int = 50
+    
+    # Prefork server (serve.py)
+    WORKERS: int = 0  # 0: one per available CPU core
+    WORKER_HEARTBEAT_SECONDS: float = 1.0
+    WORKER_TIMEOUT_SECONDS: float = 30.0  # a worker whose event loop is silent this long is killed and replaced
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: float = 30.0  # time to finish in-flight requests on restart or shutdown
+    WORKER_STATUS_DIR: Optional[str] = None  # default: a temporary directory
+    
+    # Frontend (single-process deployments)
+    SERVE_FRONTEND: bool = False  # serve the site from this app at / and call the API same-origin
+    FRONTEND_DIR: Optional[str] = None  # default: the repository root
     
     # File upload
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
@@ -69,6 +150,11 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_QUEUE_SIZE: int = 10000  # records waiting for the writer thread; INFO and below are dropped when full
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024  # rotate log files at this size (0: no size limit)
+    LOG_ROTATE_WHEN: str = "midnight"  # also rotate on this schedule (TimedRotatingFileHandler 'when'; empty: size only)
+    LOG_BACKUP_COUNT: int = 7
+    LOG_SAMPLING: str = ""  # share of INFO/DEBUG records kept per logger, e.g. "uvicorn.access=0.1,app.services=0.5"
     
     @property
     def database_url(self) -> str:
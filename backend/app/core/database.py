@@ -4,11 +4,16 @@ Database configuration and session management
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import MetaData
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, delete, event, insert, select
+from sqlalchemy.exc import DBAPIError
 from typing import AsyncGenerator
+import hashlib
 import logging
+import time
 
 from app.core.config import settings
+from app.core.timing import record_stage
+from app.core.metrics import registry
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +25,42 @@ engine = create_async_engine(
     pool_pre_ping=True,
 )
 
+# Attribute query time to the request being handled (Server-Timing "db")
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_start", None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        record_stage("db", elapsed)
+        db_query_duration_seconds.observe(elapsed)
+
+
+# Database metrics
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Database statement execution time in seconds",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+def _pool_usage():
+    pool = engine.sync_engine.pool
+    for state, attr in (("checked_out", "checkedout"), ("idle", "checkedin"),
+                        ("overflow", "overflow"), ("size", "size")):
+        getter = getattr(pool, attr, None)
+        if getter is not None:
+            # QueuePool reports overflow as negative until it is in use
+            yield (state,), max(getter(), 0)
+
+
+registry.register_callback(
+    "db_pool_connections", "gauge", "Database connection pool usage", ("state",), _pool_usage
+)
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -33,6 +74,15 @@ AsyncSessionLocal = async_sessionmaker(
 metadata = MetaData()
 Base = declarative_base(metadata=metadata)
 
+# Fingerprint of the schema the tables were created from
+schema_version = Table(
+    "schema_version",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -50,13 +100,60 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+def schema_fingerprint() -> str:
+    """Hash of the tables, columns and indexes the models declare"""
+    parts = []
+    for table in metadata.sorted_tables:
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            foreign_keys = sorted(fk.target_fullname for fk in column.foreign_keys)
+            parts.append(
+                f"column {column.name} {column.type!r} nullable={column.nullable} "
+                f"pk={column.primary_key} unique={column.unique} fk={foreign_keys}"
+            )
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            parts.append(f"index {index.name} {[c.name for c in index.columns]} unique={index.unique}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+async def ensure_schema() -> bool:
+    """
+    Create missing tables unless the database already has the current schema
+
+    Reading the stored fingerprint is one query, where create_all inspects
+    every table on every start. Returns True if create_all ran.
+    """
+    fingerprint = schema_fingerprint()
+    try:
+        async with engine.connect() as conn:
+            current = (await conn.execute(
+                select(schema_version.c.fingerprint).where(schema_version.c.id == 1)
+            )).scalar()
+    except DBAPIError:
+        current = None  # No schema_version table yet
+    if current == fingerprint:
+        return False
+
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(delete(schema_version))
+        await conn.execute(insert(schema_version).values(id=1, fingerprint=fingerprint, updated_at=time.time()))
+    if current is not None:
+        logger.warning(
+            "Models changed since the database schema was created; missing tables were added, "
+            "changes to existing tables need a migration"
+        )
+    return True
+
+
 async def init_db() -> None:
     """
     Initialize database tables
     """
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database initialized successfully")
+    if await ensure_schema():
+        logger.info("Database initialized successfully")
+    else:
+        logger.info("Database schema is current")
 
 
 async def close_db() -> None:
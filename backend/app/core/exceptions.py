@@ -2,7 +2,7 @@
 Custom exceptions for ExoPlanet AI API
 """
 
-from typing import Optional, Any
+from typing import Optional, Any, Dict
 
 
 class ExoPlanetException(Exception):
@@ -13,12 +13,14 @@ class ExoPlanetException(Exception):
         message: str,
         status_code: int = 500,
         error_code: str = "EXOPLANET_ERROR",
-        details: Optional[Any] = None
+        details: Optional[Any] = None,
+        headers: Optional[Dict[str, str]] = None
     ):
         self.message = message
         self.status_code = status_code
         self.error_code = error_code
         self.details = details
+        self.headers = headers
         super().__init__(self.message)
 
 
@@ -82,11 +84,12 @@ class ModelError(ExoPlanetException):
 class RateLimitError(ExoPlanetException):
     """Rate limit exceeded error"""
     
-    def __init__(self, message: str = "Rate limit exceeded"):
+    def __init__(self, message: str = "Rate limit exceeded", retry_after: int = 1):
         super().__init__(
             message=message,
             status_code=429,
-            error_code="RATE_LIMIT_ERROR"
+            error_code="RATE_LIMIT_ERROR",
+            headers={"Retry-After": str(retry_after)}
         )
 
 
@@ -99,4 +102,27 @@ class FileProcessingError(ExoPlanetException):
             status_code=400,
             error_code="FILE_PROCESSING_ERROR",
             details=details
-        )
\ No newline at end of file
+        )
+
+
+class ServiceUnavailableError(ExoPlanetException):
+    """Server is temporarily overloaded"""
+    
+    def __init__(self, message: str = "Service temporarily unavailable", retry_after: int = 1):
+        super().__init__(
+            message=message,
+            status_code=503,
+            error_code="SERVICE_UNAVAILABLE",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class ComputeTimeoutError(ExoPlanetException):
+    """Computation exceeded its deadline"""
+    
+    def __init__(self, message: str = "Computation timed out"):
+        super().__init__(
+            message=message,
+            status_code=504,
+            error_code="COMPUTE_TIMEOUT"
+        )
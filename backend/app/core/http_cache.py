@@ -0,0 +1,112 @@
+"""
+HTTP caching helpers: pre-serialized payloads, ETags and conditional requests
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.compression import compress, negotiate_encoding
+from app.core.config import settings
+from app.core.metrics import cache_requests_total
+
+_cache_hit = cache_requests_total.labels("http_etag", "hit")
+_cache_miss = cache_requests_total.labels("http_etag", "miss")
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    """
+    A JSON response body serialized once, with its strong ETag
+
+    Compressed variants are produced on first use and kept alongside, so
+    repeated responses cost no compression CPU.
+    """
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+    metered: int = 0  # usage the response represents, charged again when it is served from a cache
+    _encoded: Dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, compare=False, repr=False)
+
+    @classmethod
+    def from_content(cls, content: Any) -> "CachedPayload":
+        """Serialize ``content`` the same way JSONResponse would"""
+        body = json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":")
+        ).encode("utf-8")
+        return cls(body=body, etag=make_etag(body))
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Body in the given content coding (None for identity)"""
+        if encoding is None:
+            return self.body
+        body = self._encoded.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self._encoded.get(encoding)
+                if body is None:
+                    body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong ETag of one representation; each content coding gets its own"""
+        if encoding is None:
+            return self.etag
+        return self.etag[:-1] + "-" + encoding + '"'
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_response(
+    request: Request,
+    payload: CachedPayload,
+    cache_control: str = "no-cache"
+) -> Response:
+    """
+    Serve a cached payload, or 304 Not Modified if the client already has it
+
+    The body is sent precompressed when the client accepts gzip or Brotli
+    and it is large enough to be worth it.
+    """
+    encoding = None
+    if settings.COMPRESSION_ENABLED and len(payload.body) >= settings.COMPRESSION_MINIMUM_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    etag = payload.etag_for(encoding)
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag) or etag_matches(if_none_match, payload.etag):
+        _cache_hit.inc()
+        return Response(status_code=304, headers=headers)
+    _cache_miss.inc()
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=payload.encoded(encoding), media_type=payload.media_type, headers=headers)
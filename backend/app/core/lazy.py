@@ -0,0 +1,52 @@
+"""
+Deferred imports of heavy modules
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Any, List, Optional
+
+_deferred: List["LazyModule"] = []
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access
+
+    Keeps numpy and the simulation code out of startup; the import runs
+    under the regular import lock, so concurrent first uses are safe.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    # Underscored so it cannot shadow a module attribute (numpy.load, for one)
+    def _import_module(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._import_module(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Module ``name``, imported when first used"""
+    module = LazyModule(name)
+    _deferred.append(module)
+    return module
+
+
+def load_deferred() -> None:
+    """Import every deferred module now (e.g. in the background after startup)"""
+    for module in _deferred:
+        module._import_module()
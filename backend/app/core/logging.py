@@ -1,53 +1,256 @@
 """
 Logging configuration for ExoPlanet AI API
+
+Loggers only put records on a bounded in-memory queue; a background
+listener thread formats them and does the console and file I/O, so
+logging never blocks the event loop on disk writes. Messages given as
+``logger.info("... %s", value)`` are only formatted by the listener.
 """
 
+import atexit
+import itertools
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from pythonjsonlogger import jsonlogger
 
 from app.core.config import settings
+from app.core.metrics import registry
+
+log_records_dropped_total = registry.counter(
+    "log_records_dropped_total", "Log records discarded because the log queue was full", ("level",)
+)
+log_records_sampled_out_total = registry.counter(
+    "log_records_sampled_out_total", "Log records skipped by LOG_SAMPLING, by matching rule", ("rule",)
+)
+
+# Loggers uvicorn configures with their own (synchronous) handlers
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_handler: Optional["DroppingQueueHandler"] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue that never stalls the caller for long
+
+    When the queue is full, DEBUG/INFO records are dropped at once;
+    warnings and errors wait up to ``block_timeout`` seconds for room
+    before being dropped too. Drops are counted and reported by a
+    warning once the queue has room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block_timeout: float = 0.05):
+        super().__init__(log_queue)
+        self.block_timeout = block_timeout
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue stays in this process, so the record is passed as is
+        # and formatted by the listener rather than by the caller
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            log_records_dropped_total.labels(record.levelname).inc()
+            return
+
+        if self._dropped:
+            with self._lock:
+                dropped, self._dropped = self._dropped, 0
+            notice = logging.LogRecord(
+                "app.core.logging", logging.WARNING, __file__, 0,
+                "Log queue was full, dropped %d records", (dropped,), None
+            )
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                with self._lock:
+                    self._dropped += dropped
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a share of the DEBUG/INFO records of chosen loggers
+
+    ``rules`` maps logger name prefixes to the fraction of records kept
+    (the longest matching prefix wins); 0.1 keeps every tenth record.
+    Warnings and errors are always kept.
+    """
+
+    def __init__(self, rules: Dict[str, float]):
+        super().__init__()
+        self.rules = sorted(rules.items(), key=lambda rule: len(rule[0]), reverse=True)
+        self._counters = {prefix: itertools.count() for prefix in rules}
+
+    def _rule_for(self, name: str) -> Optional[Tuple[str, float]]:
+        for prefix, rate in self.rules:
+            if name == prefix or name.startswith(prefix + "."):
+                return prefix, rate
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rule = self._rule_for(record.name)
+        if rule is None:
+            return True
+        prefix, rate = rule
+        if rate >= 1:
+            return True
+        if rate > 0:
+            every = round(1 / rate)
+            if next(self._counters[prefix]) % every == 0:
+                return True
+        log_records_sampled_out_total.labels(prefix).inc()
+        return False
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Parse LOG_SAMPLING ("uvicorn.access=0.1,app.services=0.5")"""
+    rules = {}
+    for item in spec.split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            rules[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rules
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Rotates on a schedule and also whenever the file reaches ``max_bytes``"""
+
+    def __init__(self, filename, when: str, backup_count: int, max_bytes: int, **kwargs):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding="utf-8", **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            self.stream.seek(0, 2)
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def rotation_filename(self, default_name: str) -> str:
+        # Size rollovers within one interval get the same timestamp; number
+        # them instead of replacing the earlier file
+        name, n = default_name, 0
+        while os.path.exists(name):
+            n += 1
+            name = f"{default_name}.{n}"
+        return name
+
+
+def _file_handler(path: Path, formatter: logging.Formatter, level: int = logging.NOTSET) -> logging.Handler:
+    if settings.LOG_ROTATE_WHEN:
+        handler = SizedTimedRotatingFileHandler(
+            path,
+            when=settings.LOG_ROTATE_WHEN,
+            backup_count=settings.LOG_BACKUP_COUNT,
+            max_bytes=settings.LOG_MAX_BYTES
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=settings.LOG_MAX_BYTES,
+            backupCount=settings.LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        )
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def _start_listener(handlers: List[logging.Handler]) -> None:
+    global _listener
+    _listener = logging.handlers.QueueListener(_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_in_child() -> None:
+    # A forked worker inherits the queue but not the listener thread
+    if _handler is None or _listener is None:
+        return
+    _handler.queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _handler._lock = threading.Lock()
+    _start_listener(list(_listener.handlers))
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
 
 
 def setup_logging():
     """Setup application logging"""
-    
+    global _handler
+
     # Create logs directory
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
-    
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, settings.LOG_LEVEL))
-    
+
     # Remove existing handlers
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
-    
+    shutdown_logging()
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_formatter = logging.Formatter(settings.LOG_FORMAT)
     console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
-    
+
     # File handler for general logs
-    file_handler = logging.FileHandler(log_dir / "exoplanet_ai.log")
     file_formatter = jsonlogger.JsonFormatter(
         "%(asctime)s %(name)s %(levelname)s %(message)s"
     )
-    file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
-    
+    file_handler = _file_handler(log_dir / "exoplanet_ai.log", file_formatter)
+
     # Error file handler
-    error_handler = logging.FileHandler(log_dir / "errors.log")
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(file_formatter)
-    root_logger.addHandler(error_handler)
-    
+    error_handler = _file_handler(log_dir / "errors.log", file_formatter, logging.ERROR)
+
+    # Loggers only enqueue; the listener thread does the I/O
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    if settings.LOG_SAMPLING:
+        _handler.addFilter(SamplingFilter(parse_sampling(settings.LOG_SAMPLING)))
+    root_logger.addHandler(_handler)
+    _start_listener([console_handler, file_handler, error_handler])
+
+    # Route uvicorn's own loggers (including the access log) through the queue
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
     # Set specific logger levels
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("tensorflow").setLevel(logging.ERROR)
-    
-    logging.info("Logging configured successfully")
\ No newline at end of file
+
+    logging.info("Logging configured successfully")
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+atexit.register(shutdown_logging)
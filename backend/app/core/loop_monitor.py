@@ -0,0 +1,176 @@
+"""
+Event-loop lag monitor and blocking-call detector
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+event_loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds", "Delay between a loop heartbeat being due and running",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+event_loop_blocks_total = registry.counter(
+    "event_loop_blocks_total", "Times the event loop was blocked past the threshold, by code site", ("site",)
+)
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BACKEND_ROOT = os.path.dirname(_APP_ROOT)
+
+
+@dataclass
+class BlockReport:
+    """Stack of the loop thread sampled while it was blocked"""
+    detected_at: float
+    site: str
+    stack: List[str]
+    blocked_for: Optional[float] = None  # filled in once the loop runs again
+    stalled_at_detection: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "detected_at": self.detected_at,
+            "site": self.site,
+            "blocked_for": self.blocked_for,
+            "stalled_at_detection": self.stalled_at_detection,
+            "stack": self.stack
+        }
+
+
+def _blocking_site(frames: List[traceback.FrameSummary]) -> str:
+    """Innermost frame in application code, or the innermost frame at all"""
+    for summary in reversed(frames):
+        if summary.filename.startswith(_APP_ROOT):
+            return f"{os.path.relpath(summary.filename, _BACKEND_ROOT)}:{summary.lineno} {summary.name}"
+    if frames:
+        summary = frames[-1]
+        return f"{os.path.basename(summary.filename)}:{summary.lineno} {summary.name}"
+    return "unknown"
+
+
+class LoopMonitor:
+    """
+    Watches the event loop from a background thread
+
+    A heartbeat task sleeps for ``interval`` and records how late it wakes
+    up as loop lag. A watchdog thread checks the heartbeat; when it is
+    more than ``threshold`` seconds overdue, the loop thread is stuck in a
+    callback, so the watchdog samples that thread's stack on the spot and
+    keeps the last ``max_reports`` samples.
+    """
+
+    def __init__(self, interval: float, threshold: float, max_reports: int):
+        self.interval = interval
+        self.threshold = threshold
+        self._reports: Deque[BlockReport] = deque(maxlen=max_reports)
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._pending: Optional[BlockReport] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocks = 0
+
+    def start(self) -> None:
+        """Start monitoring the running loop"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - due)
+            event_loop_lag_seconds.observe(lag)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            with self._lock:
+                self._beat = now
+                pending, self._pending = self._pending, None
+            if pending is not None:
+                pending.blocked_for = lag
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms at {pending.site}")
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                stalled = time.monotonic() - self._beat - self.interval
+                if stalled < self.threshold or self._pending is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                frames = traceback.extract_stack(frame)
+                report = BlockReport(
+                    detected_at=time.time(),
+                    site=_blocking_site(frames),
+                    stack=traceback.format_list(frames),
+                    stalled_at_detection=stalled
+                )
+                self._pending = report
+                self._reports.append(report)
+                self.blocks += 1
+            event_loop_blocks_total.labels(report.site).inc()
+
+    def reports(self) -> List[Dict[str, Any]]:
+        """Recent block reports, newest first"""
+        with self._lock:
+            return [report.to_dict() for report in reversed(self._reports)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "threshold_seconds": self.threshold,
+            "last_lag_seconds": self.last_lag,
+            "max_lag_seconds": self.max_lag,
+            "blocks_detected": self.blocks
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reports.clear()
+        self.max_lag = 0.0
+
+
+# Global loop monitor
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    threshold=settings.LOOP_BLOCK_THRESHOLD_SECONDS,
+    max_reports=settings.LOOP_MONITOR_MAX_REPORTS
+)
@@ -0,0 +1,489 @@
+"""
+In-process metrics registry with Prometheus text exposition
+"""
+
+import asyncio
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A sample is (name suffix, label pairs, value)
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+
+class _Child:
+    """
+    One labelled time series
+
+    Every thread writes to its own shard, so updates never take a lock;
+    shards are only summed when the metric is collected.
+    """
+
+    width = 1
+
+    def __init__(self):
+        self._shards: Dict[int, List[float]] = {}
+
+    def _shard(self) -> List[float]:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            # dict assignment is atomic; each thread only creates its own key
+            shard = self._shards[ident] = [0.0] * self.width
+        return shard
+
+    def _totals(self) -> List[float]:
+        totals = [0.0] * self.width
+        for shard in list(self._shards.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class CounterChild(_Child):
+    def inc(self, amount: float = 1.0) -> None:
+        self._shard()[0] += amount
+
+    def get(self) -> float:
+        return self._totals()[0]
+
+
+class GaugeChild(_Child):
+    def inc(self, amount: float = 1.0) -> None:
+        self._shard()[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._shard()[0] -= amount
+
+    def get(self) -> float:
+        return self._totals()[0]
+
+
+class HistogramChild(_Child):
+    """Bucket counts followed by the running sum and count"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self._upper_bounds = tuple(buckets)
+        self.width = len(buckets) + 3  # finite buckets, +Inf, sum, count
+        super().__init__()
+
+    def observe(self, value: float) -> None:
+        shard = self._shard()
+        shard[bisect.bisect_left(self._upper_bounds, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of a block of code in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Metric:
+    """A metric family: a name, help text and one child per label set"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _Child] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> _Child:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> _Child:
+        """Get the child for a set of label values"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _label_pairs(self, key: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, key))
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        for key, child in list(self._children.items()):
+            samples.append(("", self._label_pairs(key), child.get()))
+        return samples
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, child in list(self._children.items()):
+            labels = self._label_pairs(key)
+            totals = child._totals()
+            cumulative = 0.0
+            for bound, count in zip(bounds, totals):
+                cumulative += count
+                samples.append(("_bucket", labels + (("le", bound),), cumulative))
+            samples.append(("_sum", labels, totals[-2]))
+            samples.append(("_count", labels, totals[-1]))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """
+    A metric whose samples are read from other objects when collected
+
+    Each callback returns ``(label values, value)`` pairs. Several modules
+    may contribute to the same family, e.g. one callback per cache.
+    """
+
+    def __init__(self, name: str, kind: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._callbacks: List[Callable[[], Iterable[Tuple[Sequence[str], float]]]] = []
+
+    def add_callback(self, callback: Callable[[], Iterable[Tuple[Sequence[str], float]]]) -> None:
+        self._callbacks.append(callback)
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        for callback in list(self._callbacks):
+            try:
+                for values, value in callback():
+                    key = tuple(str(v) for v in values)
+                    samples.append(("", self._label_pairs(key), float(value)))
+            except Exception as e:
+                logger.warning(f"Metric callback for {self.name} failed: {e}")
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Collection of metric families
+
+    In multi-process mode (``multiprocess_dir`` set, one directory shared by
+    all workers) each process periodically writes its samples to
+    ``metrics-<pid>.json`` there, and a scrape of any worker merges all
+    files. Counters and histograms are summed over every process that ever
+    wrote a file; gauges only over processes that are still alive.
+    """
+
+    def __init__(self, multiprocess_dir: Optional[str] = None):
+        self.multiprocess_dir = multiprocess_dir
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.kind != metric.kind:
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_callback(
+        self,
+        name: str,
+        kind: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[Sequence[str], float]]]
+    ) -> None:
+        """Add a callback-backed ``counter`` or ``gauge`` family (or contribute to one)"""
+        metric = self._register(CallbackMetric(name, kind, documentation, labelnames))
+        metric.add_callback(callback)
+
+    def collect(self) -> List[dict]:
+        """Current samples of every family in this process"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [
+            {
+                "name": metric.name,
+                "kind": metric.kind,
+                "help": metric.documentation,
+                "samples": metric.samples()
+            }
+            for metric in metrics
+        ]
+
+    # Multi-process mode
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.multiprocess_dir, f"metrics-{pid}.json")
+
+    def write_snapshot(self) -> None:
+        """Write this process' samples to the shared directory"""
+        if not self.multiprocess_dir:
+            return
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.multiprocess_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.collect(), f)
+        os.replace(tmp_name, self._snapshot_path(os.getpid()))
+
+    def clear_snapshots(self) -> None:
+        """Remove every process' samples from the shared directory (before starting workers)"""
+        if not self.multiprocess_dir:
+            return
+        for path in glob.glob(os.path.join(self.multiprocess_dir, "metrics-*.json")):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove metrics snapshot {path}: {e}")
+
+    def _collect_all(self) -> List[dict]:
+        self.write_snapshot()
+        families: Dict[str, dict] = {}
+        merged: Dict[str, Dict[Tuple[str, tuple], float]] = {}
+
+        for path in glob.glob(os.path.join(self.multiprocess_dir, "metrics-*.json")):
+            try:
+                pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {path}: {e}")
+                continue
+            alive = _pid_alive(pid)
+
+            for family in snapshot:
+                if family["kind"] == "gauge" and not alive:
+                    continue
+                name = family["name"]
+                families.setdefault(name, {k: family[k] for k in ("name", "kind", "help")})
+                values = merged.setdefault(name, {})
+                for suffix, labels, value in family["samples"]:
+                    key = (suffix, tuple(tuple(pair) for pair in labels))
+                    values[key] = values.get(key, 0.0) + value
+
+        return [
+            dict(family, samples=[
+                (suffix, labels, value) for (suffix, labels), value in merged[name].items()
+            ])
+            for name, family in families.items()
+        ]
+
+    def generate_latest(self) -> bytes:
+        """Render all families in the Prometheus text exposition format"""
+        families = self._collect_all() if self.multiprocess_dir else self.collect()
+        lines = []
+        for family in families:
+            name = family["name"]
+            lines.append(f"# HELP {name} {_escape_help(family['help'])}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for suffix, labels, value in family["samples"]:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{name}="{_escape_label(str(value))}"' for name, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# Global metrics registry
+registry = MetricsRegistry(multiprocess_dir=settings.METRICS_MULTIPROC_DIR)
+
+# HTTP metrics
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds", ("method", "route")
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled"
+)
+
+# Model metrics
+model_inference_seconds = registry.histogram(
+    "model_inference_seconds", "ML model inference time in seconds",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+batch_size = registry.histogram(
+    "batch_size", "Items per batch request", ("operation",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+# Cache metrics (hit ratio = hit / (hit + miss) per cache)
+cache_requests_total = registry.counter(
+    "cache_requests_total", "Cache lookups by result", ("cache", "result")
+)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Route path template of a handled request, e.g. ``/api/v1/advanced/exoplanets/{exoplanet_id}``
+
+    Used as the ``route`` label so concrete ids don't create new series.
+    Requests that matched no route are reported as ``unmatched``.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    # Routes of included routers only know their own path; recover the
+    # prefix from the leading segments of the request path
+    depth = path_format.count("/")
+    prefix = scope.get("path", "").rsplit("/", depth)[0] if depth else ""
+    return prefix + path_format
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route request counts and latency"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        in_progress = http_requests_in_progress.labels()
+        in_progress.inc()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            method = scope["method"]
+            route = route_template(scope)
+            http_requests_total.labels(method, route, status_code).inc()
+            http_request_duration_seconds.labels(method, route).observe(time.perf_counter() - start)
+
+
+async def flush_periodically(interval: float) -> None:
+    """Write this worker's snapshot every ``interval`` seconds (multi-process mode)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(registry.write_snapshot)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot: {e}")
@@ -0,0 +1,392 @@
+"""
+Prefork server: preload the application once, fork workers that share it
+"""
+
+import gc
+import importlib
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.lazy import load_deferred
+from app.core.logging import shutdown_logging
+from app.core.loop_monitor import loop_monitor
+from app.core.worker_status import WorkerStatusBoard, memory_usage
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_count() -> int:
+    """One worker per CPU core this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that reports its health from the event loop"""
+
+    def __init__(self, config: uvicorn.Config, board: WorkerStatusBoard, slot: int, generation: int):
+        super().__init__(config)
+        self.board = board
+        self.slot = slot
+        self.generation = generation
+        self.started_at = time.time()
+        self._heartbeat_ticks = max(1, round(settings.WORKER_HEARTBEAT_SECONDS / 0.1))
+
+    async def on_tick(self, counter: int) -> bool:
+        # Ticks run on the event loop every 0.1 s, so a blocked or wedged
+        # loop stops the heartbeat and the master replaces the worker
+        should_exit = await super().on_tick(counter)
+        if counter % self._heartbeat_ticks == 0 or should_exit:
+            self.heartbeat("stopping" if should_exit else "ready")
+        return should_exit
+
+    def heartbeat(self, state: str) -> None:
+        try:
+            self.board.publish({
+                "pid": os.getpid(),
+                "slot": self.slot,
+                "generation": self.generation,
+                "state": state,
+                "started_at": self.started_at,
+                "heartbeat_at": time.time(),
+                "requests_total": self.server_state.total_requests,
+                "connections": len(self.server_state.connections),
+                "event_loop_lag_seconds": loop_monitor.last_lag,
+                "memory": memory_usage()
+            })
+        except OSError as e:
+            logger.warning(f"Could not publish worker status: {e}")
+
+
+@dataclass
+class Worker:
+    pid: int
+    slot: int
+    generation: int
+    started_at: float
+    ready: bool = False
+    retiring: bool = False
+
+
+class Arbiter:
+    """
+    Master process of the prefork server
+
+    The master imports the application (building the ML model, the solar
+    system snapshot and the other module-level singletons), freezes the
+    garbage collector so those objects are never written to again, binds
+    the listening socket and forks ``workers`` uvicorn processes. The
+    workers share the preloaded memory copy-on-write, so each one only
+    adds what it allocates while serving.
+
+    ``before_fork`` runs in the master after the import, for one-time
+    setup that workers must not race on (e.g. creating tables).
+
+    Signals: TERM/INT stop gracefully, HUP replaces the workers one at a
+    time (a new worker must report ready before an old one is stopped).
+    Workers that exit are replaced; workers whose heartbeat stops for
+    ``timeout`` seconds are killed and replaced.
+    """
+
+    MAX_BOOT_FAILURES = 3
+    # Extra time for the lifespan shutdown once connections are closed
+    SHUTDOWN_MARGIN = 5.0
+
+    def __init__(
+        self,
+        app: str,
+        host: str,
+        port: int,
+        workers: int,
+        timeout: float,
+        graceful_timeout: float,
+        board: WorkerStatusBoard,
+        before_fork: Optional[Callable[[], None]] = None,
+        **uvicorn_options: Any
+    ):
+        self.app_path = app
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.timeout = timeout
+        self.graceful_timeout = graceful_timeout
+        self.board = board
+        self.before_fork = before_fork
+        self.uvicorn_options = uvicorn_options
+
+        self.workers: Dict[int, Worker] = {}
+        self.generation = 0
+        self._boot_failures = 0
+        self._stopping = False
+        self._reload_requested = False
+        self._wakeup_r = self._wakeup_w = -1
+        self._socket: Optional[socket.socket] = None
+        self._config: Optional[uvicorn.Config] = None
+
+    # Master
+
+    def run(self) -> int:
+        self._preload()
+        self._socket = socket.create_server((self.host, self.port), backlog=2048)
+        self._install_signals()
+        logger.info(
+            f"Prefork master {os.getpid()} listening on http://{self.host}:{self.port} "
+            f"with {self.num_workers} workers"
+        )
+
+        exit_code = 0
+        try:
+            while not self._stopping:
+                self._reap()
+                if self._boot_failures >= self.MAX_BOOT_FAILURES:
+                    logger.error("Workers keep failing to boot, shutting down")
+                    exit_code = 1
+                    break
+                self._check_heartbeats()
+                self._fill_slots()
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._rolling_restart()
+                self._sleep(1.0)
+        finally:
+            self._stop_workers()
+            self._socket.close()
+            logger.info("Prefork master stopped")
+        return exit_code
+
+    def _preload(self) -> None:
+        """Import the application and make its memory safe to share"""
+        from app.core.metrics import registry
+
+        # No collections while the shared objects are being built; the
+        # generations they would end up in are frozen below instead
+        gc.disable()
+        module_name, _, attr = self.app_path.partition(":")
+        app = getattr(importlib.import_module(module_name), attr)
+        # What a single process defers until first use is shared here instead
+        load_deferred()
+        self._config = uvicorn.Config(
+            app,
+            lifespan="on",
+            timeout_graceful_shutdown=int(self.graceful_timeout),
+            **self.uvicorn_options
+        )
+        self._config.load()
+        if self.before_fork is not None:
+            self.before_fork()
+
+        self.board.activate()
+        if settings.METRICS_ENABLED and self.num_workers > 1:
+            if registry.multiprocess_dir is None:
+                registry.multiprocess_dir = tempfile.mkdtemp(prefix="exoplanet-metrics-")
+            registry.clear_snapshots()
+
+        gc.collect()
+        gc.freeze()
+        memory = memory_usage()
+        logger.info(
+            f"Application preloaded in master ({memory['rss'] / 2**20:.1f} MiB RSS, "
+            f"{gc.get_freeze_count()} objects frozen)"
+        )
+
+    def _install_signals(self) -> None:
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        signal.signal(signal.SIGCHLD, self._wake)
+
+    def _wake(self, *_: Any) -> None:
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            pass  # Already awake
+
+    def _handle_stop(self, signum: int, _frame: Any) -> None:
+        if not self._stopping:
+            logger.info(f"Received {signal.Signals(signum).name}, stopping workers")
+        self._stopping = True
+        self._wake()
+
+    def _handle_reload(self, _signum: int, _frame: Any) -> None:
+        logger.info("Received SIGHUP, restarting workers one at a time")
+        self._reload_requested = True
+        self._wake()
+
+    def _sleep(self, timeout: float) -> None:
+        """Wait for a signal or ``timeout`` seconds"""
+        try:
+            ready, _, _ = select.select([self._wakeup_r], [], [], timeout)
+            if ready:
+                while os.read(self._wakeup_r, 64):
+                    pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _spawn(self, slot: int) -> Worker:
+        self.generation += 1
+        generation = self.generation
+        pid = os.fork()
+        if pid:
+            worker = Worker(pid=pid, slot=slot, generation=generation, started_at=time.time())
+            self.workers[pid] = worker
+            logger.info(f"Started worker {pid} (slot {slot}, generation {generation})")
+            return worker
+
+        # Child: never returns into the master's loop
+        exit_code = 0
+        try:
+            self._run_worker(slot, generation)
+        except SystemExit as e:
+            # uvicorn exits this way when the application fails to start
+            exit_code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            logger.exception(f"Worker {os.getpid()} crashed")
+            exit_code = 1
+        finally:
+            shutdown_logging()
+            logging.shutdown()
+            os._exit(exit_code)
+
+    def _fill_slots(self) -> None:
+        taken = {worker.slot for worker in self.workers.values() if not worker.retiring}
+        for slot in range(self.num_workers):
+            if self._stopping:
+                return
+            if slot not in taken:
+                self._spawn(slot)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            report = self.board.read(pid)
+            self.board.remove(pid)
+            ready = worker.ready or (report is not None and report["state"] != "starting")
+            if worker.retiring or self._stopping:
+                logger.info(f"Worker {pid} stopped")
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.warning(f"Worker {pid} (slot {worker.slot}) exited unexpectedly with status {code}")
+            self._boot_failures = 0 if ready else self._boot_failures + 1
+
+    def _check_heartbeats(self) -> None:
+        now = time.time()
+        for worker in list(self.workers.values()):
+            report = self.board.read(worker.pid)
+            if report is not None and report["state"] == "ready":
+                if not worker.ready:
+                    worker.ready = True
+                    self._boot_failures = 0
+            last_seen = report["heartbeat_at"] if report is not None else worker.started_at
+            if now - last_seen > self.timeout and not worker.retiring:
+                logger.error(
+                    f"Worker {worker.pid} (slot {worker.slot}) silent for {now - last_seen:.0f}s, killing it"
+                )
+                self._kill(worker.pid, signal.SIGKILL)
+
+    def _rolling_restart(self) -> None:
+        for old in sorted(list(self.workers.values()), key=lambda w: w.slot):
+            if self._stopping:
+                return
+            if old.pid not in self.workers or old.retiring:
+                continue
+            new = self._spawn(old.slot)
+            if not self._wait_ready(new):
+                logger.error(
+                    f"Replacement worker {new.pid} did not become ready, keeping worker {old.pid}"
+                )
+                if new.pid in self.workers:
+                    new.retiring = True
+                    self._kill(new.pid, signal.SIGKILL)
+                return
+            old.retiring = True
+            self._kill(old.pid, signal.SIGTERM)
+            self._wait_exit([old.pid], self.graceful_timeout + self.SHUTDOWN_MARGIN)
+        logger.info("Rolling restart complete")
+
+    def _wait_ready(self, worker: Worker) -> bool:
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline and not self._stopping:
+            self._reap()
+            if worker.pid not in self.workers:
+                return False
+            report = self.board.read(worker.pid)
+            if report is not None and report["state"] == "ready":
+                worker.ready = True
+                return True
+            self._sleep(0.1)
+        return False
+
+    def _wait_exit(self, pids: List[int], timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self._reap()
+            if not any(pid in self.workers for pid in pids):
+                return
+            self._sleep(0.1)
+        for pid in pids:
+            if pid in self.workers:
+                logger.warning(f"Worker {pid} did not stop in {timeout:g}s, killing it")
+                self._kill(pid, signal.SIGKILL)
+        self._reap()
+
+    def _stop_workers(self) -> None:
+        pids = list(self.workers)
+        for pid in pids:
+            self.workers[pid].retiring = True
+            self._kill(pid, signal.SIGTERM)
+        self._wait_exit(pids, self.graceful_timeout + self.SHUTDOWN_MARGIN)
+        # Killed workers can take a moment to be reaped
+        deadline = time.monotonic() + 1.0
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            self._sleep(0.05)
+
+    @staticmethod
+    def _kill(pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    # Worker
+
+    def _run_worker(self, slot: int, generation: int) -> None:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        gc.enable()
+        # Forked workers would otherwise draw the same random numbers
+        random.seed()
+        numpy = sys.modules.get("numpy")
+        if numpy is not None:
+            numpy.random.seed()
+
+        server = WorkerServer(self._config, self.board, slot, generation)
+        server.heartbeat("starting")
+        server.run(sockets=[self._socket])
@@ -0,0 +1,336 @@
+"""
+Admission control: per-client token buckets and global load shedding
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Tuple
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.exceptions import ExoPlanetException, RateLimitError, ServiceUnavailableError
+from app.core.metrics import registry
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional dependency, only needed for the shared backend
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+admission_rejections_total = registry.counter(
+    "admission_rejections_total",
+    "Requests rejected before reaching a route, by reason",
+    ("reason",)
+)
+_rate_limited = admission_rejections_total.labels("rate_limited")
+_shed = admission_rejections_total.labels("shed")
+_queue_timeout = admission_rejections_total.labels("queue_timeout")
+
+# Never limited, so health checks and scrapes keep working under load
+EXEMPT_PATHS = {"/health", "/metrics", f"{settings.API_V1_STR}/health"}
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Token bucket refilled at ``per_minute`` tokens a minute, holding at most ``burst``"""
+    name: str
+    per_minute: float
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+    @property
+    def capacity(self) -> float:
+        return float(max(self.burst, 1))
+
+
+DEFAULT_BUDGET = Budget("default", settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_BURST)
+EXPENSIVE_BUDGET = Budget("expensive", settings.RATE_LIMIT_EXPENSIVE_PER_MINUTE, settings.RATE_LIMIT_EXPENSIVE_BURST)
+# Uncached API key lookups, charged per client address whatever key is sent
+KEY_LOOKUP_BUDGET = Budget("key_lookup", settings.API_KEY_LOOKUPS_PER_MINUTE, settings.API_KEY_LOOKUP_BURST)
+
+_EXPENSIVE_POSTS = ("/predict/batch", "/solar-system/simulate")
+
+
+def classify(scope: Scope) -> Budget:
+    """Budget a request is charged against"""
+    path = scope["path"].rstrip("/")
+    if scope["method"] == "POST" and path.endswith(_EXPENSIVE_POSTS):
+        return EXPENSIVE_BUDGET
+    if "/solar-system/orbits" in path:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        try:
+            resolution = int(query.get("resolution", ["0"])[0])
+        except ValueError:
+            resolution = 0
+        if resolution > settings.RATE_LIMIT_HIGH_RESOLUTION:
+            return EXPENSIVE_BUDGET
+    return DEFAULT_BUDGET
+
+
+def client_identity(scope: Scope) -> str:
+    """API key when one is sent, otherwise the client address"""
+    principal = scope.get("state", {}).get("api_key")
+    if principal is not None:
+        return "key:" + principal.key_id
+    api_key = Headers(scope=scope).get("x-api-key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return client_address(scope)
+
+
+def client_address(scope: Scope) -> str:
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class MemoryRateLimitBackend:
+    """Buckets held by this worker; each worker enforces the full budget"""
+
+    def __init__(self, max_clients: int = 10000):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, budget: Budget) -> Tuple[bool, float]:
+        """Take one token; returns (allowed, tokens left)"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (budget.capacity, now))
+        tokens = min(budget.capacity, tokens + (now - updated) * budget.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        # Least recently seen clients are forgotten first, i.e. reset to a full bucket
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class RedisRateLimitBackend:
+    """Buckets shared by all workers, updated atomically by a Lua script"""
+
+    SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url: str, prefix: str = "exoplanet:ratelimit:"):
+        if aioredis is None:
+            raise RuntimeError("The redis package is required for RATE_LIMIT_BACKEND=redis")
+        self._redis = aioredis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+        self.prefix = prefix
+
+    async def take(self, key: str, budget: Budget) -> Tuple[bool, float]:
+        allowed, tokens = await self._script(
+            keys=[f"{self.prefix}{key}"],
+            args=[budget.rate, budget.capacity, time.time()]
+        )
+        return bool(allowed), float(tokens)
+
+
+class RateLimiter:
+    """Per-client token buckets; backend failures let requests through"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def check(self, scope: Scope) -> None:
+        """Charge the request to its client's bucket, raising RateLimitError when empty"""
+        budget = classify(scope)
+        principal = scope.get("state", {}).get("api_key")
+        if budget is DEFAULT_BUDGET and principal is not None and principal.rate_limit:
+            # Verified keys carry their own per-minute limit
+            budget = Budget(budget.name, principal.rate_limit, budget.burst)
+        await self._take(budget, client_identity(scope))
+
+    async def check_key_lookup(self, scope: Scope) -> None:
+        """
+        Charge an uncached API key lookup to the client address
+
+        Called before the database is queried for a key id not in the
+        cache, so made-up keys cost the sender a 429, not a query each.
+        """
+        await self._take(KEY_LOOKUP_BUDGET, client_address(scope))
+
+    async def _take(self, budget: Budget, identity: str) -> None:
+        if budget.per_minute <= 0:
+            return
+        try:
+            allowed, tokens = await self.backend.take(f"{budget.name}:{identity}", budget)
+        except Exception as e:
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return
+        if not allowed:
+            _rate_limited.inc()
+            raise RateLimitError(
+                f"Rate limit of {budget.per_minute:g} {budget.name} requests per minute exceeded",
+                retry_after=max(1, math.ceil((1 - tokens) / budget.rate))
+            )
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds requests handled at once
+
+    Up to ``max_concurrent`` requests run; up to ``queue_size`` more wait
+    for a slot, in arrival order, for at most ``queue_timeout`` seconds.
+    Anything beyond that is shed immediately, so queueing delay stays
+    bounded instead of growing until every request times out.
+    """
+
+    def __init__(self, max_concurrent: int, queue_size: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            _shed.inc()
+            raise ServiceUnavailableError("Server is overloaded, please retry shortly", retry_after=self._retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return  # A slot was handed over just as the wait expired
+            waiter.cancel()
+            _queue_timeout.inc()
+            raise ServiceUnavailableError("Server is overloaded, please retry shortly", retry_after=self._retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            waiter.cancel()
+            raise
+        finally:
+            if waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+    def queued(self) -> int:
+        return len(self._waiters)
+
+
+class AdmissionControlMiddleware:
+    """
+    Pure ASGI admission control
+
+    API requests are first charged to the client's token bucket (429 when
+    empty), then must get a concurrency slot (503 when the server is
+    saturated). Both rejections carry Retry-After.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: Optional[RateLimiter],
+        concurrency: ConcurrencyLimiter
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.concurrency = concurrency
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            if self.limiter is not None and scope["path"].startswith(settings.API_V1_STR):
+                await self.limiter.check(scope)
+            await self.concurrency.acquire()
+        except ExoPlanetException as exc:
+            await error_response(exc)(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.concurrency.release()
+
+
+def error_response(exc: ExoPlanetException) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "success": False,
+            "error": {
+                "code": exc.error_code,
+                "message": exc.message,
+                "details": exc.details
+            }
+        },
+        headers=exc.headers
+    )
+
+
+def _create_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        if settings.REDIS_URL and aioredis is not None:
+            return RedisRateLimitBackend(settings.REDIS_URL)
+        logger.warning("Redis rate limiter unavailable (REDIS_URL or redis package missing), using memory")
+    return MemoryRateLimitBackend()
+
+
+# Global limiters
+rate_limiter = RateLimiter(_create_backend()) if settings.RATE_LIMIT_ENABLED else None
+concurrency_limiter = ConcurrencyLimiter(
+    max_concurrent=settings.MAX_CONCURRENT_REQUESTS,
+    queue_size=settings.REQUEST_QUEUE_SIZE,
+    queue_timeout=settings.REQUEST_QUEUE_TIMEOUT_SECONDS
+)
+
+registry.register_callback(
+    "requests_admitted", "gauge", "Requests holding a concurrency slot", (),
+    lambda: [((), concurrency_limiter.active)]
+)
+registry.register_callback(
+    "requests_queued", "gauge", "Requests waiting for a concurrency slot", (),
+    lambda: [((), concurrency_limiter.queued())]
+)
@@ -0,0 +1,358 @@
+"""
+Route-level response cache with surrogate-key invalidation
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.http_cache import CachedPayload, conditional_response, make_etag
+from app.core.metrics import cache_requests_total
+from app.core.timing import TimedRoute
+from app.core.worker_status import worker_status
+from app.services.metering_service import metered
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional dependency, only needed for the shared backend
+    aioredis = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no prefork workers to share generations with
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_cache_hit = cache_requests_total.labels("response", "hit")
+_cache_miss = cache_requests_total.labels("response", "miss")
+
+# Surrogate keys purged by writes
+EXOPLANETS = "exoplanets"
+PREDICTIONS = "predictions"
+MODEL_METRICS = "model_metrics"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How a route's responses are cached"""
+    ttl: float
+    tags: Tuple[str, ...]
+    metric: Optional[str] = None
+
+
+def cached(ttl: Optional[float] = None, tags: Sequence[str] = (), metric: Optional[str] = None) -> Callable:
+    """
+    Mark a GET endpoint as cacheable
+
+    Successful responses are cached per normalized path and query string
+    for ``ttl`` seconds (RESPONSE_CACHE_TTL by default), or until a write
+    purges one of ``tags``. Takes effect on routers using ``CachedRoute``.
+
+    For endpoints metered with ``metered(metric)``, pass the same
+    ``metric``: the amount the endpoint metered is stored with the entry,
+    and every cache hit is checked against the caller's quota and metered
+    for that amount, as if the endpoint had run.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__response_cache__ = CachePolicy(
+            ttl=settings.RESPONSE_CACHE_TTL if ttl is None else ttl,
+            tags=tuple(tags),
+            metric=metric
+        )
+        return endpoint
+    return decorator
+
+
+def cache_key(request: Request) -> str:
+    """Path plus query parameters in sorted order, so equivalent URLs share an entry"""
+    query = sorted(parse_qsl(request.url.query, keep_blank_values=True))
+    path = request.url.path.rstrip("/") or "/"
+    return f"{path}?{urlencode(query)}" if query else path
+
+
+class SharedGenerations:
+    """
+    Per-tag purge counters in files shared by the workers on this host
+
+    Each tag's counter is 8 bytes at the start of
+    ``cache-generation-<tag>``; reading it is a ``pread`` on a descriptor
+    kept open, and a purge increments it under an exclusive ``flock``.
+    Descriptors are reopened after a fork, since a lock held through an
+    inherited descriptor would be shared with the parent.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._fds: Dict[str, int] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _fd(self, tag: str) -> int:
+        if self._pid != os.getpid():
+            self._fds, self._pid = {}, os.getpid()
+        fd = self._fds.get(tag)
+        if fd is None:
+            with self._lock:
+                fd = self._fds.get(tag)
+                if fd is None:
+                    path = os.path.join(self.directory, f"cache-generation-{tag}")
+                    fd = self._fds[tag] = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        return fd
+
+    def get(self, tag: str) -> int:
+        value = os.pread(self._fd(tag), 8, 0)
+        return int.from_bytes(value, "little") if len(value) == 8 else 0
+
+    def bump(self, tag: str) -> None:
+        fd = self._fd(tag)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            os.pwrite(fd, (self.get(tag) + 1).to_bytes(8, "little"), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU of cached payloads
+
+    Entries are per worker, but under the prefork server tag generations
+    are shared through the worker status directory (see
+    ``SharedGenerations``), so a purge in one worker invalidates the
+    matching entries of every worker. Elsewhere (e.g. ``uvicorn
+    --workers``) purges only reach the worker that made them; use the
+    redis backend there.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[CachedPayload, float, Tuple[str, ...], Tuple[int, ...]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._shared: Optional[SharedGenerations] = None
+        self._lock = threading.Lock()
+
+    def _shared_generations(self) -> Optional[SharedGenerations]:
+        """Generations shared with the other workers, once the prefork master has set up its directory"""
+        if self._shared is None and worker_status.directory is not None and fcntl is not None:
+            self._shared = SharedGenerations(worker_status.directory)
+        return self._shared
+
+    def _current(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        shared = self._shared_generations()
+        if shared is not None:
+            return tuple(shared.get(tag) for tag in tags)
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    async def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return self._current(tags)
+
+    async def get(self, key: str, generations: Tuple[int, ...]) -> Optional[CachedPayload]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at, _, stored_generations = entry
+            # A generation mismatch means another worker purged one of the tags
+            if expires_at <= time.monotonic() or stored_generations != generations:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    async def set(
+        self,
+        key: str,
+        payload: CachedPayload,
+        ttl: float,
+        tags: Tuple[str, ...],
+        generations: Tuple[int, ...]
+    ) -> None:
+        with self._lock:
+            # Skip responses computed across a purge of one of their tags
+            if self._current(tags) != generations:
+                return
+            self._entries[key] = (payload, time.monotonic() + ttl, tags, generations)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def purge(self, tags: Iterable[str]) -> None:
+        tags = set(tags)
+        with self._lock:
+            shared = self._shared_generations()
+            for tag in tags:
+                if shared is not None:
+                    shared.bump(tag)
+                else:
+                    self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, (_, _, entry_tags, _) in self._entries.items() if tags.intersection(entry_tags)]
+            for key in stale:
+                del self._entries[key]
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """
+    Cache shared by all workers through Redis
+
+    Each tag has a generation counter that is part of every entry's key, so
+    a purge is a single INCR and stale entries simply expire.
+    """
+
+    def __init__(self, url: str, prefix: str = "exoplanet:response:"):
+        if aioredis is None:
+            raise RuntimeError("The redis package is required for RESPONSE_CACHE_BACKEND=redis")
+        self._redis = aioredis.from_url(url)
+        self.prefix = prefix
+
+    def _generation_key(self, tag: str) -> str:
+        return f"{self.prefix}gen:{tag}"
+
+    async def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        tags = list(tags)
+        if not tags:
+            return ()
+        values = await self._redis.mget([self._generation_key(tag) for tag in tags])
+        return tuple(int(value or 0) for value in values)
+
+    def _entry_key(self, key: str, generations: Tuple[int, ...]) -> str:
+        return f"{self.prefix}{','.join(map(str, generations))}:{key}"
+
+    async def get(self, key: str, generations: Tuple[int, ...]) -> Optional[CachedPayload]:
+        raw = await self._redis.get(self._entry_key(key, generations))
+        if raw is None:
+            return None
+        header, _, body = raw.partition(b"\n")
+        media_type, _, metered_amount = header.decode().partition("\t")
+        return CachedPayload(
+            body=body, etag=make_etag(body), media_type=media_type, metered=int(metered_amount or 0)
+        )
+
+    async def set(
+        self,
+        key: str,
+        payload: CachedPayload,
+        ttl: float,
+        tags: Tuple[str, ...],
+        generations: Tuple[int, ...]
+    ) -> None:
+        value = f"{payload.media_type}\t{payload.metered}".encode() + b"\n" + payload.body
+        await self._redis.set(self._entry_key(key, generations), value, px=int(ttl * 1000))
+
+    async def purge(self, tags: Iterable[str]) -> None:
+        pipeline = self._redis.pipeline()
+        for tag in tags:
+            pipeline.incr(self._generation_key(tag))
+        await pipeline.execute()
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match=f"{self.prefix}*"):
+            await self._redis.delete(key)
+
+
+class ResponseCache:
+    """Front for the configured backend; failures degrade to uncached responses"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def fetch(
+        self,
+        request: Request,
+        policy: CachePolicy,
+        compute: Callable
+    ) -> Response:
+        key = cache_key(request)
+        try:
+            generations = await self.backend.generations(policy.tags)
+            payload = await self.backend.get(key, generations)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return await compute(request)
+
+        if payload is not None:
+            _cache_hit.inc()
+            if policy.metric is not None:
+                meter = metered(policy.metric)(request)
+                meter.check(payload.metered)
+                meter.add(payload.metered)
+            response = conditional_response(request, payload)
+            response.headers["X-Cache"] = "HIT"
+            return response
+
+        _cache_miss.inc()
+        response = await compute(request)
+        body = getattr(response, "body", None)
+        if response.status_code != 200 or body is None or "content-encoding" in response.headers:
+            return response
+
+        meter = getattr(request.state, "meter", None) if policy.metric is not None else None
+        payload = CachedPayload(
+            body=bytes(body),
+            etag=make_etag(body),
+            media_type=response.media_type or response.headers.get("content-type", "application/json"),
+            metered=meter.used if meter is not None else 0
+        )
+        try:
+            await self.backend.set(key, payload, policy.ttl, policy.tags, generations)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+        response = conditional_response(request, payload)
+        response.headers["X-Cache"] = "MISS"
+        return response
+
+    async def purge(self, *tags: str) -> None:
+        """Drop every cached response tagged with any of ``tags``"""
+        try:
+            await self.backend.purge(tags)
+        except Exception as e:
+            logger.warning(f"Response cache purge of {tags} failed: {e}")
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+
+class CachedRoute(TimedRoute):
+    """Timed route that serves endpoints marked with ``@cached`` from the response cache"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        self.cache_policy: Optional[CachePolicy] = getattr(endpoint, "__response_cache__", None)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        policy = self.cache_policy
+        if policy is None or not settings.RESPONSE_CACHE_ENABLED:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method not in ("GET", "HEAD"):
+                return await handler(request)
+            return await response_cache.fetch(request, policy, handler)
+
+        return cached_handler
+
+
+def _create_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        if settings.REDIS_URL and aioredis is not None:
+            return RedisCacheBackend(settings.REDIS_URL)
+        logger.warning("Redis response cache unavailable (REDIS_URL or redis package missing), using memory")
+    return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+# Global response cache
+response_cache = ResponseCache(_create_backend())
@@ -0,0 +1,123 @@
+"""
+API key and access token authentication: middleware and route dependencies
+"""
+
+from functools import partial
+from typing import Callable, Optional
+
+from fastapi import Depends, Request
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.exceptions import AuthenticationError, AuthorizationError, RateLimitError
+from app.core.metrics import route_template
+from app.core.rate_limit import EXEMPT_PATHS, error_response, rate_limiter
+from app.services.api_key_service import KEY_PREFIX, APIKeyPrincipal, api_key_service
+from app.services.metering_service import REQUESTS, usage_meter
+from app.services.token_service import TokenClaims, looks_like_token, token_service
+
+# Reachable without a key even when API_KEY_REQUIRED is set
+PUBLIC_PREFIXES = (f"{settings.API_V1_STR}/auth", f"{settings.API_V1_STR}/admin")
+
+
+def presented_api_key(headers: Headers) -> Optional[str]:
+    """API key from X-API-Key, or from an Authorization: Bearer header holding one"""
+    api_key = headers.get("x-api-key")
+    if api_key:
+        return api_key
+    scheme, _, credentials = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials.startswith(KEY_PREFIX):
+        return credentials
+    return None
+
+
+def presented_token(headers: Headers) -> Optional[str]:
+    """Access token from an Authorization: Bearer header, unless it holds an API key"""
+    scheme, _, credentials = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials and not credentials.startswith(KEY_PREFIX):
+        return credentials
+    return None
+
+
+class APIKeyMiddleware:
+    """
+    Pure ASGI API key and access token check
+
+    Runs before routing so that responses served from the response cache
+    are covered too. A key or token that is sent must be valid (401
+    otherwise); requests without one pass unless API_KEY_REQUIRED is set.
+    While it is not, a bearer value that is not shaped like a JWT (such
+    as a stale token kept by an old frontend) is ignored, so the request
+    is served anonymously.
+    Key lookups that miss the cache are charged to the client address
+    first (429 once exhausted), as this runs before admission control.
+    Tokens are verified from their signature alone, with no query. The
+    caller is stored as ``request.state.api_key`` for the routes, the rate
+    limiter and metering (a token's claims also as ``request.state.token``),
+    and each of its requests is metered per route.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if (scope["type"] != "http" or scope["method"] == "OPTIONS"
+                or path in EXEMPT_PATHS or not path.startswith(settings.API_V1_STR)):
+            await self.app(scope, receive, send)
+            return
+
+        principal = None
+        try:
+            headers = Headers(scope=scope)
+            api_key = presented_api_key(headers)
+            token = presented_token(headers) if api_key is None else None
+            if api_key is not None:
+                principal = await api_key_service.verify(api_key, before_lookup=(
+                    partial(rate_limiter.check_key_lookup, scope) if rate_limiter is not None else None
+                ))
+                scope.setdefault("state", {})["api_key"] = principal
+            elif token is not None and (looks_like_token(token) or (
+                    settings.API_KEY_REQUIRED and not path.startswith(PUBLIC_PREFIXES))):
+                claims = token_service.verify(token)
+                principal = claims.principal
+                state = scope.setdefault("state", {})
+                state["api_key"] = principal
+                state["token"] = claims
+            elif settings.API_KEY_REQUIRED and not path.startswith(PUBLIC_PREFIXES):
+                raise AuthenticationError("API key or access token required")
+        except (AuthenticationError, RateLimitError) as exc:
+            await error_response(exc)(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if principal is not None and settings.METERING_ENABLED:
+                usage_meter.record(principal.key_id, route_template(scope), REQUESTS)
+
+
+def get_api_key(request: Request) -> Optional[APIKeyPrincipal]:
+    """Verified API key of the request (or of its access token), or None for anonymous requests"""
+    return getattr(request.state, "api_key", None)
+
+
+def get_token(request: Request) -> Optional[TokenClaims]:
+    """Verified access token of the request, or None if it was not authenticated by one"""
+    return getattr(request.state, "token", None)
+
+
+def require_scopes(*scopes: str) -> Callable:
+    """
+    Dependency rejecting API keys that lack any of ``scopes``
+
+    Anonymous requests are only possible when API_KEY_REQUIRED is off and
+    are let through. Not checked for responses served from the response
+    cache, so use it on writes and other uncached routes.
+    """
+    def check(principal: Optional[APIKeyPrincipal] = Depends(get_api_key)) -> Optional[APIKeyPrincipal]:
+        if principal is not None and not principal.has_scopes(*scopes):
+            raise AuthorizationError(f"API key lacks the required scope: {', '.join(scopes)}")
+        return principal
+    return check
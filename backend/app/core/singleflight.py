@@ -0,0 +1,84 @@
+"""
+Single-flight coalescing of identical concurrent calls
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+singleflight_calls_total = registry.counter(
+    "singleflight_calls_total",
+    "Coalesced calls by flight group; role 'shared' calls reused another caller's result",
+    ("group", "role")
+)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution
+
+    The first caller for a key (the leader) awaits the call inline, in its
+    own request's task, so it keeps using its own request-scoped resources
+    such as the DB session. Callers arriving while it is in flight await
+    the leader's result or exception instead of running the call again.
+    Nothing is cached once the call completes.
+
+    Cancelling the leader (e.g. its client disconnected) cancels the call
+    itself. Waiting callers do not see that CancelledError: they retry,
+    and the first to do so becomes the new leader and runs the call
+    again. A waiting caller that is cancelled stops waiting without
+    affecting the leader.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._leader = singleflight_calls_total.labels(group, "leader")
+        self._shared = singleflight_calls_total.labels(group, "shared")
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any
+    ) -> T:
+        """Await ``func(*args, **kwargs)``, sharing one execution per ``key``"""
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            self._shared.inc()
+            try:
+                # Shield so a waiter going away does not cancel the leader's result
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; try again
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._leader.inc()
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve it here so an unwaited exception is not logged as lost
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed"""
+        return len(self._in_flight)
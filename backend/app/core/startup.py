@@ -0,0 +1,43 @@
+"""
+Startup phase timing
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from app.core.metrics import registry
+
+
+class StartupTimer:
+    """Durations of the phases between importing the app and serving requests"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def summary(self) -> str:
+        phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+        return f"Started in {self.total() * 1000:.0f} ms ({phases})"
+
+
+# Global startup timer
+startup_timer = StartupTimer()
+
+registry.register_callback(
+    "startup_phase_seconds", "gauge", "Time this process spent in each startup phase", ("phase",),
+    lambda: [((phase,), seconds) for phase, seconds in startup_timer.phases.items()]
+)
@@ -0,0 +1,143 @@
+"""
+Static frontend served by the API process
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core.compression import negotiate_encoding
+from app.core.http_cache import CachedPayload, conditional_response, make_etag
+
+# Only the site itself is exposed, never the rest of the repository
+FRONTEND_DIRECTORIES = ("js/", "css/", "assets/", "dist/")
+FRONTEND_FILE_TYPES = (".html", ".ico", ".png", ".svg", ".webmanifest")
+FRONTEND_FILES = ("manifest.json",)
+
+# name.<8+ hex digits>.ext, as written by build_assets.py
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+VARIANT_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Tells js/config.js to call the API on the page's own origin
+SAME_ORIGIN_META = '<meta name="exoplanet-api" content="same-origin">'
+_HEAD_TAG = re.compile(rb"<head[^>]*>", re.IGNORECASE)
+
+
+def default_frontend_dir() -> str:
+    """The repository root, where the pages live next to backend/"""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def is_frontend_path(path: str) -> bool:
+    path = path.lstrip("/")
+    if path in ("", ".", "index.html") or path.startswith(FRONTEND_DIRECTORIES):
+        return True
+    return "/" not in path and (path in FRONTEND_FILES or path.endswith(FRONTEND_FILE_TYPES))
+
+
+class FrontendFiles(StaticFiles):
+    """
+    StaticFiles for the frontend pages and assets
+
+    Fingerprinted files are cached as immutable, everything else is
+    revalidated with ETag/Last-Modified. A fresh ``.br``/``.gz`` sibling
+    is sent instead of the file when the client accepts it (and no range
+    is requested). HTML pages are read once per modification, tagged so
+    the frontend calls the API same-origin, and served from memory with
+    their compressed variants.
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory=directory, html=True)
+        self._pages: Dict[str, Tuple[Tuple[int, int], CachedPayload]] = {}
+        self._lock = threading.Lock()
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if not is_frontend_path(path):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200
+    ) -> Response:
+        full_path = str(full_path)
+        cache_control = IMMUTABLE_CACHE if FINGERPRINTED.search(os.path.basename(full_path)) else REVALIDATE_CACHE
+
+        if full_path.endswith(".html") and status_code == 200:
+            payload = self._page(full_path, stat_result)
+            return conditional_response(Request(scope), payload, cache_control=cache_control)
+
+        request_headers = Headers(scope=scope)
+        variant = None if "range" in request_headers else self._variant(full_path, stat_result, request_headers)
+        if variant is not None:
+            encoding, variant_path, variant_stat = variant
+            response = FileResponse(
+                variant_path,
+                status_code=status_code,
+                stat_result=variant_stat,
+                media_type=FileResponse(full_path, stat_result=stat_result).media_type,
+                headers={"Content-Encoding": encoding}
+            )
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["Cache-Control"] = cache_control
+        if variant is not None or self._has_variants(full_path):
+            response.headers["Vary"] = "Accept-Encoding"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def _variant(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        request_headers: Headers
+    ) -> Optional[Tuple[str, str, os.stat_result]]:
+        if not request_headers.get("accept-encoding"):
+            return None
+        variants = {}
+        for encoding, suffix in VARIANT_SUFFIXES.items():
+            try:
+                variant_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            # A variant older than its source is stale
+            if variant_stat.st_mtime >= stat_result.st_mtime:
+                variants[encoding] = (full_path + suffix, variant_stat)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"), available=tuple(variants))
+        if encoding is None:
+            return None
+        return (encoding, *variants[encoding])
+
+    def _has_variants(self, full_path: str) -> bool:
+        return any(os.path.exists(full_path + suffix) for suffix in VARIANT_SUFFIXES.values())
+
+    def _page(self, full_path: str, stat_result: os.stat_result) -> CachedPayload:
+        version = (stat_result.st_mtime_ns, stat_result.st_size)
+        cached = self._pages.get(full_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with open(full_path, "rb") as f:
+            body = f.read()
+        body = _HEAD_TAG.sub(lambda m: m.group(0) + b"\n    " + SAME_ORIGIN_META.encode(), body, count=1)
+        payload = CachedPayload(body=body, etag=make_etag(body), media_type="text/html; charset=utf-8")
+        with self._lock:
+            self._pages[full_path] = (version, payload)
+        return payload
@@ -0,0 +1,145 @@
+"""
+Mergeable t-digest quantile sketch
+"""
+
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning & Ertl)
+
+    Keeps at most about ``compression`` centroids, smaller near the tails, so
+    extreme quantiles stay accurate. Digests built on different workers or
+    time windows can be merged exactly as if all values had been added to
+    one digest.
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self._means: List[float] = []
+        self._weights: List[float] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self._buffer_limit = int(compression * 5)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        """Add a value to the sketch"""
+        self._buffer.append((value, weight))
+        self.count += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        """Fold another digest into this one"""
+        if not other.count:
+            return
+        other._compress()
+        self._buffer.extend(zip(other._means, other._weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(min(max(2 * q - 1, -1.0), 1.0))
+
+    def _q(self, k: float) -> float:
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self._means, self._weights)) + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in points)
+
+        means: List[float] = []
+        weights: List[float] = []
+        mean, weight = points[0]
+        weight_before = 0.0
+        q_limit = self._q(self._k(0.0) + 1)
+        for value, w in points[1:]:
+            if (weight_before + weight + w) / total <= q_limit:
+                weight += w
+                mean += (value - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                weight_before += weight
+                q_limit = self._q(self._k(weight_before / total) + 1)
+                mean, weight = value, w
+        means.append(mean)
+        weights.append(weight)
+
+        self._means = means
+        self._weights = weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the ``q`` quantile (0 <= q <= 1); None if the sketch is empty"""
+        self._compress()
+        if not self._means:
+            return None
+        if len(self._means) == 1 or q <= 0:
+            return self.min if q <= 0 else self._means[0]
+        if q >= 1:
+            return self.max
+
+        target = q * self.count
+        cumulative = 0.0
+        previous_center = 0.0
+        previous_mean = self.min
+        for mean, weight in zip(self._means, self._weights):
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                if span <= 0:
+                    return mean
+                return previous_mean + (mean - previous_mean) * (target - previous_center) / span
+            cumulative += weight
+            previous_center = center
+            previous_mean = mean
+
+        span = self.count - previous_center
+        if span <= 0:
+            return self.max
+        return previous_mean + (self.max - previous_mean) * (target - previous_center) / span
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "means": self._means,
+            "weights": self._weights,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TDigest":
+        digest = cls(data.get("compression", 100.0))
+        digest._means = [float(m) for m in data.get("means", [])]
+        digest._weights = [float(w) for w in data.get("weights", [])]
+        digest.count = sum(digest._weights)
+        if digest.count:
+            digest.min = float(data["min"])
+            digest.max = float(data["max"])
+        return digest
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, value: str) -> "TDigest":
+        return cls.from_dict(json.loads(value))
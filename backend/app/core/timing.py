@@ -0,0 +1,162 @@
+"""
+Request stage timing and Server-Timing reporting
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Stage durations (seconds) of the request being handled in this context
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+# Stages reported in Server-Timing, in order; time not attributed to any of
+# them is reported as "app"
+STAGES = ("validation", "db", "inference", "serialization")
+
+_ENDPOINT_START = "_endpoint_start"
+_ENDPOINT_END = "_endpoint_end"
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add time spent in a stage to the current request, if any"""
+    stages = _stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Time a block of code as part of a request stage"""
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+
+
+def current_stages() -> Optional[Dict[str, float]]:
+    """Stage durations recorded so far for the current request"""
+    return _stages.get()
+
+
+def format_server_timing(stages: Dict[str, float], total: float) -> str:
+    """Render stage durations as a Server-Timing header value (milliseconds)"""
+    parts = []
+    attributed = 0.0
+    for stage in STAGES:
+        duration = stages.get(stage)
+        if duration:
+            attributed += duration
+            parts.append(f"{stage};dur={duration * 1000:.3f}")
+    parts.append(f"app;dur={max(total - attributed, 0.0) * 1000:.3f}")
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware adding X-Process-Time and Server-Timing headers
+
+    Unlike ``@app.middleware("http")`` it does not spawn a task or copy the
+    response stream; it only wraps ``send`` to add headers when the
+    response starts.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stages: Dict[str, float] = {}
+        token = _stages.set(stages)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(total))
+                headers.append("Server-Timing", format_server_timing(stages, total))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _stages.reset(token)
+
+
+def _mark(key: str) -> None:
+    stages = _stages.get()
+    if stages is not None:
+        stages[key] = time.perf_counter()
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an endpoint so the route knows when it started and finished"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            _mark(_ENDPOINT_START)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark(_ENDPOINT_END)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        _mark(_ENDPOINT_START)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _mark(_ENDPOINT_END)
+    return sync_wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    API route recording request validation and response serialization time
+
+    Validation is the time from the route being entered until the endpoint
+    runs (body parsing and dependency resolution); serialization is the time
+    from the endpoint returning until the response is ready to send.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            stages = _stages.get()
+            if stages is None:
+                return await handler(request)
+
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                end = time.perf_counter()
+                endpoint_start = stages.pop(_ENDPOINT_START, None)
+                endpoint_end = stages.pop(_ENDPOINT_END, None)
+                if endpoint_start is not None:
+                    record_stage("validation", endpoint_start - start)
+                if endpoint_end is not None:
+                    record_stage("serialization", end - endpoint_end)
+
+        return timed_handler
@@ -0,0 +1,120 @@
+"""
+Health reports of the prefork server's workers
+"""
+
+import glob
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+
+def memory_usage() -> Dict[str, int]:
+    """
+    Memory of this process in bytes
+
+    ``rss`` counts pages shared with the master and other workers in full,
+    ``pss`` splits them between the processes sharing them and ``private``
+    is what this process alone has touched, i.e. its real per-worker cost.
+    """
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                field, _, value = line.partition(":")
+                if field in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    usage[field] = int(value.split()[0]) * 1024
+    except OSError:
+        # No /proc (macOS): peak RSS is all there is
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss": maxrss if sys.platform == "darwin" else maxrss * 1024}
+    return {
+        "rss": usage.get("Rss", 0),
+        "pss": usage.get("Pss", 0),
+        "private": usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0)
+    }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class WorkerStatusBoard:
+    """
+    Per-worker health reports in a directory shared by the process tree
+
+    Each worker rewrites ``worker-<pid>.json`` on every heartbeat; the
+    master reads them to detect hung workers and the admin endpoint to
+    report on all of them. Inactive (no directory) outside the prefork
+    server.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+
+    def activate(self) -> str:
+        """Create the directory if needed and forget reports of earlier runs"""
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="exoplanet-workers-")
+        os.makedirs(self.directory, exist_ok=True)
+        for path in glob.glob(os.path.join(self.directory, "worker-*.json")):
+            os.remove(path)
+        return self.directory
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"worker-{pid}.json")
+
+    def publish(self, status: Dict[str, Any]) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(status, f)
+        os.replace(tmp_name, self._path(status["pid"]))
+
+    def read(self, pid: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(pid)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def remove(self, pid: int) -> None:
+        try:
+            os.remove(self._path(pid))
+        except OSError:
+            pass
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Reports of live workers, by slot"""
+        if self.directory is None:
+            return []
+        reports = []
+        now = time.time()
+        for path in glob.glob(os.path.join(self.directory, "worker-*.json")):
+            try:
+                with open(path) as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not _pid_alive(report["pid"]):
+                continue
+            report["heartbeat_age_seconds"] = round(now - report["heartbeat_at"], 3)
+            report["healthy"] = (
+                report["state"] == "ready"
+                and report["heartbeat_age_seconds"] < settings.WORKER_TIMEOUT_SECONDS
+            )
+            reports.append(report)
+        return sorted(reports, key=lambda r: (r["slot"], r["generation"]))
+
+# Global worker status board (activated by the prefork master)
+worker_status = WorkerStatusBoard(settings.WORKER_STATUS_DIR)
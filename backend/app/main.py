@@ -3,20 +3,40 @@ ExoPlanet AI - FastAPI Backend Application
 Main application entry point with FastAPI configuration
 """
 
+import time
+
+# Startup timing covers the imports below
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import logging
-import time
 from typing import Dict, Any
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import ensure_schema
 from app.core.logging import setup_logging
 from app.api.v1.api import api_router
 from app.core.exceptions import ExoPlanetException
+from app.core.compute import compute_pool
+from app.core.timing import TimingMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.rate_limit import AdmissionControlMiddleware, rate_limiter, concurrency_limiter
+from app.core.security import APIKeyMiddleware
+from app.core.metrics import registry, MetricsMiddleware, CONTENT_TYPE_LATEST, flush_periodically
+from app.core.lazy import load_deferred
+from app.core.loop_monitor import loop_monitor
+from app.core.startup import startup_timer
+from app.core.static_frontend import FrontendFiles, default_frontend_dir
+from app.services.simulation_cache import simulation_cache
+from app.services.prediction_stats_service import prediction_stats_service
+from app.services.api_key_service import api_key_service
+from app.services.metering_service import usage_meter
+from app.services.token_service import token_service
 
 
 # Setup logging
@@ -30,16 +50,82 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting ExoPlanet AI API...")
     
-    # Create database tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Create database tables unless the schema is already current
+    with startup_timer.phase("schema"):
+        created = await ensure_schema()
+    
+    logger.info("Database tables created successfully" if created else "Database schema is current")
+    
+    # Prediction counters
+    with startup_timer.phase("prediction_stats"):
+        await prediction_stats_service.load()
+    stats_flusher = asyncio.create_task(
+        prediction_stats_service.flush_periodically(settings.PREDICTION_STATS_FLUSH_SECONDS)
+    )
+    
+    # API key usage counters
+    key_usage_flusher = asyncio.create_task(
+        api_key_service.flush_periodically(settings.API_KEY_USAGE_FLUSH_SECONDS)
+    )
+    
+    # Revoked API keys, dropped from the key cache of every worker
+    key_revocation_refresher = asyncio.create_task(
+        api_key_service.refresh_periodically(settings.API_KEY_REVOCATION_REFRESH_SECONDS)
+    )
+    
+    # Revoked access tokens, reloaded to pick up revocations made by other workers
+    await token_service.refresh_revocations()
+    revocation_refresher = asyncio.create_task(
+        token_service.refresh_periodically(settings.JWT_REVOCATION_REFRESH_SECONDS)
+    )
+    
+    # Per-key usage metering; today's totals are loaded for the quotas
+    await usage_meter.flush()
+    usage_flusher = asyncio.create_task(
+        usage_meter.flush_periodically(settings.METERING_FLUSH_SECONDS)
+    )
+    
+    # Share metrics with the other workers
+    metrics_flusher = None
+    if settings.METRICS_ENABLED and registry.multiprocess_dir:
+        metrics_flusher = asyncio.create_task(
+            flush_periodically(settings.METRICS_FLUSH_INTERVAL_SECONDS)
+        )
+    
+    # Event loop lag and blocking-call detection
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
     
-    logger.info("Database tables created successfully")
+    logger.info(startup_timer.summary())
+    
+    # Import what was deferred (numpy, simulations) now that requests are served
+    deferred_loader = asyncio.create_task(asyncio.to_thread(load_deferred))
     
     yield
     
     # Shutdown
     logger.info("Shutting down ExoPlanet AI API...")
+    await loop_monitor.stop()
+    stats_flusher.cancel()
+    await prediction_stats_service.flush()
+    key_usage_flusher.cancel()
+    await api_key_service.flush()
+    usage_flusher.cancel()
+    await usage_meter.flush()
+    key_revocation_refresher.cancel()
+    revocation_refresher.cancel()
+    if metrics_flusher is not None:
+        metrics_flusher.cancel()
+        try:
+            registry.write_snapshot()
+        except OSError as e:
+            logger.warning(f"Could not write final metrics snapshot: {e}")
+    if not deferred_loader.done():
+        deferred_loader.cancel()
+    elif deferred_loader.exception() is not None:
+        logger.warning(f"Could not import deferred modules: {deferred_loader.exception()}")
+    compute_pool.shutdown()
+    simulation_cache.close()
 
 
 # Create FastAPI application
@@ -55,6 +141,16 @@ app = FastAPI(
 
 
 # Add middleware
+# Rate limiting and load shedding (innermost, so rejections still get CORS headers)
+app.add_middleware(
+    AdmissionControlMiddleware,
+    limiter=rate_limiter,
+    concurrency=concurrency_limiter
+)
+
+# API key verification (outside admission control, so the limiter sees the key)
+app.add_middleware(APIKeyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins_list,
@@ -67,14 +163,21 @@ app.add_middleware(
     TrustedHostMiddleware,
     allowed_hosts=settings.allowed_hosts_list
 )
-# Custom middleware for request timing
-@app.middleware("http")
-async def add_process_time_header(request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+# Response compression (inside the timing middleware so it is included in the timings)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+    )
+
+# Request timing (X-Process-Time and Server-Timing headers)
+app.add_middleware(TimingMiddleware)
+
+# Per-route request metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 
 # Exception handlers
@@ -89,7 +192,8 @@ async def exoplanet_exception_handler(request, exc: ExoPlanetException):
                 "message": exc.message,
                 "details": exc.details
             }
-        }
+        },
+        headers=exc.headers
     )
 
 
@@ -104,7 +208,8 @@ async def http_exception_handler(request, exc: HTTPException):
                 "message": exc.detail,
                 "details": None
             }
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -139,9 +244,25 @@ async def health_check() -> Dict[str, Any]:
     }
 
 
+# Metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus metrics in the text exposition format"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body = await asyncio.to_thread(registry.generate_latest)
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Serve the frontend from this process; mounted last so API routes win
+if settings.SERVE_FRONTEND:
+    app.mount("/", FrontendFiles(directory=settings.FRONTEND_DIR or default_frontend_dir()), name="frontend")
+
+startup_timer.record("imports", time.perf_counter() - _import_started)
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,7 +2,7 @@
 Exoplanet database models
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, Index
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -98,6 +98,51 @@ class Prediction(Base):
     )
 
 
+class PredictionStats(Base):
+    """Prediction counters aggregated per day, class and model version"""
+    
+    __tablename__ = "prediction_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(String(10), nullable=False)  # UTC date, YYYY-MM-DD
+    classification = Column(String(50), nullable=False)
+    model_version = Column(String(50), nullable=False)
+    
+    # Running sums
+    count = Column(Integer, nullable=False, default=0)
+    processing_time_sum = Column(Float, nullable=False, default=0.0)  # seconds
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    latency_histogram = Column(Text)  # JSON list of counts per latency bucket
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('day', 'classification', 'model_version', name='uq_prediction_stats_key'),
+        Index('idx_prediction_stats_day', 'day'),
+    )
+
+
+class PredictionSketch(Base):
+    """Quantile sketch of a prediction metric for one hour and one class or model version"""
+    
+    __tablename__ = "prediction_sketches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    window_start = Column(DateTime, nullable=False)  # UTC, start of the hour
+    metric = Column(String(50), nullable=False)  # confidence, processing_time
+    dimension = Column(String(50), nullable=False)  # classification or model version
+    
+    count = Column(Integer, nullable=False, default=0)
+    digest = Column(Text, nullable=False)  # serialized t-digest
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('window_start', 'metric', 'dimension', name='uq_prediction_sketch_key'),
+        Index('idx_prediction_sketch_metric_window', 'metric', 'window_start'),
+    )
+
+
 class ModelMetrics(Base):
     """Model performance metrics"""
     
@@ -2,7 +2,7 @@
 User authentication models
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, BigInteger, Float, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -66,4 +66,34 @@ class APIKey(Base):
     
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    created_by = Column(Integer)  # User ID who created the key
\ No newline at end of file
+    created_by = Column(Integer)  # User ID who created the key
+
+
+class APIUsage(Base):
+    """Metered usage per UTC day, API key, route and metric"""
+    
+    __tablename__ = "api_usage"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(String(10), nullable=False)  # UTC date, YYYY-MM-DD
+    key_id = Column(String(255), nullable=False)
+    route = Column(String(255), nullable=False)  # route template, e.g. /api/v1/advanced/predictions/predict
+    metric = Column(String(50), nullable=False)  # requests, predictions, simulation_frames, rows
+    amount = Column(BigInteger, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint('day', 'key_id', 'route', 'metric', name='uq_api_usage_key'),
+        Index('idx_api_usage_key_day', 'key_id', 'day'),
+    )
+
+
+class RevokedToken(Base):
+    """Access tokens revoked before they expire"""
+    
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    token_id = Column(String(255), unique=True, index=True, nullable=False)  # jti, or "sub:<key id>" for all of a key's tokens
+    expires_at = Column(Float, nullable=False, index=True)  # unix time after which no token it matches is valid anyway
+    revoked_at = Column(Float)  # unix time; for "sub:" rows, tokens issued after it stay valid
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
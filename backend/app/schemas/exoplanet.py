@@ -7,6 +7,8 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
+from app.schemas.solar_system import Position3D, OrbitPath
+
 
 class PlanetType(str, Enum):
     """Planet type enumeration"""
@@ -205,4 +207,66 @@ class ModelPerformanceResponse(BaseModel):
     """Model performance response"""
     success: bool = True
     data: ModelPerformance
-    message: str = "Model performance retrieved successfully"
\ No newline at end of file
+    message: str = "Model performance retrieved successfully"
+
+
+# Exoplanet system orbit schemas
+class ExoplanetOrbitalElements(BaseModel):
+    """Orbital elements derived for a catalogued exoplanet"""
+    exoplanet_id: int = Field(..., description="Exoplanet database ID")
+    name: str = Field(..., description="Exoplanet name")
+    host_star: str = Field(..., description="Host star name")
+    orbital_period_days: float = Field(..., description="Orbital period in days")
+    semi_major_axis_au: float = Field(..., description="Semi-major axis in AU")
+    semi_major_axis_km: float = Field(..., description="Semi-major axis in km")
+    eccentricity: float = Field(..., description="Orbital eccentricity")
+    inclination_deg: float = Field(..., description="Orbital inclination in degrees")
+    stellar_mass_solar: float = Field(..., description="Host star mass in solar masses")
+
+
+class ExoplanetWithPosition(ExoplanetOrbitalElements):
+    """Exoplanet with current position around its host star"""
+    position: Position3D = Field(..., description="Current 3D position relative to the host star")
+    distance_from_star_km: float = Field(..., description="Current distance from the host star")
+    velocity_kms: float = Field(..., description="Current orbital velocity")
+
+
+class ExoplanetSystemPositionsResponse(BaseModel):
+    """Positions of every catalogued planet in a host-star system"""
+    host_star: str = Field(..., description="Host star name")
+    planets: List[ExoplanetWithPosition] = Field(..., description="Planets with positions")
+    timestamp: float = Field(..., description="Calculation timestamp")
+    julian_date: float = Field(..., description="Julian date")
+
+
+class ExoplanetSystemOrbitsResponse(BaseModel):
+    """Orbital paths of every catalogued planet in a host-star system"""
+    host_star: str = Field(..., description="Host star name")
+    orbits: List[OrbitPath] = Field(..., description="Orbital paths")
+    resolution: int = Field(..., description="Number of points per orbit")
+
+
+# Prediction quantile schemas
+class SketchMetric(str, Enum):
+    """Prediction metrics tracked with quantile sketches"""
+    CONFIDENCE = "confidence"  # per classification
+    PROCESSING_TIME = "processing_time"  # per model version
+
+
+class QuantileSummary(BaseModel):
+    """Quantiles of a metric for one classification or model version"""
+    dimension: str
+    count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    quantiles: Dict[str, Optional[float]]
+
+
+class PredictionQuantilesResponse(BaseModel):
+    """Schema for prediction quantiles API response"""
+    success: bool = True
+    metric: SketchMetric
+    start: datetime
+    end: datetime
+    data: List[QuantileSummary]
+    message: str = "Prediction quantiles retrieved successfully"
@@ -15,6 +15,12 @@ class PlanetType(str, Enum):
     DWARF_PLANET = "dwarf_planet"
 
 
+class SimulationMode(str, Enum):
+    """Orbital propagation mode"""
+    KEPLER = "kepler"
+    NBODY = "nbody"
+
+
 class Position3D(BaseModel):
     """3D position coordinates"""
     x: float = Field(..., description="X coordinate in km")
@@ -59,6 +65,9 @@ class Planet(BaseModel):
     hex_color: str = Field(..., description="Hex color code")
     description: str = Field(..., description="Planet description")
     interesting_facts: List[str] = Field(..., description="Interesting facts")
+    
+    class Config:
+        frozen = True
 
 
 class PlanetWithPosition(Planet):
@@ -82,6 +91,9 @@ class Sun(BaseModel):
     hex_color: str = Field(..., description="Hex color code")
     description: str = Field(..., description="Description")
     interesting_facts: List[str] = Field(..., description="Interesting facts")
+    
+    class Config:
+        frozen = True
 
 
 class SolarSystemResponse(BaseModel):
@@ -124,6 +136,8 @@ class SimulationRequest(BaseModel):
     end_date: Optional[float] = Field(None, description="End Julian date")
     time_step_days: float = Field(1.0, description="Time step in days")
     planet_ids: Optional[List[str]] = Field(None, description="Specific planets to simulate")
+    mode: SimulationMode = Field(SimulationMode.KEPLER, description="Independent Kepler orbits or full N-body integration")
+    max_step_days: Optional[float] = Field(None, ge=0.01, description="Maximum N-body integrator step in days (default: adaptive)")
 
 
 class SimulationFrame(BaseModel):
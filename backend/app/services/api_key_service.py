@@ -0,0 +1,375 @@
+"""
+API Key Service - Issuing, verifying and revoking API keys
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import AuthenticationError, NotFoundError
+from app.core.metrics import cache_requests_total
+from app.core.singleflight import SingleFlight
+from app.models.user import APIKey, User
+from app.schemas.user import APIKeyCreate, APIKeyResponse, APIKeyWithSecret
+
+logger = logging.getLogger(__name__)
+
+_cache_hit = cache_requests_total.labels("api_key", "hit")
+_cache_miss = cache_requests_total.labels("api_key", "miss")
+
+# Keys look like "exo_<key id>_<secret>"; only a hash of the secret is stored
+KEY_PREFIX = "exo_"
+
+
+@dataclass(frozen=True)
+class APIKeyPrincipal:
+    """A verified API key, as seen by the routes"""
+    key_id: str
+    name: str
+    scopes: FrozenSet[str]
+    rate_limit: int
+    tier: str = "free"  # rate_limit_tier of the owning user, for usage quotas
+    created_by: Optional[int] = None
+
+    def has_scopes(self, *scopes: str) -> bool:
+        return all(scope in self.scopes for scope in scopes)
+
+
+@dataclass
+class _CacheEntry:
+    principal: Optional[APIKeyPrincipal]  # None: the key id is unknown, inactive or expired
+    key_hash: Optional[str]  # stored hash of the key's secret
+    api_key: Optional[str]  # the full key, once it has been presented and verified
+    expires: float
+
+
+def hash_secret(secret: str) -> str:
+    """
+    Stored form of a key secret
+
+    Secrets are 256 random bits, so a plain SHA-256 cannot be brute
+    forced and a slow password hash would only add latency.
+    """
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def split_key(api_key: str) -> Optional[Tuple[str, str]]:
+    """(key id, secret) of a well-formed key, else None"""
+    if not api_key.startswith(KEY_PREFIX):
+        return None
+    key_id, _, secret = api_key[len(KEY_PREFIX):].partition("_")
+    if not key_id or not secret:
+        return None
+    return key_id, secret
+
+
+def _decode_scopes(value: Optional[str]) -> List[str]:
+    try:
+        scopes = json.loads(value) if value else []
+    except ValueError:
+        logger.warning("Ignoring malformed scopes on an API key")
+        return []
+    return [str(scope) for scope in scopes] if isinstance(scopes, list) else []
+
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes for timezone-aware columns
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+class APIKeyService:
+    """
+    API keys checked against the ``api_keys`` table
+
+    Looked-up keys are kept in an in-process LRU per key id for
+    API_KEY_CACHE_TTL_SECONDS, so a hot key costs a dict lookup and a
+    constant-time comparison: no query and no hashing. Wrong secrets for a
+    cached key id are rejected by comparing hashes, also without a query.
+    Unknown, inactive or expired key ids are remembered for a shorter time
+    in a separate, smaller LRU, so a flood of made-up ids cannot evict
+    valid keys; callers can also throttle the lookups themselves (see
+    ``verify``). Revoking a key drops it from this worker's cache at once;
+    other workers drop it when they next reload the revoked keys, every
+    API_KEY_REVOCATION_REFRESH_SECONDS.
+
+    ``last_used`` and ``usage_count`` are counted in memory and added to the
+    table in one batch every API_KEY_USAGE_FLUSH_SECONDS.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, negative_ttl: float, max_negative_entries: int = 1000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_negative_entries = max_negative_entries
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        # Key ids that were not usable when looked up -> when to look again
+        self._unknown: "OrderedDict[str, float]" = OrderedDict()
+        self._usage: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._lookups = SingleFlight("api_key")
+
+    async def verify(
+        self,
+        api_key: str,
+        before_lookup: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> APIKeyPrincipal:
+        """
+        Principal for a key, raising AuthenticationError if it is unknown, revoked or expired
+
+        ``before_lookup`` is awaited when the key id has to be looked up in
+        the database, and may raise (e.g. RateLimitError) to refuse.
+        """
+        parts = split_key(api_key)
+        if parts is None:
+            raise AuthenticationError("Invalid API key")
+        key_id = parts[0]
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key_id)
+            if entry is not None and entry.expires > now:
+                self._cache.move_to_end(key_id)
+                _cache_hit.inc()
+            else:
+                entry = None
+                if self._unknown.get(key_id, 0.0) > now:
+                    _cache_hit.inc()
+                    raise AuthenticationError("Invalid API key")
+        if entry is None:
+            _cache_miss.inc()
+            if before_lookup is not None:
+                await before_lookup()
+            entry = await self._lookups.do(key_id, self._load, key_id)
+
+        principal = entry.principal
+        if principal is None:
+            raise AuthenticationError("Invalid API key")
+        if entry.api_key is None or not hmac.compare_digest(entry.api_key, api_key):
+            # Not the key seen before: check its secret against the stored hash
+            if not hmac.compare_digest(entry.key_hash, hash_secret(parts[1])):
+                raise AuthenticationError("Invalid API key")
+            entry.api_key = api_key
+        self._record_use(key_id)
+        return principal
+
+    async def _load(self, key_id: str) -> _CacheEntry:
+        """Look a key id up in the database and cache what was found"""
+        async with AsyncSessionLocal() as db:
+            found = (await db.execute(
+                select(APIKey, User.rate_limit_tier)
+                .outerjoin(User, User.id == APIKey.created_by)
+                .where(APIKey.key_id == key_id)
+            )).first()
+        row, tier = found if found is not None else (None, None)
+
+        principal, key_hash, ttl = None, None, self.negative_ttl
+        if row is not None and row.is_active:
+            ttl = self.ttl
+            expires_at = _as_utc(row.expires_at)
+            if expires_at is not None:
+                ttl = min(ttl, (expires_at - datetime.now(timezone.utc)).total_seconds())
+            if ttl > 0:
+                principal = APIKeyPrincipal(
+                    key_id=row.key_id,
+                    name=row.name,
+                    scopes=frozenset(_decode_scopes(row.scopes)),
+                    rate_limit=row.rate_limit or 0,
+                    tier=tier or settings.API_KEY_DEFAULT_TIER,
+                    created_by=row.created_by
+                )
+                key_hash = row.key_hash
+            else:
+                ttl = self.negative_ttl
+
+        entry = _CacheEntry(principal, key_hash, None, time.monotonic() + ttl)
+        with self._lock:
+            if principal is None:
+                self._cache.pop(key_id, None)
+                self._unknown[key_id] = entry.expires
+                self._unknown.move_to_end(key_id)
+                while len(self._unknown) > self.max_negative_entries:
+                    self._unknown.popitem(last=False)
+                return entry
+            self._unknown.pop(key_id, None)
+            current = self._cache.get(key_id)
+            if current is not None and current.key_hash == key_hash and current.api_key is not None:
+                # Keep the already verified full key, so it still skips hashing
+                entry.api_key = current.api_key
+            self._cache[key_id] = entry
+            self._cache.move_to_end(key_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return entry
+
+    def invalidate(self, key_id: str) -> None:
+        """Forget this worker's cached verification of a key"""
+        with self._lock:
+            self._cache.pop(key_id, None)
+
+    async def refresh_revocations(self) -> None:
+        """Drop cached keys that were revoked, e.g. through another worker"""
+        with self._lock:
+            if not self._cache:
+                return
+        try:
+            async with AsyncSessionLocal() as db:
+                revoked = (await db.execute(
+                    select(APIKey.key_id).where(APIKey.is_active == False)
+                )).scalars().all()
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning(f"Could not reload revoked API keys: {e}")
+            return
+        with self._lock:
+            for key_id in revoked:
+                self._cache.pop(key_id, None)
+
+    async def refresh_periodically(self, interval: float) -> None:
+        """Reload revoked keys every ``interval`` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh_revocations()
+
+    def _record_use(self, key_id: str) -> None:
+        with self._lock:
+            count, _ = self._usage.get(key_id, (0, 0.0))
+            self._usage[key_id] = (count + 1, time.time())
+
+    async def flush(self) -> None:
+        """Add uses counted since the last flush to ``usage_count`` and ``last_used``"""
+        with self._lock:
+            pending, self._usage = self._usage, {}
+        if not pending:
+            return
+
+        table = APIKey.__table__
+        statement = (
+            update(table)
+            .where(table.c.key_id == bindparam("_key_id"))
+            .values(
+                usage_count=table.c.usage_count + bindparam("_uses"),
+                last_used=bindparam("_last_used")
+            )
+        )
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(statement, [
+                    {
+                        "_key_id": key_id,
+                        "_uses": count,
+                        "_last_used": datetime.fromtimestamp(last_used, timezone.utc)
+                    }
+                    for key_id, (count, last_used) in pending.items()
+                ])
+                await db.commit()
+        except (SQLAlchemyError, OSError) as e:
+            # Keep the counts for the next attempt
+            logger.warning(f"Could not persist API key usage: {e}")
+            with self._lock:
+                for key_id, (count, last_used) in pending.items():
+                    current, latest = self._usage.get(key_id, (0, 0.0))
+                    self._usage[key_id] = (current + count, max(latest, last_used))
+
+    async def flush_periodically(self, interval: float) -> None:
+        """Persist key usage every ``interval`` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def create(self, request: APIKeyCreate, created_by: Optional[int] = None) -> APIKeyWithSecret:
+        """Issue a new key; the secret is only returned here"""
+        key_id = secrets.token_hex(8)
+        secret = secrets.token_urlsafe(32)
+        expires_at = None
+        if request.expires_days:
+            expires_at = datetime.now(timezone.utc) + timedelta(days=request.expires_days)
+
+        async with AsyncSessionLocal() as db:
+            row = APIKey(
+                key_id=key_id,
+                key_hash=hash_secret(secret),
+                name=request.name,
+                description=request.description,
+                scopes=json.dumps(sorted(set(request.scopes))),
+                rate_limit=settings.RATE_LIMIT_PER_MINUTE,
+                is_active=True,
+                expires_at=expires_at,
+                usage_count=0,
+                created_by=created_by
+            )
+            db.add(row)
+            await db.commit()
+            await db.refresh(row)
+
+        logger.info("Created API key %s (%s)", key_id, request.name)
+        return APIKeyWithSecret(**self._response(row).model_dump(), api_key=f"{KEY_PREFIX}{key_id}_{secret}")
+
+    async def list(self) -> List[APIKeyResponse]:
+        """All keys, newest first, with usage counted so far"""
+        await self.flush()
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(select(APIKey).order_by(APIKey.id.desc()))).scalars().all()
+        return [self._response(row) for row in rows]
+
+    async def tier(self, key_id: str) -> str:
+        """Usage tier of a key: its owner's rate_limit_tier, or API_KEY_DEFAULT_TIER"""
+        async with AsyncSessionLocal() as db:
+            found = (await db.execute(
+                select(APIKey.id, User.rate_limit_tier)
+                .outerjoin(User, User.id == APIKey.created_by)
+                .where(APIKey.key_id == key_id)
+            )).first()
+        if found is None:
+            raise NotFoundError(f"API key {key_id} not found")
+        return found[1] or settings.API_KEY_DEFAULT_TIER
+
+    async def revoke(self, key_id: str) -> None:
+        """Deactivate a key; this worker stops accepting it immediately"""
+        self.invalidate(key_id)
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(select(APIKey).where(APIKey.key_id == key_id))).scalar_one_or_none()
+            if row is None:
+                raise NotFoundError(f"API key {key_id} not found")
+            row.is_active = False
+            await db.commit()
+        # A verification that read the row before the commit may have cached it again
+        self.invalidate(key_id)
+        logger.info("Revoked API key %s", key_id)
+
+    @staticmethod
+    def _response(row: APIKey) -> APIKeyResponse:
+        return APIKeyResponse(
+            key_id=row.key_id,
+            name=row.name,
+            description=row.description,
+            scopes=_decode_scopes(row.scopes),
+            is_active=row.is_active,
+            expires_at=row.expires_at,
+            created_at=row.created_at,
+            last_used=row.last_used,
+            usage_count=row.usage_count or 0
+        )
+
+
+# Global service instance
+api_key_service = APIKeyService(
+    max_entries=settings.API_KEY_CACHE_SIZE,
+    ttl=settings.API_KEY_CACHE_TTL_SECONDS,
+    negative_ttl=settings.API_KEY_NEGATIVE_CACHE_TTL_SECONDS,
+    max_negative_entries=settings.API_KEY_NEGATIVE_CACHE_SIZE
+)
@@ -0,0 +1,283 @@
+"""
+Exoplanet Orbit Service - Batch orbital calculations for catalogued host-star systems
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import cache_requests_total
+from app.core.lazy import lazy_import
+from app.models.exoplanet import Exoplanet
+from app.schemas.exoplanet import (
+    ExoplanetOrbitalElements, ExoplanetWithPosition,
+    ExoplanetSystemPositionsResponse, ExoplanetSystemOrbitsResponse
+)
+from app.schemas.solar_system import Position3D, OrbitPath, OrbitPathPoint
+
+logger = logging.getLogger(__name__)
+
+# Only needed to compute, not to start the app
+np = lazy_import("numpy")
+nbody_service = lazy_import("app.services.nbody_service")
+
+_cache_hit = cache_requests_total.labels("exoplanet_system", "hit")
+_cache_miss = cache_requests_total.labels("exoplanet_system", "miss")
+
+AU_KM = 149597870.7
+DAYS_PER_YEAR = 365.25
+
+# Orbit colors, assigned by distance from the host star
+ORBIT_COLORS = [
+    "#4FC3F7", "#81C784", "#FFB74D", "#E57373",
+    "#BA68C8", "#FFD54F", "#4DB6AC", "#F06292"
+]
+
+
+def _element(extra: dict, name: str, default: float, valid) -> float:
+    """A numeric orbital element from additional_data, or ``default`` if missing or unusable"""
+    value = extra.get(name)
+    if value is None:
+        return default
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return value if math.isfinite(value) and valid(value) else default
+
+
+@dataclass(frozen=True)
+class SystemElements:
+    """Orbital elements of all catalogued planets around one host star"""
+    host_star: str
+    elements: Tuple[ExoplanetOrbitalElements, ...]
+    semi_major_axis_km: np.ndarray
+    eccentricity: np.ndarray
+    period_days: np.ndarray
+    inclination_rad: np.ndarray
+    gm_km3_s2: np.ndarray
+    loaded_at: float
+
+
+class ExoplanetOrbitService:
+    """Service for orbits and positions of exoplanet host-star systems"""
+
+    def __init__(self, max_systems: int, ttl: float):
+        self.max_systems = max_systems
+        self.ttl = ttl
+        self._systems: "OrderedDict[str, SystemElements]" = OrderedDict()
+        self._orbits: "OrderedDict[Tuple[str, int], ExoplanetSystemOrbitsResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def derive_elements(exoplanet: Exoplanet) -> Optional[ExoplanetOrbitalElements]:
+        """
+        Derive orbital elements for a catalogued exoplanet
+
+        The catalogue only records the orbital period, so the semi-major axis
+        follows from Kepler's third law. Stellar mass (``stellar_mass_solar``),
+        ``eccentricity`` and ``inclination_deg`` are read from
+        ``additional_data`` when present and default to a Sun-like star on a
+        circular, face-on orbit otherwise, or when they are not usable.
+        """
+        if not exoplanet.orbital_period or not 0 < exoplanet.orbital_period < math.inf:
+            return None
+
+        extra = {}
+        if exoplanet.additional_data:
+            try:
+                extra = json.loads(exoplanet.additional_data) or {}
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring malformed additional_data for exoplanet {exoplanet.id}")
+        if not isinstance(extra, dict):
+            # Valid JSON, but not an object: nothing to read elements from
+            extra = {}
+
+        # Values that are not finite numbers in range (a string, a negative
+        # mass, a hyperbolic orbit) fall back to the default rather than
+        # failing the whole system
+        stellar_mass = _element(extra, "stellar_mass_solar", 1.0, lambda m: m > 0)
+        eccentricity = min(_element(extra, "eccentricity", 0.0, lambda e: 0 <= e < 1), 0.99)
+        inclination = _element(extra, "inclination_deg", 0.0, lambda i: -180 <= i <= 180)
+
+        years = exoplanet.orbital_period / DAYS_PER_YEAR
+        semi_major_axis_au = (stellar_mass * years ** 2) ** (1.0 / 3.0)
+
+        return ExoplanetOrbitalElements(
+            exoplanet_id=exoplanet.id,
+            name=exoplanet.name,
+            host_star=exoplanet.host_star,
+            orbital_period_days=exoplanet.orbital_period,
+            semi_major_axis_au=semi_major_axis_au,
+            semi_major_axis_km=semi_major_axis_au * AU_KM,
+            eccentricity=eccentricity,
+            inclination_deg=inclination,
+            stellar_mass_solar=stellar_mass
+        )
+
+    @staticmethod
+    def build_system(host_star: str, exoplanets: List[Exoplanet]) -> Optional[SystemElements]:
+        """Derive and vectorize the elements of one host-star system"""
+        elements = [
+            e for e in (ExoplanetOrbitService.derive_elements(exo) for exo in exoplanets)
+            if e is not None
+        ]
+        if not elements:
+            return None
+        elements.sort(key=lambda e: e.semi_major_axis_km)
+
+        return SystemElements(
+            host_star=host_star,
+            elements=tuple(elements),
+            semi_major_axis_km=np.array([e.semi_major_axis_km for e in elements]),
+            eccentricity=np.array([e.eccentricity for e in elements]),
+            period_days=np.array([e.orbital_period_days for e in elements]),
+            inclination_rad=np.radians([e.inclination_deg for e in elements]),
+            gm_km3_s2=np.array([nbody_service.GM_SUN_KM3_S2 * e.stellar_mass_solar for e in elements]),
+            loaded_at=time.monotonic()
+        )
+
+    async def get_system(self, db: AsyncSession, host_star: str) -> Optional[SystemElements]:
+        """Get the (cached) orbital elements of a host-star system"""
+        with self._lock:
+            system = self._systems.get(host_star)
+            if system and time.monotonic() - system.loaded_at < self.ttl:
+                self._systems.move_to_end(host_star)
+                _cache_hit.inc()
+                return system
+        _cache_miss.inc()
+
+        result = await db.execute(
+            select(Exoplanet).where(Exoplanet.host_star == host_star)
+        )
+        system = self.build_system(host_star, list(result.scalars().all()))
+        if system is None:
+            return None
+
+        with self._lock:
+            self._systems[host_star] = system
+            self._systems.move_to_end(host_star)
+            while len(self._systems) > self.max_systems:
+                evicted, _ = self._systems.popitem(last=False)
+                self._drop_orbits(evicted)
+        return system
+
+    def compute_positions(
+        self,
+        system: SystemElements,
+        timestamp: Optional[float] = None
+    ) -> ExoplanetSystemPositionsResponse:
+        """Calculate positions of every planet in a system at once"""
+        if timestamp is None:
+            timestamp = time.time()
+        julian_date = (timestamp / 86400.0) + 2440587.5
+
+        positions, _ = nbody_service.kepler_state(
+            system.semi_major_axis_km,
+            system.eccentricity,
+            system.period_days,
+            system.inclination_rad,
+            julian_date
+        )
+        distances = np.sqrt((positions ** 2).sum(axis=1))
+        # Vis-viva: v = sqrt(GM * (2/r - 1/a))
+        velocities = np.sqrt(system.gm_km3_s2 * (2 / distances - 1 / system.semi_major_axis_km))
+
+        planets = []
+        for i, elements in enumerate(system.elements):
+            x, y, z = positions[i]
+            planets.append(ExoplanetWithPosition(
+                **elements.dict(),
+                position=Position3D(x=x, y=y, z=z),
+                distance_from_star_km=distances[i],
+                velocity_kms=velocities[i]
+            ))
+
+        return ExoplanetSystemPositionsResponse(
+            host_star=system.host_star,
+            planets=planets,
+            timestamp=timestamp,
+            julian_date=julian_date
+        )
+
+    def compute_orbits(self, system: SystemElements, resolution: int = 360) -> ExoplanetSystemOrbitsResponse:
+        """Generate orbital paths for every planet in a system at once"""
+        angles_deg, points = nbody_service.orbit_paths(
+            system.semi_major_axis_km,
+            system.eccentricity,
+            system.inclination_rad,
+            resolution
+        )
+
+        orbits = []
+        for i, elements in enumerate(system.elements):
+            orbits.append(OrbitPath(
+                planet_id=str(elements.exoplanet_id),
+                planet_name=elements.name,
+                points=[
+                    OrbitPathPoint(angle_deg=angle, position=Position3D(x=x, y=y, z=z))
+                    for angle, (x, y, z) in zip(angles_deg, points[i])
+                ],
+                color=ORBIT_COLORS[i % len(ORBIT_COLORS)]
+            ))
+
+        return ExoplanetSystemOrbitsResponse(
+            host_star=system.host_star,
+            orbits=orbits,
+            resolution=resolution
+        )
+
+    def get_cached_orbits(self, system: SystemElements, resolution: int) -> Optional[ExoplanetSystemOrbitsResponse]:
+        """Get previously generated orbit paths for a system, if still current"""
+        with self._lock:
+            return self._orbits.get((system.host_star, resolution)) if (
+                self._systems.get(system.host_star) is system
+            ) else None
+
+    def store_orbits(self, system: SystemElements, orbits: ExoplanetSystemOrbitsResponse) -> None:
+        """Remember generated orbit paths for a system"""
+        key = (system.host_star, orbits.resolution)
+        with self._lock:
+            if self._systems.get(system.host_star) is not system:
+                return  # System was invalidated while the paths were computed
+            self._orbits[key] = orbits
+            self._orbits.move_to_end(key)
+            while len(self._orbits) > self.max_systems:
+                self._orbits.popitem(last=False)
+
+    def _drop_orbits(self, host_star: str) -> None:
+        for key in [k for k in self._orbits if k[0] == host_star]:
+            del self._orbits[key]
+
+    def invalidate(self, host_star: Optional[str] = None) -> None:
+        """Forget cached systems, e.g. after exoplanets were created, updated or deleted"""
+        with self._lock:
+            if host_star is None:
+                self._systems.clear()
+                self._orbits.clear()
+            else:
+                self._systems.pop(host_star, None)
+                self._drop_orbits(host_star)
+
+    def cache_info(self) -> Dict[str, int]:
+        """Number of cached systems and orbit path sets"""
+        with self._lock:
+            return {"systems": len(self._systems), "orbit_paths": len(self._orbits)}
+
+
+# Global service instance
+exoplanet_orbit_service = ExoplanetOrbitService(
+    max_systems=settings.EXOPLANET_SYSTEM_CACHE_SIZE,
+    ttl=settings.CACHE_TTL
+)
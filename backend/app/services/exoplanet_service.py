@@ -16,10 +16,20 @@ from app.schemas.exoplanet import (
     PredictionInput, PredictionResult
 )
 from app.core.exceptions import NotFoundError, ValidationError
+from app.core.timing import timed_stage
+from app.core.metrics import model_inference_seconds
+from app.core.response_cache import response_cache, EXOPLANETS, PREDICTIONS
+from app.core.singleflight import SingleFlight
 from app.services.ml_service import ml_model
+from app.services.exoplanet_orbit_service import exoplanet_orbit_service
+from app.services.prediction_stats_service import prediction_stats_service
 
 logger = logging.getLogger(__name__)
 
+# Dashboards refresh these together; identical concurrent reads share one query
+_statistics_flight = SingleFlight("exoplanet_statistics")
+_model_performance_flight = SingleFlight("model_performance")
+
 
 class ExoplanetService:
     """Service for exoplanet operations"""
@@ -43,8 +53,10 @@ class ExoplanetService:
             db.add(db_exoplanet)
             await db.commit()
             await db.refresh(db_exoplanet)
+            exoplanet_orbit_service.invalidate(db_exoplanet.host_star)
+            await response_cache.purge(EXOPLANETS)
             
-            logger.info(f"Created exoplanet: {db_exoplanet.name}")
+            logger.info("Created exoplanet: %s", db_exoplanet.name)
             return db_exoplanet
             
         except Exception as e:
@@ -195,6 +207,8 @@ class ExoplanetService:
             if not db_exoplanet:
                 raise NotFoundError(f"Exoplanet with ID {exoplanet_id} not found")
             
+            previous_host_star = db_exoplanet.host_star
+            
             # Update fields
             update_data = exoplanet_data.dict(exclude_unset=True)
             for field, value in update_data.items():
@@ -204,8 +218,11 @@ class ExoplanetService:
             
             await db.commit()
             await db.refresh(db_exoplanet)
+            exoplanet_orbit_service.invalidate(previous_host_star)
+            exoplanet_orbit_service.invalidate(db_exoplanet.host_star)
+            await response_cache.purge(EXOPLANETS)
             
-            logger.info(f"Updated exoplanet: {db_exoplanet.name}")
+            logger.info("Updated exoplanet: %s", db_exoplanet.name)
             return db_exoplanet
             
         except Exception as e:
@@ -223,8 +240,10 @@ class ExoplanetService:
             
             await db.delete(db_exoplanet)
             await db.commit()
+            exoplanet_orbit_service.invalidate(db_exoplanet.host_star)
+            await response_cache.purge(EXOPLANETS)
             
-            logger.info(f"Deleted exoplanet: {db_exoplanet.name}")
+            logger.info("Deleted exoplanet: %s", db_exoplanet.name)
             return True
             
         except Exception as e:
@@ -234,7 +253,11 @@ class ExoplanetService:
     
     @staticmethod
     async def get_statistics(db: AsyncSession) -> Dict[str, Any]:
-        """Get exoplanet statistics"""
+        """Get exoplanet statistics, coalescing concurrent calls"""
+        return await _statistics_flight.do(None, ExoplanetService._query_statistics, db)
+    
+    @staticmethod
+    async def _query_statistics(db: AsyncSession) -> Dict[str, Any]:
         try:
             # Total count
             total_result = await db.execute(select(func.count(Exoplanet.id)))
@@ -301,7 +324,8 @@ class PredictionService:
         """Create a new prediction"""
         try:
             # Make prediction using ML model
-            result = ml_model.predict(input_data)
+            with timed_stage("inference"), model_inference_seconds.time():
+                result = ml_model.predict(input_data)
             
             # Save prediction to database
             db_prediction = Prediction(
@@ -314,12 +338,12 @@ class PredictionService:
                 equilibrium_temperature=input_data.equilibrium_temperature,
                 classification=result.classification.value,
                 confidence=result.confidence,
-                prob_confirmed=result.probability['confirmed'],
-                prob_candidate=result.probability['candidate'],
-                prob_false_positive=result.probability['false_positive'],
-                signal_to_noise=result.metrics['signal_to_noise'],
-                transit_score=result.metrics['transit_score'],
-                periodicity=result.metrics['periodicity'],
+                prob_confirmed=result.probability.confirmed,
+                prob_candidate=result.probability.candidate,
+                prob_false_positive=result.probability.false_positive,
+                signal_to_noise=result.metrics.signal_to_noise,
+                transit_score=result.metrics.transit_score,
+                periodicity=result.metrics.periodicity,
                 processing_time=result.processing_time,
                 model_version=result.model_version,
                 user_id=user_id
@@ -327,8 +351,10 @@ class PredictionService:
             
             db.add(db_prediction)
             await db.commit()
+            prediction_stats_service.record(result)
+            await response_cache.purge(PREDICTIONS)
             
-            logger.info(f"Created prediction: {result.id}")
+            logger.info("Created prediction: %s", result.id)
             return result
             
         except Exception as e:
@@ -361,7 +387,11 @@ class PredictionService:
     
     @staticmethod
     async def get_model_performance(db: AsyncSession) -> Optional[Dict[str, Any]]:
-        """Get current model performance metrics"""
+        """Get current model performance metrics, coalescing concurrent calls"""
+        return await _model_performance_flight.do(None, PredictionService._query_model_performance, db)
+    
+    @staticmethod
+    async def _query_model_performance(db: AsyncSession) -> Optional[Dict[str, Any]]:
         result = await db.execute(
             select(ModelMetrics)
             .where(ModelMetrics.is_active == True)
@@ -0,0 +1,338 @@
+"""
+Metering Service - Per-key usage counters, quotas and summaries
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import bindparam, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import RateLimitError
+from app.core.metrics import registry, route_template
+from app.models.user import APIUsage
+from app.services.api_key_service import APIKeyPrincipal
+
+logger = logging.getLogger(__name__)
+
+# Metered quantities
+REQUESTS = "requests"
+PREDICTIONS = "predictions"
+SIMULATION_FRAMES = "simulation_frames"
+ROWS = "rows"
+
+# Daily quota per rate_limit_tier and metric; metrics not listed are unlimited
+TIER_QUOTAS: Dict[str, Dict[str, int]] = {
+    "free": {PREDICTIONS: 1_000, SIMULATION_FRAMES: 100_000, ROWS: 50_000},
+    "pro": {PREDICTIONS: 50_000, SIMULATION_FRAMES: 5_000_000, ROWS: 2_500_000},
+    "enterprise": {},
+}
+
+usage_quota_rejections_total = registry.counter(
+    "usage_quota_rejections_total", "Requests rejected because a key used up its daily quota", ("metric",)
+)
+
+# Metrics some tier has a quota for; only these are tallied per day for checks
+QUOTA_METRICS = frozenset(metric for quotas in TIER_QUOTAS.values() for metric in quotas)
+
+# (key id, route, metric), counted for the current UTC day
+ShardKey = Tuple[str, str, str]
+# (UTC day, key id, route, metric)
+UsageKey = Tuple[str, str, str, str]
+
+
+@dataclass
+class _Shard:
+    """One thread's counters since the last flush"""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    counts: Dict[ShardKey, int] = field(default_factory=dict)
+    today: Dict[Tuple[str, str], int] = field(default_factory=dict)  # (key id, metric) -> amount
+
+
+def _utc_day(moment: float) -> str:
+    return datetime.fromtimestamp(moment, timezone.utc).strftime("%Y-%m-%d")
+
+
+class UsageMeter:
+    """
+    Usage of each API key, counted in memory and persisted in batches
+
+    ``record`` is on the request path and stays under a microsecond: every
+    thread adds to its own shard of counters, so the only lock taken is
+    the shard's own (uncontended unless a flush is swapping it out), and
+    it does not read the clock. Every METERING_FLUSH_SECONDS, and at UTC
+    midnight, the shards are swapped for empty ones and their sums added
+    to the ``api_usage`` table, one row per UTC day, key, route and
+    metric. Only deltas are written, so every worker can flush into the
+    same table.
+
+    Quotas compare today's total, as read from the table at the last flush
+    plus what this worker counted since, with the key's tier quota. Other
+    workers' unflushed usage is not seen, so a key can overshoot by at most
+    one flush interval of traffic.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._day = _utc_day(time.time())
+        # Today's totals per (key id, metric) as of the last flush
+        self._persisted_today: Dict[Tuple[str, str], int] = {}
+        # Deltas a failed flush could not write
+        self._unwritten: Dict[UsageKey, int] = {}
+
+    def _new_shard(self) -> _Shard:
+        shard = self._local.shard = _Shard()
+        with self._shards_lock:
+            self._shards.append(shard)
+        return shard
+
+    def record(self, key_id: str, route: str, metric: str, amount: int = 1) -> None:
+        """Count ``amount`` of ``metric`` used by a key on a route"""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        key = (key_id, route, metric)
+        lock = shard.lock
+        lock.acquire()
+        try:
+            counts = shard.counts
+            counts[key] = counts.get(key, 0) + amount
+            if metric in QUOTA_METRICS:
+                today = shard.today
+                today_key = (key_id, metric)
+                today[today_key] = today.get(today_key, 0) + amount
+        finally:
+            lock.release()
+
+    def used_today(self, key_id: str, metric: str) -> int:
+        """Amount of a quota metric a key used today, as far as this worker knows"""
+        today_key = (key_id, metric)
+        used = self._persisted_today.get(today_key, 0)
+        # Shards are only ever appended, so iterating the live list is safe
+        for shard in self._shards:
+            used += shard.today.get(today_key, 0)
+        return used
+
+    def check(self, principal: APIKeyPrincipal, metric: str, amount: int = 1) -> None:
+        """Raise RateLimitError if using ``amount`` more would exceed the key's daily quota"""
+        if not settings.USAGE_QUOTAS_ENABLED:
+            return
+        quota = TIER_QUOTAS.get(principal.tier, TIER_QUOTAS["free"]).get(metric)
+        if quota is None:
+            return
+        used = self.used_today(principal.key_id, metric)
+        if used + amount > quota:
+            usage_quota_rejections_total.labels(metric).inc()
+            raise RateLimitError(
+                f"Daily {metric.replace('_', ' ')} quota of {quota} for the {principal.tier} tier "
+                f"exceeded ({used} used)",
+                retry_after=max(1, math.ceil(self._seconds_to_midnight()))
+            )
+
+    def _seconds_to_midnight(self) -> float:
+        now = time.time()
+        midnight = datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (midnight + timedelta(days=1)).timestamp() - now
+
+    async def flush(self) -> None:
+        """Add usage counted since the last flush to the database and refresh today's totals"""
+        day = self._day
+        pending, self._unwritten = self._unwritten, {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            shard.lock.acquire()
+            try:
+                counts, shard.counts = shard.counts, {}
+            finally:
+                shard.lock.release()
+            for (key_id, route, metric), amount in counts.items():
+                key = (day, key_id, route, metric)
+                pending[key] = pending.get(key, 0) + amount
+
+        # Counts swapped out after midnight are booked on the previous day,
+        # which they were (nearly all) recorded on
+        current_day = _utc_day(time.time())
+        if current_day != day:
+            self._day = current_day
+            self._persisted_today = {}
+            for shard in shards:
+                shard.lock.acquire()
+                try:
+                    shard.today = {}
+                finally:
+                    shard.lock.release()
+
+        if pending:
+            try:
+                await self._write(pending)
+            except (SQLAlchemyError, OSError) as e:
+                # Keep the deltas for the next attempt
+                logger.warning(f"Could not persist API usage: {e}")
+                for key, amount in pending.items():
+                    self._unwritten[key] = self._unwritten.get(key, 0) + amount
+                return
+        try:
+            await self._refresh_today()
+        except (SQLAlchemyError, OSError) as e:
+            # The deltas are written; quotas use the previous totals until the next flush
+            logger.warning(f"Could not refresh today's API usage: {e}")
+
+    async def _write(self, pending: Dict[UsageKey, int]) -> None:
+        table = APIUsage.__table__
+        columns = (table.c.day, table.c.key_id, table.c.route, table.c.metric)
+        add = (
+            update(table)
+            .where(table.c.day == bindparam("_day"), table.c.key_id == bindparam("_key_id"),
+                   table.c.route == bindparam("_route"), table.c.metric == bindparam("_metric"))
+            .values(amount=table.c.amount + bindparam("_amount"))
+        )
+        for attempt in range(2):
+            async with AsyncSessionLocal() as db:
+                existing = set((await db.execute(
+                    select(*columns).where(tuple_(*columns).in_(list(pending)))
+                )).all())
+                updates = [
+                    {"_day": day, "_key_id": key_id, "_route": route, "_metric": metric, "_amount": amount}
+                    for (day, key_id, route, metric), amount in pending.items()
+                    if (day, key_id, route, metric) in existing
+                ]
+                inserts = [
+                    {"day": day, "key_id": key_id, "route": route, "metric": metric, "amount": amount}
+                    for (day, key_id, route, metric), amount in pending.items()
+                    if (day, key_id, route, metric) not in existing
+                ]
+                try:
+                    if updates:
+                        await db.execute(add, updates)
+                    if inserts:
+                        await db.execute(insert(table), inserts)
+                    await db.commit()
+                    return
+                except IntegrityError:
+                    # Another worker created one of the rows first; it is an update now
+                    await db.rollback()
+                    if attempt:
+                        raise
+
+    async def _refresh_today(self) -> None:
+        day = self._day
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(APIUsage.key_id, APIUsage.metric, func.sum(APIUsage.amount))
+                .where(APIUsage.day == day, APIUsage.metric.in_(QUOTA_METRICS))
+                .group_by(APIUsage.key_id, APIUsage.metric)
+            )).all()
+        if day != self._day:
+            return
+        self._persisted_today = {(key_id, metric): int(total) for key_id, metric, total in rows}
+        # What is still in the shards was counted after the swap and is not in the table yet
+        for shard in list(self._shards):
+            shard.lock.acquire()
+            try:
+                today: Dict[Tuple[str, str], int] = {}
+                for (key_id, _, metric), amount in shard.counts.items():
+                    if metric in QUOTA_METRICS:
+                        today[(key_id, metric)] = today.get((key_id, metric), 0) + amount
+                shard.today = today
+            finally:
+                shard.lock.release()
+
+    async def flush_periodically(self, interval: float) -> None:
+        """Persist usage every ``interval`` seconds, and just after each UTC midnight"""
+        while True:
+            await asyncio.sleep(min(interval, self._seconds_to_midnight() + 0.01))
+            await self.flush()
+
+    async def summary(self, key_id: Optional[str] = None, days: int = 7, tier: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Usage over the last ``days`` UTC days, per day and metric
+
+        With ``key_id``, per route as well, plus today's usage against the
+        quotas of ``tier``; without, totals per key.
+        """
+        await self.flush()
+        first_day = _utc_day(time.time() - (days - 1) * 86400)
+        if key_id:
+            group = (APIUsage.day, APIUsage.route, APIUsage.metric)
+        else:
+            group = (APIUsage.day, APIUsage.key_id, APIUsage.metric)
+        statement = select(*group, func.sum(APIUsage.amount)).where(APIUsage.day >= first_day)
+        if key_id:
+            statement = statement.where(APIUsage.key_id == key_id)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(statement.group_by(*group).order_by(*group))).all()
+
+        label = "route" if key_id else "key_id"
+        usage = [
+            {"day": day, label: name, "metric": metric, "amount": int(amount)}
+            for day, name, metric, amount in rows
+        ]
+        summary: Dict[str, Any] = {"from": first_day, "to": self._day, "usage": usage}
+        if key_id:
+            tier = tier or settings.API_KEY_DEFAULT_TIER
+            quotas = TIER_QUOTAS.get(tier, TIER_QUOTAS["free"])
+            today = {}
+            for metric in (REQUESTS, PREDICTIONS, SIMULATION_FRAMES, ROWS):
+                used = sum(row["amount"] for row in usage if row["day"] == self._day and row["metric"] == metric)
+                quota = quotas.get(metric)
+                today[metric] = {
+                    "used": used,
+                    "quota": quota,
+                    "remaining": max(quota - used, 0) if quota is not None else None
+                }
+            summary.update(key_id=key_id, tier=tier, today=today)
+        return summary
+
+
+class Meter:
+    """Usage of one metric by the current request's API key"""
+
+    __slots__ = ("principal", "route", "metric", "used")
+
+    def __init__(self, principal: Optional[APIKeyPrincipal], route: str, metric: str):
+        self.principal = principal
+        self.route = route
+        self.metric = metric
+        self.used = 0  # counted for anonymous requests too, for responses cached with it
+
+    def check(self, amount: int = 1) -> None:
+        """Reject the request if ``amount`` more would exceed the daily quota"""
+        if self.principal is not None:
+            usage_meter.check(self.principal, self.metric, amount)
+
+    def add(self, amount: int = 1) -> None:
+        """Count ``amount`` used"""
+        self.used += amount
+        if self.principal is not None and amount:
+            usage_meter.record(self.principal.key_id, self.route, self.metric, amount)
+
+
+def metered(metric: str):
+    """
+    Dependency giving the endpoint a ``Meter`` for ``metric``; anonymous requests are not metered
+
+    The meter is also kept as ``request.state.meter``, so the response cache
+    can store the amount with a cached response (see ``cached(metric=...)``).
+    """
+    def dependency(request: Request) -> Meter:
+        principal = getattr(request.state, "api_key", None) if settings.METERING_ENABLED else None
+        meter = request.state.meter = Meter(principal, route_template(request.scope), metric)
+        return meter
+    return dependency
+
+
+# Global usage meter
+usage_meter = UsageMeter()
@@ -11,8 +11,10 @@ import uuid
 import random
 import math
 
+from app.core.compute import compute_pool
 from app.core.config import settings
 from app.core.exceptions import ModelError, ValidationError
+from app.core.response_cache import response_cache, MODEL_METRICS
 from app.schemas.exoplanet import PredictionInput, PredictionResult, Classification
 
 logger = logging.getLogger(__name__)
@@ -64,6 +66,12 @@ class ExoplanetMLModel:
         
         logger.info(f"Mock model trained successfully. Accuracy: {metrics['accuracy']:.3f}")
         return metrics
+
+    async def retrain(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Train on the compute pool, then drop cached performance responses in every worker"""
+        metrics = await compute_pool.run(self.train, data)
+        await response_cache.purge(MODEL_METRICS)
+        return metrics
     
     def predict(self, input_data: PredictionInput) -> PredictionResult:
         """Make a mock prediction"""
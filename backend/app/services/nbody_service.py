@@ -0,0 +1,227 @@
+"""
+N-body Service - Symplectic integration of the solar system
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.compute import check_deadline
+from app.schemas.solar_system import Planet
+
+
+# Gravitational constants (km and days)
+SECONDS_PER_DAY = 86400.0
+GM_SUN_KM3_S2 = 1.327e11  # Same GM_sun as the vis-viva calculation, in km³/s²
+G_KM3_KG_S2 = 6.674e-20
+J2000 = 2451545.0
+
+# Leapfrog steps per orbit of the innermost body when stepping adaptively
+STEPS_PER_ORBIT = 200
+
+
+def gravitational_parameters(planets: List[Planet]) -> np.ndarray:
+    """Return GM for the Sun followed by each planet, in km³/day²"""
+    gm = [GM_SUN_KM3_S2] + [G_KM3_KG_S2 * planet.mass_kg for planet in planets]
+    return np.asarray(gm, dtype=np.float64) * SECONDS_PER_DAY ** 2
+
+
+def kepler_state(
+    semi_major_axis_km: np.ndarray,
+    eccentricity: np.ndarray,
+    period_days: np.ndarray,
+    inclination_rad: np.ndarray,
+    julian_date: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized two-body position (km) and velocity (km/day) vectors
+
+    Uses the same orbital element conventions as the Kepler engine (periapsis
+    on the x axis, ascending node at 0°, periapsis passage at J2000) but
+    solves Kepler's equation fully so velocities match the positions.
+    """
+    a = np.asarray(semi_major_axis_km, dtype=np.float64)
+    e = np.asarray(eccentricity, dtype=np.float64)
+    period = np.asarray(period_days, dtype=np.float64)
+    inclination = np.asarray(inclination_rad, dtype=np.float64)
+
+    mean_anomaly = 2 * np.pi / period * (julian_date - J2000)
+    eccentric_anomaly = mean_anomaly + e * np.sin(mean_anomaly)
+    for _ in range(8):
+        eccentric_anomaly -= (
+            (eccentric_anomaly - e * np.sin(eccentric_anomaly) - mean_anomaly)
+            / (1 - e * np.cos(eccentric_anomaly))
+        )
+
+    cos_e = np.cos(eccentric_anomaly)
+    sin_e = np.sin(eccentric_anomaly)
+    root = np.sqrt(1 - e ** 2)
+
+    x_orbital = a * (cos_e - e)
+    y_orbital = a * root * sin_e
+
+    mean_motion = 2 * np.pi / period
+    e_dot = mean_motion / (1 - e * cos_e)
+    vx_orbital = -a * sin_e * e_dot
+    vy_orbital = a * root * cos_e * e_dot
+
+    cos_i = np.cos(inclination)
+    sin_i = np.sin(inclination)
+
+    positions = np.stack([x_orbital, y_orbital * cos_i, y_orbital * sin_i], axis=-1)
+    velocities = np.stack([vx_orbital, vy_orbital * cos_i, vy_orbital * sin_i], axis=-1)
+    return positions, velocities
+
+
+def heliocentric_state(planets: List[Planet], julian_date: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute heliocentric position (km) and velocity (km/day) vectors for all planets"""
+    return kepler_state(
+        np.array([p.semi_major_axis_km for p in planets]),
+        np.array([p.eccentricity for p in planets]),
+        np.array([p.orbital_period_days for p in planets]),
+        np.radians([p.inclination_deg for p in planets]),
+        julian_date
+    )
+
+
+def orbit_paths(
+    semi_major_axis_km: np.ndarray,
+    eccentricity: np.ndarray,
+    inclination_rad: np.ndarray,
+    resolution: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized elliptical orbit outlines
+
+    Returns the sampled angles in degrees, shape (resolution,), and the
+    points of every orbit, shape (n_orbits, resolution, 3), in km.
+    """
+    a = np.asarray(semi_major_axis_km, dtype=np.float64)[:, np.newaxis]
+    e = np.asarray(eccentricity, dtype=np.float64)[:, np.newaxis]
+    inclination = np.asarray(inclination_rad, dtype=np.float64)[:, np.newaxis]
+
+    angles_deg = np.arange(resolution) * (360.0 / resolution)
+    angles = np.radians(angles_deg)[np.newaxis, :]
+
+    x = a * (np.cos(angles) - e)
+    y_orbital = a * np.sqrt(1 - e ** 2) * np.sin(angles)
+    points = np.stack([x, y_orbital * np.cos(inclination), y_orbital * np.sin(inclination)], axis=-1)
+    return angles_deg, points
+
+
+def _accelerations(positions: np.ndarray, gm: np.ndarray) -> np.ndarray:
+    """Pairwise Newtonian accelerations for all bodies"""
+    diff = positions[np.newaxis, :, :] - positions[:, np.newaxis, :]
+    dist2 = np.einsum("ijk,ijk->ij", diff, diff)
+    np.fill_diagonal(dist2, np.inf)
+    weights = gm[np.newaxis, :] * dist2 ** -1.5
+    return np.einsum("ij,ijk->ik", weights, diff)
+
+
+def integrate_leapfrog(
+    positions: np.ndarray,
+    velocities: np.ndarray,
+    gm: np.ndarray,
+    step_days: float,
+    substeps: int,
+    n_frames: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integrate an N-body system with the kick-drift-kick leapfrog scheme
+
+    Args:
+        positions: Initial positions of all bodies, shape (N, 3), in km
+        velocities: Initial velocities of all bodies, shape (N, 3), in km/day
+        gm: Gravitational parameters of all bodies, shape (N,), in km³/day²
+        step_days: Time between output frames
+        substeps: Number of integrator steps per output frame
+        n_frames: Number of output frames (the first is the initial state)
+
+    Returns:
+        Position and velocity histories, each of shape (n_frames, N, 3)
+
+    Raises ComputeTimeoutError between frames once a compute pool call's
+    deadline has passed.
+    """
+    pos = np.array(positions, dtype=np.float64)
+    vel = np.array(velocities, dtype=np.float64)
+    h = step_days / substeps
+    half_h = 0.5 * h
+
+    pos_history = np.empty((n_frames,) + pos.shape)
+    vel_history = np.empty((n_frames,) + vel.shape)
+    pos_history[0] = pos
+    vel_history[0] = vel
+
+    acc = _accelerations(pos, gm)
+    for frame in range(1, n_frames):
+        check_deadline()
+        for _ in range(substeps):
+            vel += half_h * acc
+            pos += h * vel
+            acc = _accelerations(pos, gm)
+            vel += half_h * acc
+        pos_history[frame] = pos
+        vel_history[frame] = vel
+
+    return pos_history, vel_history
+
+
+def plan_steps(
+    planets: List[Planet],
+    time_step_days: float,
+    max_step_days: Optional[float] = None
+) -> int:
+    """
+    Number of leapfrog substeps per output frame
+
+    With ``max_step_days`` the internal step is fixed to at most that length;
+    otherwise it adapts to resolve the shortest orbit in the system.
+    """
+    if max_step_days is None:
+        shortest_period = min(planet.orbital_period_days for planet in planets)
+        max_step_days = shortest_period / STEPS_PER_ORBIT
+    return max(1, math.ceil(time_step_days / max_step_days - 1e-9))
+
+
+def simulate_system(
+    planets: List[Planet],
+    start_date: float,
+    time_step_days: float,
+    n_frames: int,
+    max_step_days: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run a full N-body simulation of the Sun and planets
+
+    The integration is carried out in the barycentric frame; the returned
+    histories are heliocentric and cover the planets only, with shape
+    (n_frames, len(planets), 3) in km and km/day.
+    """
+    gm = gravitational_parameters(planets)
+    planet_pos, planet_vel = heliocentric_state(planets, start_date)
+
+    positions = np.vstack([np.zeros(3), planet_pos])
+    velocities = np.vstack([np.zeros(3), planet_vel])
+
+    # Shift into the barycentric frame so the system has no net drift
+    total_gm = gm.sum()
+    positions -= (gm[:, np.newaxis] * positions).sum(axis=0) / total_gm
+    velocities -= (gm[:, np.newaxis] * velocities).sum(axis=0) / total_gm
+
+    substeps = plan_steps(planets, time_step_days, max_step_days)
+    pos_history, vel_history = integrate_leapfrog(
+        positions, velocities, gm, time_step_days, substeps, n_frames
+    )
+
+    helio_pos = pos_history[:, 1:, :] - pos_history[:, :1, :]
+    helio_vel = vel_history[:, 1:, :] - vel_history[:, :1, :]
+    return helio_pos, helio_vel
+
+
+def run_simulation_job(job: Tuple[List[dict], float, float, int, Optional[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Process-pool entry point for a single independent simulation run"""
+    planet_data, start_date, time_step_days, n_frames, max_step_days = job
+    planets = [Planet(**data) for data in planet_data]
+    return simulate_system(planets, start_date, time_step_days, n_frames, max_step_days)
@@ -0,0 +1,457 @@
+"""
+Prediction Stats Service - Incrementally maintained prediction counters and quantile sketches
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import math
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select, func, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.core.database import AsyncSessionLocal
+from app.core.tdigest import TDigest
+from app.models.exoplanet import Prediction, PredictionStats, PredictionSketch
+from app.schemas.exoplanet import PredictionResult, SketchMetric, QuantileSummary
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency buckets: 8 per decade from 10 µs to 100 s,
+# so percentiles are accurate to about ±15%
+LATENCY_BOUNDS = tuple(1e-5 * 10 ** (i / 8) for i in range(57))
+
+# (UTC day, classification, model version)
+StatsKey = Tuple[str, str, str]
+
+# Quantile sketches cover one UTC hour each and are merged to answer a window
+SKETCH_COMPRESSION = 200
+
+# (window start as naive UTC, metric, classification or model version)
+SketchKey = Tuple[datetime, str, str]
+
+
+@dataclass
+class Counters:
+    """Running sums for one group of predictions"""
+    count: int = 0
+    processing_time_sum: float = 0.0
+    confidence_sum: float = 0.0
+    latency_buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BOUNDS) + 1))
+
+    def add(self, processing_time: float, confidence: float) -> None:
+        self.count += 1
+        self.processing_time_sum += processing_time
+        self.confidence_sum += confidence
+        self.latency_buckets[bisect.bisect_left(LATENCY_BOUNDS, processing_time)] += 1
+
+    def merge(self, other: "Counters") -> None:
+        self.count += other.count
+        self.processing_time_sum += other.processing_time_sum
+        self.confidence_sum += other.confidence_sum
+        for i, n in enumerate(other.latency_buckets):
+            self.latency_buckets[i] += n
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Estimate a latency quantile from the bucket counts"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.latency_buckets):
+            if n and seen + n >= rank:
+                lower = LATENCY_BOUNDS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BOUNDS[i] if i < len(LATENCY_BOUNDS) else LATENCY_BOUNDS[-1]
+                if lower == 0.0:
+                    return upper
+                # Interpolate geometrically inside the bucket
+                fraction = (rank - seen) / n
+                return lower * math.exp(fraction * math.log(upper / lower))
+            seen += n
+        return LATENCY_BOUNDS[-1]
+
+
+def _utc_day(moment: Optional[datetime] = None) -> str:
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+    elif moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d")
+
+
+def _window_start(moment: Optional[datetime] = None) -> datetime:
+    """Naive UTC start of the sketch window containing ``moment``"""
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _decode_buckets(value: Optional[str]) -> List[int]:
+    buckets = [0] * (len(LATENCY_BOUNDS) + 1)
+    if value:
+        try:
+            for i, n in enumerate(json.loads(value)[:len(buckets)]):
+                buckets[i] = int(n)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed latency histogram in prediction_stats")
+    return buckets
+
+
+class PredictionStatsService:
+    """
+    Prediction statistics kept up to date on every prediction write
+
+    Counters live in memory, grouped per UTC day, class and model version,
+    with running totals so summaries never touch the ``predictions`` table.
+    Changes since the last flush are added to the ``prediction_stats``
+    table periodically. Only deltas are written, the sums as atomic
+    increments and the latency histogram under a row lock, so several
+    workers can persist into the same table. After each flush the totals are
+    reloaded from that table, so every worker reports the same figures,
+    lagging other workers by at most one flush interval.
+
+    Confidence per class and processing time per model version also go
+    into hourly t-digests, merged into ``prediction_sketches`` on flush
+    under the same row lock, so percentiles over any window are answered
+    by merging a few sketches.
+    """
+
+    def __init__(self):
+        self._days: Dict[StatsKey, Counters] = {}
+        self._pending: Dict[StatsKey, Counters] = {}
+        self._total = Counters()
+        self._by_class: Dict[str, Counters] = {}
+        self._by_version: Dict[str, Counters] = {}
+        self._pending_sketches: Dict[SketchKey, TDigest] = {}
+        self._lock = threading.Lock()
+
+    def _apply(self, key: StatsKey, counters: Counters) -> None:
+        """Fold counters into the in-memory aggregates; caller holds the lock"""
+        _, classification, model_version = key
+        self._days.setdefault(key, Counters()).merge(counters)
+        self._total.merge(counters)
+        self._by_class.setdefault(classification, Counters()).merge(counters)
+        self._by_version.setdefault(model_version, Counters()).merge(counters)
+
+    def record(self, result: PredictionResult, created_at: Optional[datetime] = None) -> None:
+        """Count a stored prediction"""
+        key = (_utc_day(created_at), result.classification.value, result.model_version)
+        counters = Counters()
+        counters.add(result.processing_time, result.confidence)
+        window = _window_start(created_at)
+        with self._lock:
+            self._apply(key, counters)
+            self._pending.setdefault(key, Counters()).merge(counters)
+            self._sketch(window, SketchMetric.CONFIDENCE, key[1]).add(result.confidence)
+            self._sketch(window, SketchMetric.PROCESSING_TIME, key[2]).add(result.processing_time)
+
+    def _sketch(self, window: datetime, metric: SketchMetric, dimension: str) -> TDigest:
+        """Pending sketch for a window; caller holds the lock"""
+        key = (window, metric.value, dimension)
+        digest = self._pending_sketches.get(key)
+        if digest is None:
+            digest = self._pending_sketches[key] = TDigest(SKETCH_COMPRESSION)
+        return digest
+
+    async def load(self) -> None:
+        """
+        Load persisted counters
+
+        If nothing was persisted yet but predictions exist, the counters and
+        sketches are rebuilt from the ``predictions`` table once.
+        """
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(select(PredictionStats))).scalars().all()
+            has_sketches = (await db.execute(select(PredictionSketch.id).limit(1))).first() is not None
+            if (not rows or not has_sketches) and await self._backfill(
+                db, counters=not rows, sketches=not has_sketches
+            ):
+                rows = (await db.execute(select(PredictionStats))).scalars().all()
+
+        loaded = self._replace(rows)
+        logger.info(f"Loaded prediction statistics for {loaded} groups")
+
+    def _replace(self, rows: Sequence[PredictionStats]) -> int:
+        """Rebuild the aggregates from persisted rows plus what is not flushed yet"""
+        loaded: Dict[StatsKey, Counters] = {}
+        for row in rows:
+            loaded[(row.day, row.classification, row.model_version)] = Counters(
+                count=row.count,
+                processing_time_sum=row.processing_time_sum,
+                confidence_sum=row.confidence_sum,
+                latency_buckets=_decode_buckets(row.latency_histogram)
+            )
+        with self._lock:
+            self._reset()
+            for key, counters in loaded.items():
+                self._apply(key, counters)
+            for key, counters in self._pending.items():
+                self._apply(key, counters)
+        return len(loaded)
+
+    async def _refresh(self) -> None:
+        """Pick up what other workers persisted, so every worker reports the same totals"""
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(select(PredictionStats))).scalars().all()
+        except (SQLAlchemyError, OSError) as e:
+            # The in-memory totals stay as they are until the next flush
+            logger.warning(f"Could not reload prediction statistics: {e}")
+            return
+        self._replace(rows)
+
+    async def _backfill(self, db, counters: bool, sketches: bool) -> bool:
+        """Persist counters and/or sketches rebuilt from stored predictions; False if there are none"""
+        count = (await db.execute(select(func.count(Prediction.id)))).scalar_one()
+        if not count:
+            return False
+        logger.info(f"Rebuilding prediction statistics from {count} stored predictions")
+        result = await db.stream(select(
+            Prediction.created_at, Prediction.classification, Prediction.model_version,
+            Prediction.processing_time, Prediction.confidence
+        ))
+        rebuilt: Dict[StatsKey, Counters] = {}
+        digests: Dict[SketchKey, TDigest] = {}
+        async for created_at, classification, model_version, processing_time, confidence in result:
+            model_version = model_version or "unknown"
+            processing_time = processing_time or 0.0
+            if counters:
+                key = (_utc_day(created_at), classification, model_version)
+                rebuilt.setdefault(key, Counters()).add(processing_time, confidence)
+            if sketches:
+                window = _window_start(created_at)
+                for sketch_key, value in (
+                    ((window, SketchMetric.CONFIDENCE.value, classification), confidence),
+                    ((window, SketchMetric.PROCESSING_TIME.value, model_version), processing_time)
+                ):
+                    digests.setdefault(sketch_key, TDigest(SKETCH_COMPRESSION)).add(value)
+
+        for (day, classification, model_version), totals in rebuilt.items():
+            db.add(PredictionStats(
+                day=day,
+                classification=classification,
+                model_version=model_version,
+                count=totals.count,
+                processing_time_sum=totals.processing_time_sum,
+                confidence_sum=totals.confidence_sum,
+                latency_histogram=json.dumps(totals.latency_buckets)
+            ))
+        for (window, metric, dimension), digest in digests.items():
+            db.add(PredictionSketch(
+                window_start=window,
+                metric=metric,
+                dimension=dimension,
+                count=int(digest.count),
+                digest=digest.to_json()
+            ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker rebuilt them first
+            await db.rollback()
+        return True
+
+    def _reset(self) -> None:
+        self._days.clear()
+        self._total = Counters()
+        self._by_class.clear()
+        self._by_version.clear()
+
+    async def flush(self) -> None:
+        """
+        Add counters and sketches recorded since the last flush to the
+        database, then reload the totals so they include other workers'
+        """
+        if await self._write():
+            await self._refresh()
+
+    async def _write(self) -> bool:
+        """Persist pending deltas; False if they could not be written and were kept"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            pending_sketches, self._pending_sketches = self._pending_sketches, {}
+        if not pending and not pending_sketches:
+            return True
+
+        try:
+            for attempt in range(2):
+                async with AsyncSessionLocal() as db:
+                    try:
+                        await self._write_counters(db, pending)
+                        await self._write_sketches(db, pending_sketches)
+                        await db.commit()
+                        break
+                    except IntegrityError:
+                        # Another worker created one of the rows first; it is an update now
+                        await db.rollback()
+                        if attempt:
+                            raise
+        except (SQLAlchemyError, OSError) as e:
+            # Keep the deltas for the next attempt
+            logger.warning(f"Could not persist prediction statistics: {e}")
+            with self._lock:
+                for key, delta in pending.items():
+                    self._pending.setdefault(key, Counters()).merge(delta)
+                for key, delta_digest in pending_sketches.items():
+                    self._sketch(key[0], SketchMetric(key[1]), key[2]).merge(delta_digest)
+            return False
+        return True
+
+    @staticmethod
+    async def _write_counters(db, pending: Dict[StatsKey, Counters]) -> None:
+        """Add counter deltas to their rows, creating missing ones"""
+        table = PredictionStats.__table__
+        for (day, classification, model_version), delta in pending.items():
+            key = (
+                (table.c.day == day)
+                & (table.c.classification == classification)
+                & (table.c.model_version == model_version)
+            )
+            # The increment comes first: it locks the row (the whole database
+            # on SQLite) until commit, so the histogram read below sees every
+            # other flush and none can slip in before the write
+            added = await db.execute(update(table).where(key).values(
+                count=table.c.count + delta.count,
+                processing_time_sum=table.c.processing_time_sum + delta.processing_time_sum,
+                confidence_sum=table.c.confidence_sum + delta.confidence_sum
+            ))
+            if not added.rowcount:
+                await db.execute(insert(table).values(
+                    day=day,
+                    classification=classification,
+                    model_version=model_version,
+                    count=delta.count,
+                    processing_time_sum=delta.processing_time_sum,
+                    confidence_sum=delta.confidence_sum,
+                    latency_histogram=json.dumps(delta.latency_buckets)
+                ))
+                continue
+            row = (await db.execute(
+                select(table.c.id, table.c.latency_histogram).where(key).with_for_update()
+            )).one()
+            buckets = _decode_buckets(row.latency_histogram)
+            for i, n in enumerate(delta.latency_buckets):
+                buckets[i] += n
+            await db.execute(
+                update(table).where(table.c.id == row.id).values(latency_histogram=json.dumps(buckets))
+            )
+
+    @staticmethod
+    async def _write_sketches(db, pending_sketches: Dict[SketchKey, TDigest]) -> None:
+        """Merge sketch deltas into their rows, creating missing ones"""
+        table = PredictionSketch.__table__
+        for (window, metric, dimension), delta_digest in pending_sketches.items():
+            key = (table.c.window_start == window) & (table.c.metric == metric) & (table.c.dimension == dimension)
+            # Lock the row before reading the digest, as for the counters
+            added = await db.execute(
+                update(table).where(key).values(count=table.c.count + int(delta_digest.count))
+            )
+            if not added.rowcount:
+                await db.execute(insert(table).values(
+                    window_start=window,
+                    metric=metric,
+                    dimension=dimension,
+                    count=int(delta_digest.count),
+                    digest=delta_digest.to_json()
+                ))
+                continue
+            row = (await db.execute(select(table.c.id, table.c.digest).where(key).with_for_update())).one()
+            digest = TDigest.from_json(row.digest)
+            digest.merge(delta_digest)
+            await db.execute(update(table).where(table.c.id == row.id).values(
+                count=int(digest.count), digest=digest.to_json()
+            ))
+
+    async def flush_periodically(self, interval: float) -> None:
+        """Persist counters every ``interval`` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals, today's count and latency percentiles"""
+        today = _utc_day()
+        with self._lock:
+            today_count = sum(
+                self._days[key].count
+                for key in [(today, c, v) for c in self._by_class for v in self._by_version]
+                if key in self._days
+            )
+            total = self._total
+            return {
+                "total_predictions": total.count,
+                "predictions_today": today_count,
+                "avg_processing_time": total.processing_time_sum / total.count if total.count else 0.0,
+                "avg_confidence": total.confidence_sum / total.count if total.count else 0.0,
+                "processing_time_percentiles": {
+                    "p50": total.latency_percentile(0.50),
+                    "p95": total.latency_percentile(0.95),
+                    "p99": total.latency_percentile(0.99)
+                },
+                "by_classification": {
+                    classification: counters.count
+                    for classification, counters in self._by_class.items()
+                },
+                "by_model_version": {
+                    version: {
+                        "count": counters.count,
+                        "avg_processing_time": counters.processing_time_sum / counters.count,
+                        "p95_processing_time": counters.latency_percentile(0.95)
+                    }
+                    for version, counters in self._by_version.items() if counters.count
+                }
+            }
+
+    async def quantiles(
+        self,
+        metric: SketchMetric,
+        start: datetime,
+        end: datetime,
+        quantiles: Sequence[float] = (0.5, 0.95, 0.99)
+    ) -> List[QuantileSummary]:
+        """
+        Quantiles of a metric over the hourly windows overlapping ``start..end``
+
+        Persisted sketches are merged with this worker's unflushed ones.
+        """
+        first_window = _window_start(start)
+        last_window = _window_start(end)
+
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(PredictionSketch.dimension, PredictionSketch.digest).where(
+                    PredictionSketch.metric == metric.value,
+                    PredictionSketch.window_start >= first_window,
+                    PredictionSketch.window_start <= last_window
+                )
+            )).all()
+
+        merged: Dict[str, TDigest] = {}
+        for dimension, serialized in rows:
+            merged.setdefault(dimension, TDigest(SKETCH_COMPRESSION)).merge(TDigest.from_json(serialized))
+        with self._lock:
+            for (window, sketch_metric, dimension), digest in self._pending_sketches.items():
+                if sketch_metric == metric.value and first_window <= window <= last_window:
+                    merged.setdefault(dimension, TDigest(SKETCH_COMPRESSION)).merge(digest)
+
+        return [
+            QuantileSummary(
+                dimension=dimension,
+                count=int(digest.count),
+                min=digest.min if digest.count else None,
+                max=digest.max if digest.count else None,
+                quantiles={f"p{q * 100:g}": digest.quantile(q) for q in quantiles}
+            )
+            for dimension, digest in sorted(merged.items())
+        ]
+
+
+# Global service instance
+prediction_stats_service = PredictionStatsService()
@@ -0,0 +1,242 @@
+"""
+Simulation Cache - Memoized simulation time series with disk spill
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+
+from app.core.config import settings
+from app.core.metrics import cache_requests_total
+from app.core.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+# Only needed to compute, not to start the app
+np = lazy_import("numpy")
+
+_cache_hit = cache_requests_total.labels("simulation", "hit")
+_cache_miss = cache_requests_total.labels("simulation", "miss")
+
+# Per-frame, per-planet columns stored in a series: x, y, z, distance, speed
+SERIES_COLUMNS = 5
+
+
+def frame_indices(start_date: float, end_date: float, time_step_days: float) -> Tuple[int, int]:
+    """
+    Quantize a Julian date range onto the global grid of the time step
+
+    Frame ``i`` of every simulation with the same step sits at Julian date
+    ``i * time_step_days``, so ranges that overlap share frames exactly.
+    """
+    start_index = int(round(start_date / time_step_days))
+    end_index = int(math.floor(end_date / time_step_days + 1e-9))
+    return start_index, max(start_index, end_index)
+
+
+def series_key(
+    mode: str,
+    time_step_days: float,
+    planet_ids: Sequence[str],
+    max_step_days: Optional[float],
+    dataset_hash: str
+) -> str:
+    """Normalized cache key for everything but the date range"""
+    parts = [
+        mode,
+        repr(float(time_step_days)),
+        ",".join(sorted(planet_ids)),
+        repr(max_step_days),
+        dataset_hash
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+@dataclass
+class _Entry:
+    key: str
+    start_index: int
+    data: np.ndarray  # (frames, planets, SERIES_COLUMNS), in memory or memory-mapped
+    nbytes: int
+    path: Optional[Path] = None
+
+    @property
+    def end_index(self) -> int:
+        return self.start_index + self.data.shape[0] - 1
+
+
+class SimulationCache:
+    """
+    LRU cache of simulation time series
+
+    Series up to ``spill_threshold`` bytes are kept in memory, bounded by
+    ``max_memory_bytes``. Larger ones are written to ``.npy`` files and
+    served memory-mapped, bounded by ``max_disk_bytes``. A request whose
+    frame range lies inside a cached series is answered by slicing it.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int,
+        spill_threshold: int,
+        max_disk_bytes: int,
+        spill_dir: Optional[str] = None
+    ):
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_threshold = spill_threshold
+        self.max_disk_bytes = max_disk_bytes
+        self._spill_dir_setting = spill_dir
+        self._spill_dir: Optional[Path] = None
+
+        self._memory: "OrderedDict[Tuple[str, int, int], _Entry]" = OrderedDict()
+        self._disk: "OrderedDict[Tuple[str, int, int], _Entry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _get_spill_dir(self) -> Path:
+        if self._spill_dir is None:
+            if self._spill_dir_setting:
+                self._spill_dir = Path(self._spill_dir_setting)
+                self._spill_dir.mkdir(parents=True, exist_ok=True)
+            else:
+                self._spill_dir = Path(tempfile.mkdtemp(prefix="exoplanet-sim-"))
+        return self._spill_dir
+
+    def lookup(
+        self,
+        key: str,
+        start_index: int,
+        end_index: int,
+        exact_start: bool = False
+    ) -> Optional[np.ndarray]:
+        """
+        Find cached frames ``start_index..end_index`` for a series key
+
+        With ``exact_start`` only series beginning at ``start_index`` are
+        used, for simulations whose frames depend on their initial state.
+        """
+        with self._lock:
+            for store in (self._memory, self._disk):
+                for cache_key, entry in store.items():
+                    if entry.key != key:
+                        continue
+                    if exact_start and entry.start_index != start_index:
+                        continue
+                    if entry.start_index <= start_index and end_index <= entry.end_index:
+                        store.move_to_end(cache_key)
+                        self._hits += 1
+                        _cache_hit.inc()
+                        offset = start_index - entry.start_index
+                        return entry.data[offset:offset + end_index - start_index + 1]
+            self._misses += 1
+            _cache_miss.inc()
+            return None
+
+    def store(self, key: str, start_index: int, data: np.ndarray) -> None:
+        """Remember a computed series, spilling it to disk if it is large"""
+        cache_key = (key, start_index, start_index + data.shape[0] - 1)
+        nbytes = data.nbytes
+
+        if nbytes > self.spill_threshold:
+            if nbytes > self.max_disk_bytes:
+                return
+            try:
+                entry = self._spill(key, start_index, data)
+            except OSError as e:
+                logger.warning(f"Could not spill simulation result to disk: {e}")
+                return
+            with self._lock:
+                previous = self._disk.pop(cache_key, None)
+                if previous is not None and previous.path == entry.path:
+                    # The spill above has already replaced its file; unlinking
+                    # it would delete the new result
+                    self._disk_bytes -= previous.nbytes
+                else:
+                    self._discard(previous)
+                self._disk[cache_key] = entry
+                self._disk_bytes += nbytes
+                while self._disk_bytes > self.max_disk_bytes and self._disk:
+                    self._discard(self._disk.popitem(last=False)[1])
+            return
+
+        if nbytes > self.max_memory_bytes:
+            return
+        entry = _Entry(key=key, start_index=start_index, data=data, nbytes=nbytes)
+        with self._lock:
+            self._discard(self._memory.pop(cache_key, None))
+            self._memory[cache_key] = entry
+            self._memory_bytes += nbytes
+            while self._memory_bytes > self.max_memory_bytes and self._memory:
+                self._discard(self._memory.popitem(last=False)[1])
+
+    def _spill(self, key: str, start_index: int, data: np.ndarray) -> _Entry:
+        spill_dir = self._get_spill_dir()
+        path = spill_dir / f"{key[:32]}-{start_index}-{data.shape[0]}.npy"
+        fd, tmp_name = tempfile.mkstemp(dir=spill_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(data))
+        os.replace(tmp_name, path)
+        mapped = np.load(path, mmap_mode="r")
+        return _Entry(key=key, start_index=start_index, data=mapped, nbytes=data.nbytes, path=path)
+
+    def _discard(self, entry: Optional[_Entry]) -> None:
+        """Account for an evicted entry; caller holds the lock"""
+        if entry is None:
+            return
+        if entry.path is not None:
+            self._disk_bytes -= entry.nbytes
+            try:
+                entry.path.unlink()
+            except OSError:
+                pass
+        else:
+            self._memory_bytes -= entry.nbytes
+
+    def clear(self) -> None:
+        """Drop all cached series, including spilled files"""
+        with self._lock:
+            for store in (self._memory, self._disk):
+                while store:
+                    self._discard(store.popitem()[1])
+
+    def close(self) -> None:
+        """Clear the cache and remove a temporary spill directory"""
+        self.clear()
+        if self._spill_dir is not None and not self._spill_dir_setting:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def stats(self) -> Dict[str, int]:
+        """Cache occupancy and hit counters"""
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
+
+# Global simulation cache
+simulation_cache = SimulationCache(
+    max_memory_bytes=settings.SIMULATION_CACHE_MEMORY_MB * 1024 * 1024,
+    spill_threshold=settings.SIMULATION_CACHE_SPILL_MB * 1024 * 1024,
+    max_disk_bytes=settings.SIMULATION_CACHE_DISK_MB * 1024 * 1024,
+    spill_dir=settings.SIMULATION_CACHE_DIR
+)
@@ -2,60 +2,206 @@
 Solar System Service - Orbital calculations and data management
 """
 
+from __future__ import annotations
+
+import hashlib
 import json
+import logging
 import math
+import os
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Mapping, Tuple
 from datetime import datetime, timezone
 
 from app.schemas.solar_system import (
     Planet, Sun, SolarSystemResponse, PlanetWithPosition, 
     Position3D, PlanetPositionsResponse, OrbitPath, 
     OrbitPathPoint, OrbitPathsResponse, SimulationFrame,
-    SimulationResponse, SimulationRequest
+    SimulationResponse, SimulationRequest, SimulationMode
+)
+from app.core.http_cache import CachedPayload
+from app.core.metrics import batch_size
+from app.core.lazy import lazy_import
+from app.services.simulation_cache import (
+    simulation_cache, frame_indices, series_key, SERIES_COLUMNS
 )
 
+logger = logging.getLogger(__name__)
+
+# Only needed to compute, not to start the app
+np = lazy_import("numpy")
+nbody_service = lazy_import("app.services.nbody_service")
+
+
+@dataclass(frozen=True)
+class SolarSystemSnapshot:
+    """Immutable, pre-parsed view of the solar system data file"""
+    data: Dict[str, Any]  # Raw JSON, treated as read-only
+    planets: Tuple[Planet, ...]
+    planets_by_id: Mapping[str, Planet]
+    sun: Sun
+    solar_system: SolarSystemResponse
+    stats: Dict[str, Any]
+    payloads: Mapping[str, CachedPayload]
+    content_hash: str
+    file_signature: Tuple[int, int]
+
 
 class SolarSystemService:
     """Service for solar system data and calculations"""
     
+    # Minimum seconds between checks of the data file for replacement
+    RELOAD_CHECK_INTERVAL = 1.0
+    
     def __init__(self):
-        self.data_file = Path("data/solar_system_data.json")
-        self._data = None
-        self._load_data()
+        self.data_file = Path(__file__).resolve().parents[2] / "data" / "solar_system_data.json"
+        self._reload_lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._snapshot = self._load_snapshot()
+    
+    @property
+    def _data(self) -> Dict[str, Any]:
+        """Raw solar system data of the current snapshot"""
+        return self.snapshot.data
     
-    def _load_data(self):
-        """Load solar system data from JSON file"""
+    @property
+    def snapshot(self) -> SolarSystemSnapshot:
+        """Current dataset snapshot, reloaded if the data file was replaced"""
+        if time.monotonic() - self._last_check >= self.RELOAD_CHECK_INTERVAL:
+            self._maybe_reload()
+        return self._snapshot
+    
+    def _file_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.data_file)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _load_snapshot(self) -> SolarSystemSnapshot:
+        """Load, validate and pre-serialize solar system data from the JSON file"""
         try:
-            with open(self.data_file, 'r') as f:
-                self._data = json.load(f)
+            signature = self._file_signature()
+            raw = self.data_file.read_bytes()
+            data = json.loads(raw)
         except FileNotFoundError:
             raise FileNotFoundError(f"Solar system data file not found: {self.data_file}")
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in solar system data file: {e}")
-    
-    def get_solar_system(self) -> SolarSystemResponse:
-        """Get complete solar system data"""
-        planets = [Planet(**planet_data) for planet_data in self._data["planets"]]
-        sun = Sun(**self._data["sun"])
         
-        return SolarSystemResponse(
+        planets = tuple(Planet(**planet_data) for planet_data in data["planets"])
+        sun = Sun(**data["sun"])
+        solar_system = SolarSystemResponse(
+            planets=list(planets),
+            sun=sun,
+            scale_info=data["scale_info"]
+        )
+        stats = self._calculate_stats(planets)
+        
+        payloads = {
+            "solar_system": CachedPayload.from_content(solar_system),
+            "planets": CachedPayload.from_content(list(planets)),
+            "sun": CachedPayload.from_content(sun),
+            "scale": CachedPayload.from_content({
+                "success": True,
+                "data": data["scale_info"],
+                "message": "Scale information retrieved successfully"
+            }),
+            "stats": CachedPayload.from_content({
+                "success": True,
+                "data": stats,
+                "message": "Solar system statistics calculated successfully"
+            }),
+        }
+        for planet in planets:
+            payloads[f"planet:{planet.id}"] = CachedPayload.from_content(planet)
+        
+        return SolarSystemSnapshot(
+            data=data,
             planets=planets,
+            planets_by_id=MappingProxyType({planet.id: planet for planet in planets}),
             sun=sun,
-            scale_info=self._data["scale_info"]
+            solar_system=solar_system,
+            stats=stats,
+            payloads=MappingProxyType(payloads),
+            content_hash=hashlib.sha256(raw).hexdigest(),
+            file_signature=signature
         )
     
+    def _maybe_reload(self) -> None:
+        """Swap in a new snapshot if the data file has been replaced"""
+        if not self._reload_lock.acquire(blocking=False):
+            return  # Another thread is already checking
+        try:
+            self._last_check = time.monotonic()
+            try:
+                if self._file_signature() == self._snapshot.file_signature:
+                    return
+                snapshot = self._load_snapshot()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Keeping previous solar system data, reload failed: {e}")
+                return
+            
+            if snapshot.content_hash != self._snapshot.content_hash:
+                logger.info(f"Reloaded solar system data ({snapshot.content_hash[:12]})")
+            self._snapshot = snapshot
+        finally:
+            self._reload_lock.release()
+    
+    def reload(self) -> SolarSystemSnapshot:
+        """Force a reload of the data file, atomically replacing the snapshot"""
+        with self._reload_lock:
+            self._snapshot = self._load_snapshot()
+            self._last_check = time.monotonic()
+        return self._snapshot
+    
+    @staticmethod
+    def _calculate_stats(planets: Tuple[Planet, ...]) -> Dict[str, Any]:
+        """Calculate solar system statistics"""
+        largest_planet = max(planets, key=lambda p: p.radius_km)
+        smallest_planet = min(planets, key=lambda p: p.radius_km)
+        hottest_planet = max(planets, key=lambda p: p.surface_temp_k)
+        coldest_planet = min(planets, key=lambda p: p.surface_temp_k)
+        
+        return {
+            "total_planets": len(planets),
+            "planet_types": {
+                "terrestrial": len([p for p in planets if p.type == "terrestrial"]),
+                "gas_giant": len([p for p in planets if p.type == "gas_giant"]),
+                "ice_giant": len([p for p in planets if p.type == "ice_giant"]),
+                "dwarf_planet": len([p for p in planets if p.type == "dwarf_planet"])
+            },
+            "total_moons": sum(p.moons for p in planets),
+            "planets_with_rings": len([p for p in planets if p.has_rings]),
+            "extremes": {
+                "largest_planet": {"name": largest_planet.name, "radius_km": largest_planet.radius_km},
+                "smallest_planet": {"name": smallest_planet.name, "radius_km": smallest_planet.radius_km},
+                "hottest_planet": {"name": hottest_planet.name, "surface_temp_k": hottest_planet.surface_temp_k},
+                "coldest_planet": {"name": coldest_planet.name, "surface_temp_k": coldest_planet.surface_temp_k}
+            }
+        }
+    
+    def get_solar_system(self) -> SolarSystemResponse:
+        """Get complete solar system data"""
+        return self.snapshot.solar_system
+    
     def get_planet(self, planet_id: str) -> Optional[Planet]:
         """Get specific planet by ID"""
-        for planet_data in self._data["planets"]:
-            if planet_data["id"] == planet_id:
-                return Planet(**planet_data)
-        return None
+        return self.snapshot.planets_by_id.get(planet_id)
     
     def get_sun(self) -> Sun:
         """Get sun information"""
-        return Sun(**self._data["sun"])
+        return self.snapshot.sun
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get solar system statistics"""
+        return self.snapshot.stats
+    
+    def get_payload(self, key: str) -> Optional[CachedPayload]:
+        """Get a pre-serialized response body by key (e.g. ``sun`` or ``planet:earth``)"""
+        return self.snapshot.payloads.get(key)
     
     def calculate_julian_date(self, timestamp: Optional[float] = None) -> float:
         """Calculate Julian date from Unix timestamp"""
@@ -130,8 +276,7 @@ class SolarSystemService:
         julian_date = self.calculate_julian_date(timestamp)
         planets_with_positions = []
         
-        for planet_data in self._data["planets"]:
-            planet = Planet(**planet_data)
+        for planet in self.snapshot.planets:
             position = self.calculate_orbital_position(planet, julian_date)
             
             # Calculate distance from sun
@@ -158,8 +303,7 @@ class SolarSystemService:
         """Generate orbital paths for all planets"""
         orbits = []
         
-        for planet_data in self._data["planets"]:
-            planet = Planet(**planet_data)
+        for planet in self.snapshot.planets:
             points = []
             
             # Generate points around the orbit
@@ -194,54 +338,208 @@ class SolarSystemService:
             resolution=resolution
         )
     
-    def simulate_positions(self, request: SimulationRequest) -> SimulationResponse:
-        """Simulate planet positions over time"""
+    def _resolve_simulation_range(self, request: SimulationRequest) -> None:
+        """Fill in default start and end dates for a simulation request"""
         # Default to 1 year simulation if not specified
         if request.start_date is None:
             request.start_date = self.calculate_julian_date()
         
         if request.end_date is None:
             request.end_date = request.start_date + 365.25  # 1 year
+    
+    def integration_steps(self, request: SimulationRequest) -> int:
+        """Frames times integrator substeps a simulation request needs (one substep for Kepler orbits)"""
+        plan = self._plan_simulation(request.model_copy())
+        frames = plan["end_index"] - plan["start_index"] + 1
+        if request.mode != SimulationMode.NBODY:
+            return frames
+        substeps = nbody_service.plan_steps(plan["snapshot"].planets, request.time_step_days, request.max_step_days)
+        return frames * substeps
+    
+    def simulate_positions(self, request: SimulationRequest) -> SimulationResponse:
+        """
+        Simulate planet positions over time
         
-        frames = []
-        current_date = request.start_date
+        The date range is quantized to the time step so that repeated and
+        overlapping requests are served from the simulation cache.
+        """
+        plan = self._plan_simulation(request)
+        series = self._cached_series(plan)
+        if series is None:
+            if request.mode == SimulationMode.NBODY:
+                history = nbody_service.run_simulation_job(self._nbody_job(plan))
+                series = self._nbody_series(plan, history)
+            else:
+                series = self._kepler_series(plan)
+            simulation_cache.store(plan["key"], plan["start_index"], series)
+        return self._build_simulation_response(plan, series)
+    
+    def simulate_batch(
+        self,
+        requests: List[SimulationRequest],
+        max_workers: Optional[int] = None
+    ) -> List[SimulationResponse]:
+        """
+        Run several independent simulations
+        
+        N-body runs missing from the cache are spread over a process pool;
+        Kepler runs are cheap and are computed in-process. Results are
+        returned in request order.
+        """
+        batch_size.labels("simulation").observe(len(requests))
+        plans = [self._plan_simulation(request) for request in requests]
+        series = [self._cached_series(plan) for plan in plans]
+        
+        pending = [
+            i for i, plan in enumerate(plans)
+            if series[i] is None and plan["request"].mode == SimulationMode.NBODY
+        ]
+        if pending:
+            jobs = [self._nbody_job(plans[i]) for i in pending]
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                for i, history in zip(pending, executor.map(nbody_service.run_simulation_job, jobs)):
+                    series[i] = self._nbody_series(plans[i], history)
+                    simulation_cache.store(plans[i]["key"], plans[i]["start_index"], series[i])
+        
+        responses = []
+        for plan, result in zip(plans, series):
+            if result is None:
+                result = self._kepler_series(plan)
+                simulation_cache.store(plan["key"], plan["start_index"], result)
+            responses.append(self._build_simulation_response(plan, result))
+        return responses
+    
+    def _plan_simulation(self, request: SimulationRequest) -> Dict[str, Any]:
+        """Resolve defaults, quantize the range and select planets for a request"""
+        self._resolve_simulation_range(request)
+        snapshot = self.snapshot
+        step = request.time_step_days
+        
+        planet_ids = request.planet_ids or [p.id for p in snapshot.planets]
+        selected = [i for i, planet in enumerate(snapshot.planets) if planet.id in planet_ids]
+        start_index, end_index = frame_indices(
+            request.start_date, request.end_date, step
+        )
         
-        while current_date <= request.end_date:
-            # Calculate positions for all planets (or specified ones)
+        return {
+            "request": request,
+            "snapshot": snapshot,
+            "selected": selected,
+            "start_index": start_index,
+            "end_index": end_index,
+            "key": series_key(
+                request.mode.value,
+                step,
+                [snapshot.planets[i].id for i in selected],
+                request.max_step_days,
+                snapshot.content_hash
+            )
+        }
+    
+    def _cached_series(self, plan: Dict[str, Any]):
+        """Cached frames for a planned simulation, if available"""
+        return simulation_cache.lookup(
+            plan["key"],
+            plan["start_index"],
+            plan["end_index"],
+            # N-body trajectories depend on the initial state, so only
+            # prefixes of a run with the same start can be reused
+            exact_start=plan["request"].mode == SimulationMode.NBODY
+        )
+    
+    def _kepler_series(self, plan: Dict[str, Any]) -> np.ndarray:
+        """
+        Vectorized two-body positions for all frames of a planned simulation
+        
+        Matches calculate_orbital_position and calculate_orbital_velocity
+        exactly, evaluated for every frame and planet at once.
+        """
+        planets = [plan["snapshot"].planets[i] for i in plan["selected"]]
+        step = plan["request"].time_step_days
+        julian_dates = np.arange(plan["start_index"], plan["end_index"] + 1)[:, np.newaxis] * step
+        
+        a = np.array([p.semi_major_axis_km for p in planets])
+        e = np.array([p.eccentricity for p in planets])
+        period = np.array([p.orbital_period_days for p in planets])
+        inclination = np.radians([p.inclination_deg for p in planets])
+        
+        mean_anomaly = 2 * np.pi / period * (julian_dates - nbody_service.J2000)
+        eccentric_anomaly = mean_anomaly + e * np.sin(mean_anomaly)
+        true_anomaly = 2 * np.arctan2(
+            np.sqrt(1 + e) * np.sin(eccentric_anomaly / 2),
+            np.sqrt(1 - e) * np.cos(eccentric_anomaly / 2)
+        )
+        radius = a * (1 - e * np.cos(eccentric_anomaly))
+        y_orbital = radius * np.sin(true_anomaly)
+        
+        series = np.empty(julian_dates.shape[:1] + (len(planets), SERIES_COLUMNS))
+        series[..., 0] = radius * np.cos(true_anomaly)
+        series[..., 1] = y_orbital * np.cos(inclination)
+        series[..., 2] = y_orbital * np.sin(inclination)
+        series[..., 3] = np.sqrt((series[..., :3] ** 2).sum(axis=2))
+        
+        GM_sun = 1.327e20  # m³/s²
+        r = series[..., 3] * 1000
+        series[..., 4] = np.sqrt(GM_sun * (2 / r - 1 / (a * 1000))) / 1000
+        return series
+    
+    def _nbody_job(self, plan: Dict[str, Any]):
+        """Picklable argument tuple for an N-body process-pool job"""
+        request = plan["request"]
+        return (
+            plan["snapshot"].data["planets"],
+            plan["start_index"] * request.time_step_days,
+            request.time_step_days,
+            plan["end_index"] - plan["start_index"] + 1,
+            request.max_step_days
+        )
+    
+    @staticmethod
+    def _nbody_series(plan: Dict[str, Any], history) -> np.ndarray:
+        """Pack N-body position/velocity histories of the selected planets"""
+        positions, velocities = history
+        selected = plan["selected"]
+        
+        series = np.empty(positions.shape[:1] + (len(selected), SERIES_COLUMNS))
+        series[..., :3] = positions[:, selected, :]
+        series[..., 3] = np.sqrt((series[..., :3] ** 2).sum(axis=2))
+        series[..., 4] = (
+            np.sqrt((velocities[:, selected, :] ** 2).sum(axis=2)) / nbody_service.SECONDS_PER_DAY
+        )
+        return series
+    
+    @staticmethod
+    def _build_simulation_response(plan: Dict[str, Any], series: np.ndarray) -> SimulationResponse:
+        """Convert a packed time series into simulation frames"""
+        request = plan["request"]
+        step = request.time_step_days
+        planets = [plan["snapshot"].planets[i] for i in plan["selected"]]
+        planet_fields = [planet.dict() for planet in planets]
+        
+        frames = []
+        for frame_index in range(series.shape[0]):
+            julian_date = (plan["start_index"] + frame_index) * step
             planets_with_positions = []
+            for i, fields in enumerate(planet_fields):
+                x, y, z, distance, speed = series[frame_index, i].tolist()
+                planets_with_positions.append(PlanetWithPosition(
+                    **fields,
+                    position=Position3D(x=x, y=y, z=z),
+                    distance_from_sun_km=distance,
+                    velocity_kms=speed
+                ))
             
-            planet_ids = request.planet_ids or [p["id"] for p in self._data["planets"]]
-            
-            for planet_data in self._data["planets"]:
-                if planet_data["id"] in planet_ids:
-                    planet = Planet(**planet_data)
-                    position = self.calculate_orbital_position(planet, current_date)
-                    
-                    distance_from_sun = math.sqrt(position.x**2 + position.y**2 + position.z**2)
-                    velocity = self.calculate_orbital_velocity(planet, distance_from_sun)
-                    
-                    planet_with_position = PlanetWithPosition(
-                        **planet.dict(),
-                        position=position,
-                        distance_from_sun_km=distance_from_sun,
-                        velocity_kms=velocity
-                    )
-                    planets_with_positions.append(planet_with_position)
-            
-            frame = SimulationFrame(
-                julian_date=current_date,
-                timestamp=(current_date - 2440587.5) * 86400.0,  # Convert back to Unix timestamp
+            frames.append(SimulationFrame(
+                julian_date=julian_date,
+                timestamp=(julian_date - 2440587.5) * 86400.0,  # Convert back to Unix timestamp
                 planets=planets_with_positions
-            )
-            frames.append(frame)
-            
-            current_date += request.time_step_days
+            ))
         
         return SimulationResponse(
             frames=frames,
-            start_date=request.start_date,
-            end_date=request.end_date,
-            time_step_days=request.time_step_days,
+            start_date=plan["start_index"] * step,
+            end_date=plan["end_index"] * step,
+            time_step_days=step,
             total_frames=len(frames)
         )
 
@@ -0,0 +1,307 @@
+"""
+Token Service - Signed access tokens (JWT) verified without database lookups
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.core.config import Settings, settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import AuthenticationError
+from app.core.metrics import cache_requests_total
+from app.core.serialization import dumps, loads
+from app.models.user import RevokedToken
+from app.services.api_key_service import APIKeyPrincipal
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+_cache_hit = cache_requests_total.labels("access_token", "hit")
+_cache_miss = cache_requests_total.labels("access_token", "miss")
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """Verified contents of an access token"""
+    jti: str
+    sub: str  # API key id the token was issued for
+    name: str
+    scopes: FrozenSet[str]
+    tier: str
+    rate_limit: int
+    issued_at: int
+    expires_at: int
+    user_id: Optional[int] = None  # owner of the API key
+    # The token's caller, as the routes, rate limiter and metering see API keys
+    principal: APIKeyPrincipal = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "principal", APIKeyPrincipal(
+            key_id=self.sub,
+            name=self.name,
+            scopes=self.scopes,
+            rate_limit=self.rate_limit,
+            tier=self.tier,
+            created_by=self.user_id
+        ))
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def key_id_of(secret: str) -> str:
+    """Public identifier of a signing key, sent as the ``kid`` header"""
+    return hashlib.sha256(secret.encode()).hexdigest()[:12]
+
+
+def looks_like_token(value: str) -> bool:
+    """Whether a bearer value has the three dot-separated parts of a JWT"""
+    return value.count(".") == 2
+
+
+class TokenService:
+    """
+    HMAC-signed JWTs (RFC 7519) carrying everything a request needs
+
+    Tokens are issued in exchange for an API key and carry its id, scopes,
+    usage tier and rate limit, so verifying one is an HMAC and a JSON
+    parse: no query. Verified tokens are kept in a bounded LRU cache, so a
+    token seen before costs a dict lookup plus the expiry and revocation
+    checks, which are made on every use. Tokens are signed with SECRET_KEY; keys in
+    JWT_PREVIOUS_SECRET_KEYS are still accepted, picked by the ``kid``
+    header, so the secret can be rotated without logging anyone out.
+
+    Revocations (of one token, or of every token issued so far for an API
+    key) are stored in ``revoked_tokens`` and mirrored in memory; each
+    worker reloads the list every JWT_REVOCATION_REFRESH_SECONDS, so a
+    revocation made in another worker takes effect within that interval.
+    Tokens issued for a key after its revocation are accepted, so a key
+    that is enabled again can get working tokens.
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        previous_secrets: Tuple[str, ...] = (),
+        algorithm: str = "HS256",
+        lifetime: float = 1800.0,
+        issuer: str = "exoplanet-ai",
+        leeway: float = 30.0,
+        max_entries: int = 10000
+    ):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unsupported token algorithm {algorithm}; use one of {', '.join(ALGORITHMS)}")
+        self.algorithm = algorithm
+        self.digest = ALGORITHMS[algorithm]
+        self.lifetime = lifetime
+        self.issuer = issuer
+        self.leeway = leeway
+        self.max_entries = max_entries
+        self._verified: "OrderedDict[str, TokenClaims]" = OrderedDict()
+        self._keys: Dict[str, bytes] = {}
+        for key in (secret, *previous_secrets):
+            self._keys.setdefault(key_id_of(key), key.encode())
+        self._signing_kid = key_id_of(secret)
+        # Encoded header of tokens signed with each key, and what it decodes to
+        self._headers = {
+            kid: _b64encode(dumps({"alg": algorithm, "typ": "JWT", "kid": kid})) for kid in self._keys
+        }
+        self._known_headers = {encoded: kid for kid, encoded in self._headers.items()}
+        # Revoked jti -> unix time the revocation can be forgotten
+        self._revoked: Dict[str, float] = {}
+        # API key id -> (unix time its tokens were revoked, time that can be forgotten)
+        self._revoked_subjects: Dict[str, Tuple[float, float]] = {}
+
+    def issue(self, principal: APIKeyPrincipal, lifetime: Optional[float] = None) -> Tuple[str, int]:
+        """Signed token for an API key; returns (token, seconds until it expires)"""
+        now = int(time.time())
+        expires_in = int(self.lifetime if lifetime is None else lifetime)
+        claims = {
+            "iss": self.issuer,
+            "sub": principal.key_id,
+            "iat": now,
+            "exp": now + expires_in,
+            "jti": secrets.token_hex(12),
+            "name": principal.name,
+            "scope": " ".join(sorted(principal.scopes)),
+            "tier": principal.tier,
+            "rate_limit": principal.rate_limit,
+            "uid": principal.created_by
+        }
+        signing_input = f"{self._headers[self._signing_kid]}.{_b64encode(dumps(claims))}"
+        signature = hmac.new(self._keys[self._signing_kid], signing_input.encode("ascii"), self.digest).digest()
+        return f"{signing_input}.{_b64encode(signature)}", expires_in
+
+    def verify(self, token: str) -> TokenClaims:
+        """Claims of a valid token, raising AuthenticationError otherwise"""
+        verified = self._verified.get(token)
+        if verified is None:
+            _cache_miss.inc()
+            verified = self._decode(token)
+            self._verified[token] = verified
+            if len(self._verified) > self.max_entries:
+                self._verified.popitem(last=False)
+        else:
+            _cache_hit.inc()
+            self._verified.move_to_end(token)
+
+        if verified.expires_at + self.leeway < time.time():
+            self._verified.pop(token, None)
+            raise AuthenticationError("Token has expired")
+        if verified.jti in self._revoked:
+            raise AuthenticationError("Token has been revoked")
+        subject = self._revoked_subjects.get(verified.sub)
+        if subject is not None and verified.issued_at <= subject[0]:
+            raise AuthenticationError("Token has been revoked")
+        return verified
+
+    def _decode(self, token: str) -> TokenClaims:
+        """Check a token's signature and issuer and parse its claims"""
+        try:
+            header, payload, signature = token.split(".")
+            kid = self._known_headers.get(header)
+            if kid is None:
+                kid = self._parse_header(header)
+            expected = hmac.new(self._keys[kid], f"{header}.{payload}".encode("ascii"), self.digest).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise AuthenticationError("Invalid token signature")
+            claims = loads(_b64decode(payload))
+            if claims.get("iss") != self.issuer:
+                raise AuthenticationError("Token was not issued by this service")
+            return TokenClaims(
+                jti=claims["jti"],
+                sub=claims["sub"],
+                name=claims.get("name", ""),
+                scopes=frozenset(claims.get("scope", "").split()),
+                tier=claims.get("tier") or settings.API_KEY_DEFAULT_TIER,
+                rate_limit=int(claims.get("rate_limit") or 0),
+                issued_at=int(claims["iat"]),
+                expires_at=int(claims["exp"]),
+                user_id=claims.get("uid")
+            )
+        except AuthenticationError:
+            raise
+        except (ValueError, KeyError, TypeError, UnicodeError, binascii.Error):
+            raise AuthenticationError("Malformed token")
+
+    def _parse_header(self, header: str) -> str:
+        """Signing key id of a header not produced by this process (e.g. by another worker's JSON encoder)"""
+        fields = loads(_b64decode(header))
+        if fields.get("alg") != self.algorithm:
+            raise AuthenticationError("Unexpected token algorithm")
+        kid = fields.get("kid")
+        if kid not in self._keys:
+            raise AuthenticationError("Token signed with an unknown key")
+        return kid
+
+    async def revoke(self, claims: TokenClaims) -> None:
+        """Reject this token from now on"""
+        expires_at = claims.expires_at + self.leeway
+        self._revoked[claims.jti] = max(expires_at, self._revoked.get(claims.jti, 0.0))
+        await self._store_revocation(claims.jti, expires_at)
+
+    async def revoke_subject(self, key_id: str) -> None:
+        """Reject every token issued so far for an API key"""
+        revoked_at = time.time()
+        # Tokens issued up to now are all expired by then
+        expires_at = revoked_at + self.lifetime + self.leeway
+        self._revoked_subjects[key_id] = self._later(self._revoked_subjects.get(key_id), (revoked_at, expires_at))
+        await self._store_revocation(f"sub:{key_id}", expires_at, revoked_at)
+
+    @staticmethod
+    def _later(
+        current: Optional[Tuple[float, float]],
+        other: Tuple[float, float]
+    ) -> Tuple[float, float]:
+        """Merge two revocations of the same API key"""
+        if current is None:
+            return other
+        return max(current[0], other[0]), max(current[1], other[1])
+
+    async def _store_revocation(self, token_id: str, expires_at: float, revoked_at: Optional[float] = None) -> None:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(RevokedToken).where(RevokedToken.token_id == token_id)
+            )).scalar_one_or_none()
+            if row is None:
+                db.add(RevokedToken(token_id=token_id, expires_at=expires_at, revoked_at=revoked_at))
+            else:
+                row.expires_at = max(row.expires_at, expires_at)
+                if revoked_at is not None:
+                    row.revoked_at = max(row.revoked_at or 0.0, revoked_at)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Revoked by another worker at the same moment
+                await db.rollback()
+
+    async def refresh_revocations(self) -> None:
+        """Load revocations made by other workers and forget expired ones"""
+        now = time.time()
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(RevokedToken.token_id, RevokedToken.expires_at, RevokedToken.revoked_at)
+                    .where(RevokedToken.expires_at > now)
+                )).all()
+                await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                await db.commit()
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning(f"Could not refresh revoked tokens: {e}")
+            return
+        # Merging keeps the latest revocation, so it cannot resurrect a token
+        revoked = {token_id: expires_at for token_id, expires_at in self._revoked.items() if expires_at > now}
+        subjects = {key_id: entry for key_id, entry in self._revoked_subjects.items() if entry[1] > now}
+        for token_id, expires_at, revoked_at in rows:
+            if token_id.startswith("sub:"):
+                key_id = token_id[len("sub:"):]
+                # Without a revocation time, reject all of the key's tokens
+                entry = (revoked_at if revoked_at is not None else expires_at, expires_at)
+                subjects[key_id] = self._later(subjects.get(key_id), entry)
+            else:
+                revoked[token_id] = max(expires_at, revoked.get(token_id, 0.0))
+        self._revoked = revoked
+        self._revoked_subjects = subjects
+
+    async def refresh_periodically(self, interval: float) -> None:
+        """Reload the revocation list every ``interval`` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh_revocations()
+
+
+def _create_service() -> TokenService:
+    if settings.SECRET_KEY == Settings.model_fields["SECRET_KEY"].default and not settings.DEBUG:
+        logger.warning("SECRET_KEY is the built-in default; anyone can forge access tokens until it is changed")
+    previous = tuple(key.strip() for key in settings.JWT_PREVIOUS_SECRET_KEYS.split(",") if key.strip())
+    return TokenService(
+        secret=settings.SECRET_KEY,
+        previous_secrets=previous,
+        algorithm=settings.ALGORITHM,
+        lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        issuer=settings.JWT_ISSUER,
+        leeway=settings.JWT_LEEWAY_SECONDS,
+        max_entries=settings.JWT_CACHE_SIZE
+    )
+
+
+# Global service instance
+token_service = _create_service()
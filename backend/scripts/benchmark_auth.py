@@ -0,0 +1,120 @@
+"""
+Authentication overhead benchmark
+
+Times access token verification (first sight and cached) and issuance,
+the cached API key check and the revocation lookup in isolation, then POST /advanced/predictions/predict
+end to end without credentials, with an API key and with an access token.
+Rate limits and quotas are switched off so every request does the same work.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("SQLITE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/benchmark_auth.db")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["USAGE_QUOTAS_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.user import APIKeyCreate
+from app.services.api_key_service import api_key_service
+from app.services.token_service import token_service
+
+PREDICTION = {
+    "orbital_period": 365.25,
+    "transit_duration": 4.2,
+    "planetary_radius": 1.0,
+    "transit_depth": 0.008,
+    "stellar_magnitude": 4.83,
+    "equilibrium_temperature": 288
+}
+
+
+def per_call(func, number: int, repeat: int = 5) -> float:
+    """Best-of-repeat microseconds per call"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - t0)
+    return best / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark authentication overhead")
+    parser.add_argument("--number", type=int, default=20000, help="Calls per micro-benchmark round")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per mode for /predict")
+    args = parser.parse_args()
+    # Per-request log lines would dominate the timings
+    logging.disable(logging.INFO)
+
+    with TestClient(app) as client:
+        created = client.portal.call(
+            api_key_service.create, APIKeyCreate(name="benchmark", scopes=["read", "predict"])
+        )
+        api_key = created.api_key
+        principal = client.portal.call(api_key_service.verify, api_key)
+        token, _ = token_service.issue(principal)
+
+        print(f"Authentication benchmark: {token_service.algorithm}, {len(token)}-byte token")
+        decode_us = per_call(lambda: token_service._decode(token), args.number)
+        verify_us = per_call(lambda: token_service.verify(token), args.number)
+        issue_us = per_call(lambda: token_service.issue(principal), args.number)
+        print(f"  token decode (uncached):  {decode_us:8.2f} µs")
+        print(f"  token verify (cached):    {verify_us:8.2f} µs")
+        print(f"  token issue:              {issue_us:8.2f} µs")
+
+        # Revocation lookups stay dict lookups however long the list grows
+        for i in range(10000):
+            token_service._revoked[f"benchmark-{i}"] = time.time() + 60
+        revoked_us = per_call(lambda: token_service.verify(token), args.number)
+        print(f"  ... with 10k revoked:     {revoked_us:8.2f} µs")
+
+        async def verify_key_many():
+            t0 = time.perf_counter()
+            for _ in range(args.number):
+                await api_key_service.verify(api_key)
+            return time.perf_counter() - t0
+
+        key_us = min(client.portal.call(verify_key_many) for _ in range(5)) / args.number * 1e6
+        print(f"  API key verify (cached):  {key_us:8.2f} µs")
+
+        modes = {
+            "anonymous": {},
+            "API key": {"X-API-Key": api_key},
+            "access token": {"Authorization": f"Bearer {token}"},
+        }
+        for headers in modes.values():
+            for _ in range(20):
+                assert client.post("/api/v1/advanced/predictions/predict", json=PREDICTION,
+                                   headers=headers).status_code == 200
+
+        # Interleaved so drift affects every mode alike
+        latencies = {mode: [] for mode in modes}
+        for _ in range(args.requests):
+            for mode, headers in modes.items():
+                t0 = time.perf_counter()
+                client.post("/api/v1/advanced/predictions/predict", json=PREDICTION, headers=headers)
+                latencies[mode].append((time.perf_counter() - t0) * 1e3)
+
+    print(f"POST /advanced/predictions/predict, {args.requests} requests per mode (in-process client)")
+    baseline = statistics.median(latencies["anonymous"])
+    for mode, samples in latencies.items():
+        median = statistics.median(samples)
+        p95 = statistics.quantiles(samples, n=20)[-1]
+        print(f"  {mode:13s} median {median:6.3f} ms  p95 {p95:6.3f} ms  "
+              f"({(median - baseline) * 1e3:+6.1f} µs vs anonymous)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+N-body integrator throughput benchmark
+
+Reports body-steps per second for the leapfrog integrator, for a single
+in-process run and for independent runs spread over a process pool.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.schemas.solar_system import SimulationRequest, SimulationMode
+from app.services import nbody_service
+from app.services.simulation_cache import simulation_cache
+from app.services.solar_system_service import solar_system_service
+
+
+def body_steps(request: SimulationRequest) -> int:
+    """Total number of body-steps integrated for a request"""
+    planets = solar_system_service.get_solar_system().planets
+    substeps = nbody_service.plan_steps(planets, request.time_step_days, request.max_step_days)
+    frames = int((request.end_date - request.start_date) / request.time_step_days) + 1
+    return (frames - 1) * substeps * (len(planets) + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the N-body simulator")
+    parser.add_argument("--years", type=float, default=10.0, help="Simulated years per run")
+    parser.add_argument("--runs", type=int, default=4, help="Independent runs for the pooled benchmark")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    start = solar_system_service.calculate_julian_date()
+
+    def make_request(offset: float) -> SimulationRequest:
+        return SimulationRequest(
+            start_date=start + offset,
+            end_date=start + offset + args.years * 365.25,
+            time_step_days=1.0,
+            mode=SimulationMode.NBODY
+        )
+
+    print(f"N-body benchmark: {args.years} years per run")
+
+    def report(label: str, steps: int, elapsed: float):
+        print(f"  {label:<22} {steps:>12,} body-steps in {elapsed:7.2f}s  ->  {steps / elapsed:>12,.0f} body-steps/s")
+
+    # Raw integrator throughput, without building response frames
+    request = make_request(0.0)
+    job = solar_system_service._nbody_job(solar_system_service._plan_simulation(request))
+    t0 = time.perf_counter()
+    nbody_service.run_simulation_job(job)
+    report("integrator", body_steps(request), time.perf_counter() - t0)
+
+    # End to end, including SimulationFrame construction (cache bypassed)
+    simulation_cache.clear()
+    t0 = time.perf_counter()
+    solar_system_service.simulate_positions(make_request(0.0))
+    report("simulate_positions", body_steps(request), time.perf_counter() - t0)
+
+    # Independent runs spread over the process pool
+    requests = [make_request(i * 30.0) for i in range(args.runs)]
+    simulation_cache.clear()
+    t0 = time.perf_counter()
+    solar_system_service.simulate_batch(requests, max_workers=args.workers)
+    report(f"simulate_batch x{args.runs}", sum(body_steps(r) for r in requests), time.perf_counter() - t0)
+
+if __name__ == "__main__":
+    main()
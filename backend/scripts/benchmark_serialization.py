@@ -0,0 +1,109 @@
+"""
+Response serialization benchmark
+
+Compares the default path for GET /advanced/exoplanets/ (per-row
+from_orm, response_model re-validation, stdlib JSON encoding) with the
+FastJSONResponse path, reporting microseconds per row at page_size=100.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add the parent directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core import serialization
+from app.core.serialization import orm_rows
+from app.models.exoplanet import Exoplanet
+from app.schemas.exoplanet import ExoplanetListResponse, ExoplanetResponse
+
+
+def make_rows(count: int):
+    """Build transient ORM rows shaped like real catalogue entries"""
+    return [
+        Exoplanet(
+            id=i,
+            name=f"Kepler-{i}b",
+            host_star=f"Kepler-{i}",
+            discovery_year=2015,
+            mission="Kepler",
+            orbital_period=384.8 + i,
+            transit_duration=10.9,
+            planetary_radius=1.63,
+            transit_depth=0.0087,
+            stellar_magnitude=13.426,
+            equilibrium_temperature=265,
+            distance=1402,
+            planet_type="Super Earth",
+            habitable_zone=True,
+            confirmed=True,
+            created_at=datetime(2025, 1, 1)
+        )
+        for i in range(count)
+    ]
+
+
+def default_path(rows, pagination) -> bytes:
+    response = ExoplanetListResponse(
+        success=True,
+        data=[ExoplanetResponse.from_orm(row) for row in rows],
+        pagination=pagination,
+        message=f"Retrieved {len(rows)} exoplanets"
+    )
+    # FastAPI validates the returned object against response_model again,
+    # then encodes it with jsonable_encoder and the stdlib json module
+    validated = ExoplanetListResponse.model_validate(response.model_dump())
+    return json.dumps(
+        jsonable_encoder(validated), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_path(rows, pagination) -> bytes:
+    return serialization.dumps({
+        "success": True,
+        "data": orm_rows(rows, ExoplanetResponse),
+        "pagination": pagination,
+        "message": f"Retrieved {len(rows)} exoplanets"
+    })
+
+
+def measure(func, rows, pagination, repeat: int) -> float:
+    """Best-of-repeat microseconds per row"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(rows, pagination)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exoplanet list serialization")
+    parser.add_argument("--page-size", type=int, default=100, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=50, help="Repetitions (best is reported)")
+    args = parser.parse_args()
+
+    rows = make_rows(args.page_size)
+    pagination = {
+        "page": 1, "page_size": args.page_size, "total_count": 5000,
+        "total_pages": 50, "has_next": True, "has_prev": False
+    }
+
+    assert json.loads(default_path(rows, pagination)) == json.loads(fast_path(rows, pagination))
+
+    encoder = "orjson" if serialization.orjson is not None else "json (orjson not installed)"
+    print(f"Serialization benchmark: page_size={args.page_size}, encoder={encoder}")
+    default_us = measure(default_path, rows, pagination, args.repeat)
+    fast_us = measure(fast_path, rows, pagination, args.repeat)
+    print(f"  response_model path: {default_us:8.2f} µs/row")
+    print(f"  FastJSONResponse:    {fast_us:8.2f} µs/row  ({default_us / fast_us:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Production server runner for ExoPlanet AI API
+
+Loads the application once, then forks worker processes that share it
+(see app/core/prefork.py).
+
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+
+kill -HUP <master pid> restarts the workers one at a time without dropping
+requests; kill -TERM (or Ctrl+C) stops them gracefully.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from app.core.config import settings
+from app.core.database import close_db, init_db
+from app.core.prefork import Arbiter, default_worker_count
+from app.core.worker_status import worker_status
+
+
+async def prepare_database():
+    """Create the tables once, before the workers start"""
+    await init_db()
+    # Workers open their own connections
+    await close_db()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the ExoPlanet AI API with preforked workers")
+    parser.add_argument("--host", default="0.0.0.0", help="address to bind (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)),
+                        help="port to bind (default: $PORT or 8000)")
+    parser.add_argument("--workers", type=int, default=settings.WORKERS,
+                        help="worker processes (default: WORKERS, or one per CPU core)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    arbiter = Arbiter(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers or default_worker_count(),
+        timeout=settings.WORKER_TIMEOUT_SECONDS,
+        graceful_timeout=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS,
+        board=worker_status,
+        before_fork=lambda: asyncio.run(prepare_database()),
+        log_level=settings.LOG_LEVEL.lower(),
+        # Keep the queued handlers set up by app.core.logging
+        log_config=None,
+        access_log=True,
+        proxy_headers=True
+    )
+    sys.exit(arbiter.run())
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, precompressed bundles for the ExoPlanet AI frontend
+
+Every run of consecutive local <script src="js/..."> or
+<link rel="stylesheet" href="css/..."> tags in the top-level HTML pages is
+concatenated (each file once, in page order), minified and written to
+dist/ as <name>.<content hash>.<ext> together with .gz (and .br when the
+brotli package is installed) variants. The pages are rewritten in place to
+load the bundle; the original tags are kept in a build comment so the
+build can be re-run after editing sources, or undone with --clean.
+dist/asset-manifest.json maps every bundle to its sources and pages.
+
+Usage: python build_assets.py [--no-minify] [--clean]
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, only .gz variants are written without it
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DIST = "dist"
+MANIFEST = "asset-manifest.json"
+HASH_LENGTH = 10
+
+SCRIPT_TAG = re.compile(r'^(\s*)<script src="(js/[^":?#]+\.js)"></script>\s*$')
+STYLE_TAG = re.compile(r'^(\s*)<link rel="stylesheet" href="(css/[^":?#]+\.css)">\s*$')
+BUILD_BLOCK = re.compile(
+    r'^([ \t]*)<!-- build:(js|css) ([^>]*?) -->\n.*?\n[ \t]*<!-- endbuild -->[ \t]*$',
+    re.MULTILINE | re.DOTALL
+)
+
+IDENTIFIER_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$")
+# After these a '/' starts a regular expression rather than a division
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "instanceof", "case", "do", "else", "in", "of",
+                  "new", "delete", "void", "throw", "yield", "await"}
+
+
+# Minification
+
+def _skip_string(source, i):
+    """Index just past the string literal opening at ``i``"""
+    quote = source[i]
+    i += 1
+    while i < len(source):
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        i += 1
+        if c == quote:
+            break
+    return i
+
+
+def _skip_template(source, i):
+    """Index just past the template literal opening at ``i``, including ${...} parts"""
+    i += 1
+    while i < len(source):
+        c = source[i]
+        if c == "\\":
+            i += 2
+        elif c == "`":
+            return i + 1
+        elif c == "$" and source.startswith("${", i):
+            i = _skip_braces(source, i + 1)
+        else:
+            i += 1
+    return i
+
+
+def _skip_braces(source, i):
+    """Index just past the balanced {...} opening at ``i``"""
+    depth = 0
+    while i < len(source):
+        c = source[i]
+        if c in "'\"":
+            i = _skip_string(source, i)
+            continue
+        if c == "`":
+            i = _skip_template(source, i)
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _skip_regex(source, i):
+    """Index just past the regex literal opening at ``i``, or None if it is not one"""
+    in_class = False
+    i += 1
+    while i < len(source):
+        c = source[i]
+        if c == "\n":
+            return None
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            while i < len(source) and source[i].isalpha():
+                i += 1
+            return i
+        i += 1
+    return None
+
+
+def minify_js(source):
+    """
+    Remove comments and collapse whitespace
+
+    Line breaks are kept (as one per run of whitespace) so automatic
+    semicolon insertion behaves exactly as in the source; strings,
+    template literals and regular expressions are copied untouched.
+    """
+    out = []
+    last = ""  # last significant character written
+    word = ""  # identifier or keyword ending at ``last``
+    pending_space = ""
+    i, n = 0, len(source)
+
+    def emit(text):
+        nonlocal pending_space, last, word
+        separated = bool(pending_space and out)
+        if separated:
+            out.append(pending_space)
+        pending_space = ""
+        out.append(text)
+        tail = text[-1]
+        if len(text) == 1 and tail in IDENTIFIER_CHARS:
+            word = word + tail if last in IDENTIFIER_CHARS and not separated else tail
+        else:
+            word = ""
+        last = tail
+
+    while i < n:
+        c = source[i]
+        if c.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            pending_space = "\n" if "\n" in source[i:j] or pending_space == "\n" else " "
+            i = j
+        elif c in "'\"":
+            j = _skip_string(source, i)
+            emit(source[i:j])
+            i = j
+        elif c == "`":
+            j = _skip_template(source, i)
+            emit(source[i:j])
+            i = j
+        elif source.startswith("//", i):
+            j = source.find("\n", i)
+            i = n if j < 0 else j
+        elif source.startswith("/*", i):
+            j = source.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+            if pending_space != "\n":
+                pending_space = "\n" if "\n" in source[i:j] else " "
+            i = j
+        elif c == "/" and (last == "" or last in REGEX_PRECEDERS or word in REGEX_KEYWORDS):
+            j = _skip_regex(source, i)
+            if j is None:
+                emit(c)
+                i += 1
+            else:
+                emit(source[i:j])
+                i = j
+        else:
+            emit(c)
+            i += 1
+
+    return "".join(out).strip() + "\n"
+
+
+def minify_css(source):
+    """Remove comments and whitespace that carries no meaning"""
+    out = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c in "'\"":
+            j = _skip_string(source, i)
+            out.append(source[i:j])
+            i = j
+        elif source.startswith("/*", i):
+            j = source.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+        elif c.isspace():
+            while i < n and source[i].isspace():
+                i += 1
+            if out and out[-1][-1:] not in "{};,>" and i < n and source[i] not in "{};,>":
+                out.append(" ")
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out).replace(";}", "}").strip() + "\n"
+
+
+# Bundling
+
+def read_sources(paths):
+    parts = []
+    for path in paths:
+        with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+            parts.append(f.read())
+    return parts
+
+
+def build_bundle(kind, sources, minify):
+    """Content of the bundle for ``sources``"""
+    parts = read_sources(sources)
+    if kind == "js":
+        # Classic scripts share one global scope, so concatenation keeps
+        # their meaning; the separator guards against a missing final ';'
+        if minify:
+            parts = [minify_js(part) for part in parts]
+        return ";\n".join(part.rstrip() for part in parts) + ";\n"
+    if minify:
+        parts = [minify_css(part) for part in parts]
+    return "\n".join(part.rstrip() for part in parts) + "\n"
+
+
+def write_bundle(name, kind, content):
+    """Write the bundle and its precompressed variants; returns its path relative to ROOT"""
+    data = content.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    path = f"{DIST}/{name}.{digest}.{kind}"
+    full_path = os.path.join(ROOT, path)
+    with open(full_path, "wb") as f:
+        f.write(data)
+    # Written after the bundle so the static server treats them as fresh
+    with open(full_path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(full_path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+    return path
+
+
+def restore_page(html):
+    """Replace build blocks with the tags they were built from"""
+    def restore(match):
+        indent, kind, sources = match.groups()
+        template = '<script src="{}"></script>' if kind == "js" else '<link rel="stylesheet" href="{}">'
+        return "\n".join(indent + template.format(source) for source in sources.split())
+    return BUILD_BLOCK.sub(restore, html)
+
+
+def find_runs(lines):
+    """(kind, first line, last line, indent, sources) for each run of local asset tags"""
+    runs = []
+    current = None
+    for index, line in enumerate(lines):
+        for kind, pattern in (("js", SCRIPT_TAG), ("css", STYLE_TAG)):
+            match = pattern.match(line)
+            if match:
+                break
+        else:
+            current = None
+            continue
+        indent, source = match.groups()
+        if current is not None and current[0] == kind and current[2] == index - 1:
+            current[2] = index
+            current[4].append(source)
+        else:
+            current = [kind, index, index, indent, [source]]
+            runs.append(current)
+    return runs
+
+
+def bundle_key(kind, sources):
+    # Each file is loaded once; a repeated classic script only re-ran or failed
+    return kind, tuple(OrderedDict.fromkeys(sources))
+
+
+def build(minify=True):
+    os.makedirs(os.path.join(ROOT, DIST), exist_ok=True)
+    pages = sorted(os.path.basename(p) for p in glob.glob(os.path.join(ROOT, "*.html")))
+
+    # Parse every page first so bundles shared by several pages are built once
+    page_runs = OrderedDict()
+    users = OrderedDict()
+    for page in pages:
+        with open(os.path.join(ROOT, page), encoding="utf-8") as f:
+            lines = restore_page(f.read()).split("\n")
+        runs = find_runs(lines)
+        for run in runs:
+            users.setdefault(bundle_key(run[0], run[4]), []).append(page)
+        page_runs[page] = (lines, runs)
+
+    bundles = {}
+    manifest = {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "bundles": {}, "pages": {}}
+    shared_count = {"js": 0, "css": 0}
+    for (kind, sources), used_by in users.items():
+        if len(used_by) == 1:
+            page_bundles = [key for key in users if key[0] == kind and users[key] == used_by]
+            name = os.path.splitext(used_by[0])[0]
+            if len(page_bundles) > 1:
+                name += f"-{page_bundles.index((kind, sources)) + 1}"
+        else:
+            shared_count[kind] += 1
+            name = "common" if shared_count[kind] == 1 else f"common-{shared_count[kind]}"
+        content = build_bundle(kind, list(sources), minify)
+        path = write_bundle(name, kind, content)
+        bundles[(kind, sources)] = path
+        original = sum(os.path.getsize(os.path.join(ROOT, s)) for s in sources)
+        manifest["bundles"][path] = {
+            "sources": list(sources),
+            "pages": used_by,
+            "source_bytes": original,
+            "bytes": os.path.getsize(os.path.join(ROOT, path)),
+            "gzip_bytes": os.path.getsize(os.path.join(ROOT, path + ".gz")),
+            "brotli_bytes": os.path.getsize(os.path.join(ROOT, path + ".br")) if brotli is not None else None
+        }
+
+    for page, (lines, runs) in page_runs.items():
+        if not runs:
+            continue
+        # Replace from the bottom so earlier line numbers stay valid
+        for kind, first, last, indent, sources in reversed(runs):
+            path = bundles[bundle_key(kind, sources)]
+            tag = f'<script src="{path}"></script>' if kind == "js" else f'<link rel="stylesheet" href="{path}">'
+            lines[first:last + 1] = [
+                f"{indent}<!-- build:{kind} {' '.join(sources)} -->",
+                indent + tag,
+                f"{indent}<!-- endbuild -->"
+            ]
+        with open(os.path.join(ROOT, page), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        manifest["pages"][page] = [bundles[bundle_key(run[0], run[4])] for run in runs]
+
+    with open(os.path.join(ROOT, DIST, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Drop bundles from earlier builds
+    keep = set(bundles.values())
+    for existing in glob.glob(os.path.join(ROOT, DIST, "*")):
+        relative = f"{DIST}/{os.path.basename(existing)}"
+        base = re.sub(r"\.(gz|br)$", "", relative)
+        if relative.endswith(MANIFEST) or base in keep:
+            continue
+        os.remove(existing)
+
+    return manifest
+
+
+def clean():
+    """Restore the original tags in every page and remove dist/"""
+    for page in glob.glob(os.path.join(ROOT, "*.html")):
+        with open(page, encoding="utf-8") as f:
+            html = f.read()
+        restored = restore_page(html)
+        if restored != html:
+            with open(page, "w", encoding="utf-8") as f:
+                f.write(restored)
+            print(f"↩️  Restored {os.path.basename(page)}")
+    shutil.rmtree(os.path.join(ROOT, DIST), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle, fingerprint and precompress frontend assets")
+    parser.add_argument("--no-minify", action="store_true", help="concatenate without minifying")
+    parser.add_argument("--clean", action="store_true", help="undo the build: restore pages and remove dist/")
+    args = parser.parse_args()
+
+    if args.clean:
+        clean()
+        print("✅ Build removed")
+        return
+
+    started = time.perf_counter()
+    manifest = build(minify=not args.no_minify)
+    for path, info in manifest["bundles"].items():
+        print(f"📦 {path}: {len(info['sources'])} files, {info['source_bytes']:,} → {info['bytes']:,} bytes "
+              f"({info['gzip_bytes']:,} gzip) for {', '.join(info['pages'])}")
+    print(f"✅ {len(manifest['bundles'])} bundles for {len(manifest['pages'])} pages "
+          f"in {time.perf_counter() - started:.2f}s; manifest: {DIST}/{MANIFEST}")
+    if brotli is None:
+        print("💡 Install the brotli package to also write .br variants")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -336,6 +336,13 @@ class AuthManager {
         const token = StorageManager.getItem('auth_token');
         const user = StorageManager.getItem('auth_user');
 
+        // Tokens saved before the API issued signed tokens (e.g. demo_token_...)
+        // are no longer accepted; drop them instead of sending them
+        if (token && token.split('.').length !== 3) {
+            this.clearAuthData();
+            return;
+        }
+
         if (token && user) {
             this.token = token;
             this.user = user;
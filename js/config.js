@@ -41,7 +41,10 @@ const CONFIG = {
         NAME: 'ExoPlanet AI Enhanced',
         VERSION: '2.0.0',
         DESCRIPTION: 'NASA & Gemini AI Integration Platform',
-        BACKEND_URL: 'https://bablushakya-nasa-2025-backend.onrender.com',
+        // Pages served by the API process carry this tag and call it same-origin
+        BACKEND_URL: (typeof document !== 'undefined' && document.querySelector('meta[name="exoplanet-api"]'))
+            ? window.location.origin
+            : 'https://bablushakya-nasa-2025-backend.onrender.com',
         FRONTEND_URL: 'http://localhost:3000'
     },
     
@@ -1,50 +1,334 @@
 #!/usr/bin/env python3
 """
-Simple HTTP server to serve the ExoPlanet AI frontend
+HTTP server for the ExoPlanet AI frontend
+
+Serves files concurrently (one thread per connection, HTTP/1.1 keep-alive)
+and sends file bodies with sendfile. Responses carry ETag and Last-Modified
+for cheap 304 revalidation, fingerprinted assets (e.g. main.3f9c2b1a.js)
+are cached as immutable, precompressed .br/.gz siblings are served when
+the client accepts them, and single byte ranges are supported.
+
+SIGTERM stops accepting connections and waits for responses in progress.
+
+Usage: python start_frontend.py [--port 3000] [--dev] [--no-browser] [--fd N]
 """
 
+import argparse
+import email.utils
 import http.server
-import socketserver
-import webbrowser
+import mimetypes
 import os
+import re
+import signal
+import socket
 import sys
+import threading
+import time
+import webbrowser
+from contextlib import contextmanager
 
 PORT = 3000
 DIRECTORY = "."
 
+# name.<8+ hex digits>.ext, as written by the asset build
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+DEV_CACHE = "no-cache, no-store, must-revalidate"
+
+# Precompressed siblings, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Seconds to wait for responses in progress when stopping
+DRAIN_TIMEOUT = 10
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts with a non-zero quality"""
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single satisfiable range, None to ignore it, or False if unsatisfiable"""
+    match = RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or end < start:
+            return False
+    else:
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        start, end = max(size - length, 0), size - 1
+    return start, end
+
+
 class Handler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    dev_mode = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIRECTORY, **kwargs)
-    
-    def end_headers(self):
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
-        super().end_headers()
+
+    def do_GET(self):
+        with self.server.in_flight():
+            self._serve(send_body=True)
+
+    def do_HEAD(self):
+        with self.server.in_flight():
+            self._serve(send_body=False)
+
+    def _serve(self, send_body):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                self.send_response(301)
+                self.send_header("Location", self.path.split("?", 1)[0] + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            index = os.path.join(path, "index.html")
+            if not os.path.isfile(index):
+                listing = self.list_directory(path)
+                if listing is not None:
+                    try:
+                        if send_body:
+                            self.copyfile(listing, self.wfile)
+                    finally:
+                        listing.close()
+                return
+            path = index
+
+        if not os.path.isfile(path):
+            self.send_error(404, "File not found")
+            return
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+
+        if not self.dev_mode and self._not_modified(etag, stat.st_mtime):
+            self.send_response(304)
+            self._send_cache_headers(path, etag, last_modified)
+            self.end_headers()
+            return
+
+        content_type = self.guess_type(path)
+        body_path, encoding = path, None
+        range_header = self.headers.get("Range")
+        if range_header and not self._if_range_matches(etag, stat.st_mtime):
+            range_header = None
+        if not range_header:
+            body_path, encoding = self._precompressed(path, stat.st_mtime)
+
+        try:
+            f = open(body_path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = 0, size - 1
+            status = 200
+            if range_header:
+                byte_range = parse_range(range_header, size)
+                if byte_range is False:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if byte_range is not None:
+                    start, end = byte_range
+                    status = 206
+
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            if self._has_variants(path):
+                self.send_header("Vary", "Accept-Encoding")
+            self._send_cache_headers(path, etag if not encoding else f'{etag[:-1]}-{encoding}"', last_modified)
+            self.end_headers()
+
+            if send_body and end >= start:
+                # Zero-copy where the platform supports it
+                self.connection.sendfile(f, start, end - start + 1)
+
+    def _send_cache_headers(self, path, etag, last_modified):
+        if self.dev_mode:
+            self.send_header("Cache-Control", DEV_CACHE)
+            self.send_header("Pragma", "no-cache")
+            self.send_header("Expires", "0")
+            return
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        immutable = FINGERPRINTED.search(os.path.basename(path))
+        self.send_header("Cache-Control", IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE)
+
+    def _not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            # Encoded variants share the file's validator prefix
+            return "*" in tags or any(tag == etag or tag.startswith(etag[:-1] + "-") for tag in tags)
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def _if_range_matches(self, etag, mtime):
+        if_range = self.headers.get("If-Range")
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == etag
+        try:
+            return int(mtime) <= email.utils.parsedate_to_datetime(if_range).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _precompressed(self, path, mtime):
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        for encoding, suffix in ENCODINGS:
+            candidate = path + suffix
+            if encoding in accepted:
+                try:
+                    # A stale variant (older than its source) is never served
+                    if os.stat(candidate).st_mtime >= mtime:
+                        return candidate, encoding
+                except OSError:
+                    continue
+        return path, None
+
+    def _has_variants(self, path):
+        return any(os.path.exists(path + suffix) for _, suffix in ENCODINGS)
+
+    def guess_type(self, path):
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+        return content_type
+
+
+class FrontendServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._active = 0
+        self._idle = threading.Condition()
+
+    @classmethod
+    def from_fd(cls, fd, handler):
+        """Serve on an already listening socket (e.g. passed by supervisor.py)"""
+        httpd = cls(("", 0), handler, bind_and_activate=False)
+        httpd.socket.close()
+        httpd.socket = socket.socket(fileno=fd)
+        httpd.server_address = httpd.socket.getsockname()
+        return httpd
+
+    @contextmanager
+    def in_flight(self):
+        with self._idle:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._idle:
+                self._active -= 1
+                self._idle.notify_all()
+
+    def drain(self, timeout):
+        """Wait up to ``timeout`` seconds for responses in progress"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._active and time.monotonic() < deadline:
+                self._idle.wait(deadline - time.monotonic())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the ExoPlanet AI frontend")
+    parser.add_argument("--port", type=int, default=PORT, help=f"first port to try (default: {PORT})")
+    parser.add_argument("--bind", default="", help="address to bind (default: all interfaces)")
+    parser.add_argument("--dev", action="store_true", help="disable browser caching (no-store on every response)")
+    parser.add_argument("--no-browser", action="store_true", help="do not open a browser window")
+    parser.add_argument("--fd", type=int, help="serve on this inherited listening socket instead of binding")
+    return parser.parse_args()
+
+
+def serve(httpd, args):
+    port = httpd.server_address[1]
+    print(f"🚀 ExoPlanet AI Frontend Server")
+    print(f"📡 Serving at http://localhost:{port}")
+    print(f"📁 Directory: {os.getcwd()}")
+    print(f"🗄️  Caching: {'disabled (dev mode)' if args.dev else 'ETag revalidation, immutable fingerprinted assets'}")
+    print(f"⏹️  Press Ctrl+C to stop the server")
+
+    # Open browser
+    if not args.no_browser:
+        print(f"🌐 Opening browser...")
+        webbrowser.open(f'http://localhost:{port}')
+
+    # shutdown() blocks until serve_forever() returns, so it runs on another thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=httpd.shutdown).start())
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    httpd.drain(DRAIN_TIMEOUT)
+    print(f"\n🛑 Server stopped")
+
 
 def main():
+    args = parse_args()
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
-    port = PORT
+    Handler.dev_mode = args.dev
+
+    if args.fd is not None:
+        with FrontendServer.from_fd(args.fd, Handler) as httpd:
+            serve(httpd, args)
+        return
+
+    port = args.port
     max_attempts = 10
-    
+
     for attempt in range(max_attempts):
         try:
-            with socketserver.TCPServer(("", port), Handler) as httpd:
-                print(f"🚀 ExoPlanet AI Frontend Server")
-                print(f"📡 Serving at http://localhost:{port}")
-                print(f"📁 Directory: {os.getcwd()}")
-                print(f"🌐 Opening browser...")
-                print(f"⏹️  Press Ctrl+C to stop the server")
-                
-                # Open browser
-                webbrowser.open(f'http://localhost:{port}')
-                
-                try:
-                    httpd.serve_forever()
-                except KeyboardInterrupt:
-                    print(f"\n🛑 Server stopped")
-                    sys.exit(0)
+            with FrontendServer((args.bind, port), Handler) as httpd:
+                serve(httpd, args)
                 break
         except OSError as e:
             if e.errno == 10048 or 'address already in use' in str(e).lower():
@@ -52,11 +336,11 @@ def main():
                 port += 1
                 if attempt == max_attempts - 1:
                     print(f"\n❌ Could not find an available port after {max_attempts} attempts.")
-                    print(f"💡 Please close other applications or kill the process using port {PORT}")
-                    print(f"💡 Run: netstat -ano | findstr :{PORT}")
+                    print(f"💡 Please close other applications or kill the process using port {args.port}")
+                    print(f"💡 Run: netstat -ano | findstr :{args.port}")
                     sys.exit(1)
             else:
                 raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Process supervisor for the ExoPlanet AI servers
+
+Starts the backend and the frontend server in parallel and declares each
+ready once its health URL answers, reporting how long startup took. The
+supervisor binds the listening sockets itself and hands them to the
+children, so ports are known up front and a restarted child keeps its
+port (connections queue instead of being refused). Children that exit or
+stop answering health checks are restarted with exponential backoff.
+Ctrl+C / SIGTERM is forwarded to the children as SIGTERM so they finish
+in-flight requests before exiting.
+
+Usage: python supervisor.py [--backend-port 8000] [--frontend-port 3000] [--no-browser]
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import webbrowser
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_TIMEOUT = 30.0      # seconds for a child to answer its health check
+HEALTH_INTERVAL = 5.0       # seconds between checks once a child is ready
+HEALTH_FAILURES = 3         # consecutive failed checks before a restart
+DRAIN_TIMEOUT = 10.0        # seconds for children to finish requests on shutdown
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+STABLE_AFTER = 30.0         # a child up this long starts over with the initial backoff
+PORT_ATTEMPTS = 10
+
+# Listening sockets are inherited by descriptor where the platform allows it
+INHERIT_SOCKETS = os.name == "posix"
+
+
+@dataclass
+class Component:
+    name: str
+    cwd: str
+    command: List[str]  # "{fd}" / "{port}" are filled in when starting
+    port: int
+    host: str = ""
+    health_path: str = "/health"
+
+
+@dataclass
+class Child:
+    component: Component
+    sock: Optional[socket.socket] = None
+    port: int = 0
+    process: Optional[subprocess.Popen] = None
+    started_at: float = 0.0
+    ready_at: Optional[float] = None
+    next_check: float = 0.0
+    health_failures: int = 0
+    restarts: int = 0
+    backoff: float = INITIAL_BACKOFF
+    restart_at: Optional[float] = None
+    startup_times: List[float] = field(default_factory=list)
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+
+def bind_port(host, port):
+    """Bind the first free port from ``port`` on; returns (socket, port)"""
+    for candidate in range(port, port + PORT_ATTEMPTS):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if os.name == "posix":
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, candidate))
+        except OSError:
+            sock.close()
+            print(f"⚠️  Port {candidate} is already in use, trying {candidate + 1}...")
+            continue
+        if not INHERIT_SOCKETS:
+            # The child binds the port itself
+            sock.close()
+            return None, candidate
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock, candidate
+    raise OSError(f"No free port in {port}-{port + PORT_ATTEMPTS - 1}")
+
+
+def check_health(port, path, timeout=1.0):
+    """True if GET ``path`` answers with a 2xx/3xx status"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        connection.request("GET", path, headers={"Host": f"localhost:{port}"})
+        return connection.getresponse().status < 400
+    except (OSError, http.client.HTTPException):
+        return False
+    finally:
+        connection.close()
+
+
+class Supervisor:
+    def __init__(self, components):
+        self.children = [Child(component) for component in components]
+        self.stopping = False
+
+    def run(self, on_ready=None):
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+
+        for child in self.children:
+            child.sock, child.port = bind_port(child.component.host, child.component.port)
+        launched_at = time.monotonic()
+        for child in self.children:
+            self._start(child)
+
+        all_ready = False
+        try:
+            while not self.stopping:
+                now = time.monotonic()
+                for child in self.children:
+                    self._tend(child, now)
+                if not all_ready and all(child.ready_at for child in self.children):
+                    all_ready = True
+                    print(f"🎉 All servers ready in {time.monotonic() - launched_at:.2f}s")
+                    if on_ready is not None:
+                        on_ready(self)
+                # Poll quickly while something is starting
+                starting = any(child.ready_at is None for child in self.children)
+                time.sleep(0.1 if starting else 0.5)
+        finally:
+            self._stop_all()
+
+    def _handle_stop(self, _signum, _frame):
+        if not self.stopping:
+            print("\n🛑 Shutting down servers...")
+        self.stopping = True
+
+    def _start(self, child):
+        component = child.component
+        fill = {"fd": child.sock.fileno() if child.sock else "", "port": child.port}
+        command = [part.format(**fill) for part in component.command]
+        if INHERIT_SOCKETS:
+            # Own session: the terminal's Ctrl+C reaches only the supervisor,
+            # which then stops the children in order
+            options = {"pass_fds": (child.sock.fileno(),), "start_new_session": True}
+        else:
+            options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        print(f"🚀 Starting {component.name} on port {child.port}...")
+        child.process = subprocess.Popen(command, cwd=component.cwd, **options)
+        child.started_at = time.monotonic()
+        child.ready_at = None
+        child.health_failures = 0
+        child.restart_at = None
+
+    def _tend(self, child, now):
+        component = child.component
+        if child.restart_at is not None:
+            if now >= child.restart_at:
+                child.restarts += 1
+                self._start(child)
+            return
+
+        code = child.process.poll()
+        if code is not None:
+            print(f"❌ {component.name} exited with status {code}")
+            self._schedule_restart(child, now)
+            return
+
+        if child.ready_at is None:
+            if check_health(child.port, component.health_path, timeout=0.5):
+                # The check itself may have waited in the listen backlog
+                # for the child to start accepting
+                child.ready_at = time.monotonic()
+                child.next_check = child.ready_at + HEALTH_INTERVAL
+                startup = child.ready_at - child.started_at
+                child.startup_times.append(startup)
+                print(f"✅ {component.name} ready in {startup:.2f}s (http://localhost:{child.port})")
+            elif now - child.started_at > STARTUP_TIMEOUT:
+                print(f"❌ {component.name} not healthy after {STARTUP_TIMEOUT:.0f}s, restarting")
+                self._terminate(child)
+                self._schedule_restart(child, now)
+            return
+
+        if now >= child.next_check:
+            child.next_check = now + HEALTH_INTERVAL
+            if check_health(child.port, component.health_path):
+                child.health_failures = 0
+            else:
+                child.health_failures += 1
+                if child.health_failures >= HEALTH_FAILURES:
+                    print(f"❌ {component.name} failed {HEALTH_FAILURES} health checks, restarting")
+                    self._terminate(child)
+                    self._schedule_restart(child, now)
+
+    def _schedule_restart(self, child, now):
+        if child.ready_at is not None and now - child.ready_at >= STABLE_AFTER:
+            child.backoff = INITIAL_BACKOFF
+        print(f"🔁 Restarting {child.component.name} in {child.backoff:.0f}s")
+        child.restart_at = now + child.backoff
+        child.ready_at = None
+        child.backoff = min(child.backoff * 2, MAX_BACKOFF)
+
+    def _terminate(self, child):
+        """Ask a child to drain and exit, killing it after DRAIN_TIMEOUT"""
+        if not child.running:
+            return
+        self._signal_stop(child)
+        try:
+            child.process.wait(timeout=DRAIN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            print(f"⚠️  Force killing {child.component.name}...")
+            child.process.kill()
+            child.process.wait()
+
+    @staticmethod
+    def _signal_stop(child):
+        if INHERIT_SOCKETS:
+            child.process.send_signal(signal.SIGTERM)
+        else:
+            child.process.send_signal(signal.CTRL_BREAK_EVENT)
+
+    def _stop_all(self):
+        running = [child for child in self.children if child.running]
+        for child in running:
+            self._signal_stop(child)
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        for child in running:
+            try:
+                child.process.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                print(f"⚠️  Force killing {child.component.name}...")
+                child.process.kill()
+                child.process.wait()
+        for child in self.children:
+            if child.sock is not None:
+                child.sock.close()
+        print("✅ Servers stopped")
+
+    def report(self):
+        """Startup time and restart count of each child"""
+        for child in self.children:
+            times = ", ".join(f"{t:.2f}s" for t in child.startup_times) or "never ready"
+            print(f"   {child.component.name}: port {child.port}, startup {times}, restarts {child.restarts}")
+
+
+def default_components(backend_port, frontend_port):
+    if INHERIT_SOCKETS:
+        backend_bind = ["--fd", "{fd}"]
+        frontend_bind = ["--fd", "{fd}"]
+    else:
+        backend_bind = ["--host", "0.0.0.0", "--port", "{port}"]
+        frontend_bind = ["--port", "{port}"]
+    return [
+        Component(
+            name="Backend",
+            cwd=os.path.join(ROOT, "backend"),
+            command=[sys.executable, "-m", "uvicorn", "app.main:app", *backend_bind],
+            port=backend_port,
+            host="0.0.0.0",
+            health_path="/health"
+        ),
+        Component(
+            name="Frontend",
+            cwd=ROOT,
+            command=[sys.executable, "start_frontend.py", "--no-browser", *frontend_bind],
+            port=frontend_port,
+            health_path="/"
+        ),
+    ]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run and supervise the ExoPlanet AI servers")
+    parser.add_argument("--backend-port", type=int, default=8000, help="first backend port to try (default: 8000)")
+    parser.add_argument("--frontend-port", type=int, default=3000, help="first frontend port to try (default: 3000)")
+    parser.add_argument("--no-browser", action="store_true", help="do not open a browser window")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print("🚀 ExoPlanet AI - Full Stack Application")
+    print("=" * 50)
+
+    supervisor = Supervisor(default_components(args.backend_port, args.frontend_port))
+
+    def on_ready(supervisor):
+        backend, frontend = supervisor.children
+        print("\n" + "=" * 50)
+        print("🎉 ExoPlanet AI is now running!")
+        print(f"🌐 Frontend: http://localhost:{frontend.port}")
+        print(f"🔧 Backend API: http://localhost:{backend.port}")
+        print(f"📚 API Docs: http://localhost:{backend.port}/docs")
+        print("⏹️  Press Ctrl+C to stop both servers")
+        print("=" * 50)
+        if not args.no_browser:
+            webbrowser.open(f"http://localhost:{frontend.port}")
+
+    try:
+        supervisor.run(on_ready=on_ready)
+    except OSError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    supervisor.report()
+
+
+if __name__ == "__main__":
+    main()